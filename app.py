@@ -1,22 +1,45 @@
+import time
+START_TIME = time.perf_counter()  # Process start, for time-to-first-prediction
+
 import os
-from flask import Flask, request, jsonify, render_template
+import argparse
+import binascii
+from functools import wraps
+from flask import Flask, Response, request, jsonify, render_template, make_response
 from flask_cors import CORS, cross_origin
-from cnnClassifier.utils.common import decodeImage
+from cnnClassifier.utils.common import decodeImage, InvalidInput
 from cnnClassifier.pipeline.prediction import PredictionPipeline
+from cnnClassifier.config.configuration import ConfigurationManager
+from cnnClassifier.components.training_jobs import TrainingJobRunner, TrainingJobAlreadyRunning
+from cnnClassifier.components.admission_control import Overloaded, DeadlineExceeded, deadline_from_ms
+from cnnClassifier.pipeline.serving import PreforkServer
+from cnnClassifier.utils.metrics import REGISTRY, PHASE_LATENCY, track_requests
+from cnnClassifier import logger
 
 # Set environment variables for language settings
 os.putenv('LANG', 'en_US.UTF-8')
 os.putenv('LC_ALL', 'en_US.UTF-8')
 
+# Malformed request bodies: bad base64, missing or mistyped fields. Only caught around reading the
+# payload; the pipeline reports unusable images and options as InvalidInput, and anything else it
+# raises (model loading, inference, cache writes) is a server fault answered with 500
+CLIENT_ERRORS = (ValueError, OSError, binascii.Error, KeyError, TypeError)
+
 # Initialize Flask app
 app = Flask(__name__)
 CORS(app)  # Enable Cross-Origin Resource Sharing (CORS) for all routes
 
-# ClientApp class to manage file and classifier initialization
+# ClientApp class to manage classifier initialization
 class ClientApp:
     def __init__(self):
-        self.filename = "inputImage.jpg"  # Default filename for input images
-        self.classifier = PredictionPipeline(self.filename)  # Initialize prediction pipeline with filename
+        self.classifier = PredictionPipeline()  # Initialize the in-memory prediction pipeline
+        self.trainer = TrainingJobRunner(ConfigurationManager().get_training_job_config())  # Background retraining
+        self.first_prediction_logged = False
+
+        # Preload and warm up the model in the background; /ready reports healthy afterwards
+        self.classifier.start_warmup(
+            on_ready=lambda: logger.info(f"Ready to predict {time.perf_counter() - START_TIME:.2f}s after start")
+        )
 
 # Route for the homepage
 @app.route("/", methods=['GET'])
@@ -27,23 +50,190 @@ def home():
 # Route for model training
 @app.route("/train", methods=['GET', 'POST'])
 @cross_origin()
+@track_requests("train")
 def trainRoute():
-    # Run DVC pipeline to retrain the model
-    os.system("dvc repro")  # Executes the command to retrain via DVC
-    return "Training done successfully!"
+    # Start the DVC pipeline as a background job; the new model is hot-swapped when it lands
+    try:
+        job = clApp.trainer.submit()
+    except TrainingJobAlreadyRunning as e:
+        return jsonify(e.job), 409  # Only one training job may run at a time
+    return jsonify(job), 202
+
+# Route for checking the status of a training job
+@app.route("/train/<job_id>", methods=['GET'])
+@cross_origin()
+def trainStatusRoute(job_id):
+    job = clApp.trainer.status(job_id)
+    if job is None:
+        return jsonify({"error": f"Unknown training job {job_id}"}), 404
+    return jsonify(job)
+
+# Read the uploaded image bytes from a raw, multipart or base64-JSON request body
+def readImagePayload(req):
+    if req.mimetype == 'application/octet-stream':
+        # Raw bytes: read straight from the request stream, no base64 or JSON parsing
+        return b"".join(iter(lambda: req.stream.read(64 * 1024), b""))
+    if req.mimetype == 'multipart/form-data':
+        return req.files['image'].read()
+    return decodeImage(req.json['image'])  # Backwards-compatible base64 in JSON
+
+# Read optional request options from the query string or, for JSON requests, the JSON body
+def readRequestOptions(req):
+    options = dict(req.args)
+    if req.mimetype == 'application/json':
+        options.update(req.json)
+    return options
+
+# Deadline of the request: the X-Request-Deadline-Ms budget, else the configured default, from arrival
+def requestDeadline(req):
+    budget_ms = req.headers.get('X-Request-Deadline-Ms', type=float)
+    return deadline_from_ms(budget_ms if budget_ms is not None else clApp.classifier.config.default_deadline_ms)
+
+# Turn admission-control failures into 503 (with Retry-After) and 504 responses, and report
+# the time spent queued separately from the forward pass in a Server-Timing header
+def admissionControlled(view):
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        try:
+            response = make_response(view(*args, **kwargs))
+        except Overloaded as e:
+            response = make_response(jsonify({"error": str(e)}), 503)
+            response.headers['Retry-After'] = str(e.retry_after)
+            return response
+        except DeadlineExceeded as e:
+            return make_response(jsonify({"error": str(e)}), 504)
+        timings = clApp.classifier.last_timings()
+        response.headers['Server-Timing'] = (
+            f"queue;dur={timings['queue_wait_ms']:.2f}, compute;dur={timings['compute_ms']:.2f}"
+        )
+        return response
+    return wrapper
 
 # Route for making predictions
 @app.route("/predict", methods=['POST'])
 @cross_origin()
+@track_requests("predict")
+@admissionControlled
 def predictRoute():
-    # Decode the incoming image data and save to the specified file
-    image = request.json['image']
-    decodeImage(image, clApp.filename)
-    
-    # Make prediction using the classifier
-    result = clApp.classifier.predict()
-    return jsonify(result)  # Return the prediction result as JSON
+    deadline = requestDeadline(request)
+
+    try:
+        # Read the incoming image data in memory (no shared file on disk)
+        with PHASE_LATENCY.labels("decode").time():
+            image = readImagePayload(request)
+        options = readRequestOptions(request)
+        tta_views = int(options['tta']) if options.get('tta') is not None else None
+    except CLIENT_ERRORS as e:
+        return jsonify({"error": f"Invalid request: {e}"}), 400
+
+    # Make prediction using the classifier, optionally over K augmented views in one forward pass
+    try:
+        result = clApp.classifier.predict(
+            image, tta_views=tta_views, tta_aggregation=options.get('aggregation'), deadline=deadline
+        )
+    except InvalidInput as e:
+        return jsonify({"error": f"Invalid request: {e}"}), 400
+    if not clApp.first_prediction_logged:
+        clApp.first_prediction_logged = True
+        logger.info(f"First prediction served {time.perf_counter() - START_TIME:.2f}s after start")
+
+    # Return the prediction result as JSON
+    with PHASE_LATENCY.labels("encode").time():
+        return jsonify(result)
+
+# Route for predicting many images in one request (JSON list of base64 strings or multipart files)
+@app.route("/predict_batch", methods=['POST'])
+@cross_origin()
+@track_requests("predict_batch")
+@admissionControlled
+def predictBatchRoute():
+    deadline = requestDeadline(request)
+    try:
+        with PHASE_LATENCY.labels("decode").time():
+            if request.files:
+                images = [f.read() for f in request.files.getlist('images')]
+            else:
+                images = [decodeImage(image) for image in request.json['images']]
+    except CLIENT_ERRORS as e:
+        return jsonify({"error": f"Invalid request: {e}"}), 400
+
+    try:
+        results = clApp.classifier.predict_proba(images, deadline=deadline)
+    except InvalidInput as e:
+        return jsonify({"error": f"Invalid request: {e}"}), 400
+
+    # Return the predicted class and per-class probabilities for every image
+    with PHASE_LATENCY.labels("encode").time():
+        return jsonify(results)
+
+# Route for finding the most similar ingested cases by backbone embedding
+@app.route("/similar", methods=['POST'])
+@cross_origin()
+@track_requests("similar")
+@admissionControlled
+def similarRoute():
+    deadline = requestDeadline(request)
+    try:
+        with PHASE_LATENCY.labels("decode").time():
+            image = readImagePayload(request)
+        k = readRequestOptions(request).get('k')
+    except CLIENT_ERRORS as e:
+        return jsonify({"error": f"Invalid request: {e}"}), 400
+
+    try:
+        results = clApp.classifier.similar(image, k=k, deadline=deadline)
+    except FileNotFoundError as e:
+        return jsonify({"error": str(e)}), 503  # No embeddings extracted yet
+    except InvalidInput as e:
+        return jsonify({"error": f"Invalid request: {e}"}), 400
+
+    with PHASE_LATENCY.labels("encode").time():
+        return jsonify(results)
+
+# Route for serving statistics (model version, batching queue depth and batch sizes)
+@app.route("/stats", methods=['GET'])
+@cross_origin()
+def statsRoute():
+    return jsonify(clApp.classifier.stats())
+
+# Liveness probe: the process is up and serving HTTP
+@app.route("/health", methods=['GET'])
+def healthRoute():
+    return jsonify({"status": "ok"})
+
+# Readiness probe: healthy only once the model is loaded and warmed up
+@app.route("/ready", methods=['GET'])
+def readyRoute():
+    if not clApp.classifier.ready.is_set():
+        return jsonify({"status": "warming up"}), 503
+    return jsonify({"status": "ready", "model_version": clApp.classifier.registry.version})
+
+# Route for Prometheus metrics (request counts, errors, in-flight requests and per-phase latency)
+@app.route("/metrics", methods=['GET'])
+def metricsRoute():
+    return Response(REGISTRY.render(), mimetype="text/plain; version=0.0.4")
+
+# Build the per-process ClientApp (called in each worker when pre-forking)
+def create_client_app():
+    global clApp
+    clApp = ClientApp()
 
 if __name__ == "__main__":
-    clApp = ClientApp()  # Instantiate the ClientApp class
-    app.run(host='0.0.0.0', port=8080)  # Run the app, making it accessible from any network interface
+    # Serving settings come from config.yaml and can be overridden on the command line
+    serving_config = ConfigurationManager().get_serving_config()
+    parser = argparse.ArgumentParser(description="Kidney disease classification web app")
+    parser.add_argument("--host", default=serving_config.host)
+    parser.add_argument("--port", type=int, default=serving_config.port)
+    parser.add_argument("--workers", type=int, default=serving_config.workers)
+    parser.add_argument("--threads-per-worker", type=int, default=serving_config.threads_per_worker)
+    args = parser.parse_args()
+    serving_config = type(serving_config)(
+        host=args.host, port=args.port, workers=args.workers, threads_per_worker=args.threads_per_worker
+    )
+
+    if serving_config.workers > 1:
+        # Production mode: preload in the parent, fork workers sharing the model and pinned to CPU slices
+        PreforkServer(app, serving_config, init_worker=create_client_app).serve()
+    else:
+        create_client_app()  # Instantiate the ClientApp class
+        app.run(host=serving_config.host, port=serving_config.port)  # Run the app on the configured interface
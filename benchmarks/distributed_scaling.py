@@ -0,0 +1,147 @@
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+
+# Make the package and the synthetic image generator importable when run from the repository root
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import tensorflow as tf  # noqa: E402
+from cnnClassifier.components.data_loader import DataLoader  # noqa: E402
+from cnnClassifier.components.split_manifest import build_split_manifest  # noqa: E402
+from cnnClassifier.components.prepare_base_model import PrepareBaseModel  # noqa: E402
+from cnnClassifier.components.distributed_training import (  # noqa: E402
+    cluster_from_env, multi_worker_strategy, sharded_dataset, launch_local_workers
+)
+from input_pipeline import DEFAULT_DATA, write_synthetic_dataset  # noqa: E402
+
+
+class StepTimer(tf.keras.callbacks.Callback):
+    """Records the wall-clock time at the end of every training step."""
+
+    def __init__(self):
+        super().__init__()
+        self.times = []
+
+    def on_train_batch_end(self, batch, logs=None):
+        self.times.append(time.perf_counter())
+
+
+def worker(args):
+    """Trains the full model for a fixed number of steps as one worker of the TF_CONFIG cluster."""
+    num_workers, index = cluster_from_env()
+    strategy = multi_worker_strategy()  # Must precede every other TensorFlow op
+
+    image_size = [args.image_size, args.image_size, 3]
+    loader = DataLoader(args.manifest, image_size, args.batch_size)
+
+    def build():
+        # Untrained backbone: the step cost is the same as with the ImageNet weights
+        base = tf.keras.applications.vgg19.VGG19(input_shape=image_size, weights=None, include_top=False)
+        return PrepareBaseModel._prepare_full_model(
+            model=base, classes=loader.num_classes, freeze_all=True, freeze_till=None,
+            learning_rate=0.01 * num_workers, dropout=0.25,
+        )
+
+    train_kwargs = dict(subset=None, shuffle=True, augment=args.augment, repeat=True)
+    if strategy is None:
+        model, dataset = build(), loader.dataset(**train_kwargs)
+    else:
+        with strategy.scope():
+            model = build()
+        dataset = sharded_dataset(loader, **train_kwargs)
+
+    timer = StepTimer()
+    model.fit(dataset, epochs=1, steps_per_epoch=args.warmup + args.steps, callbacks=[timer], verbose=0)
+
+    # Every step waits for the all-reduce, so the chief's step times cover the whole cluster
+    elapsed = timer.times[-1] - timer.times[args.warmup - 1]
+    steps = args.steps
+    if index == 0:
+        with open(args.result, "w") as f:
+            json.dump({
+                "workers": num_workers,
+                "global_batch_size": args.batch_size * num_workers,
+                "steps": steps,
+                "elapsed_s": elapsed,
+                "images_per_s": steps * args.batch_size * num_workers / elapsed,
+            }, f)
+
+
+def run(args, directory: str, tmp: str) -> dict:
+    results = {
+        "data": directory,
+        "image_size": args.image_size,
+        "batch_size_per_worker": args.batch_size,
+        "augment": args.augment,
+        "cpus": os.cpu_count(),
+        "host": platform.node(),
+        "runs": [],
+    }
+    # Every image trains, so the runs only differ in the number of workers
+    manifest_path = os.path.join(tmp, "split_manifest.json")
+    build_split_manifest(directory, manifest_path, validation_fraction=0.0, test_fraction=0.0)
+    for num_workers in args.workers:
+        result_path = os.path.join(tmp, f"result-{num_workers}.json")
+        command = [
+            sys.executable, os.path.abspath(__file__), "--worker",
+            "--manifest", manifest_path, "--result", result_path,
+            "--image-size", str(args.image_size), "--batch-size", str(args.batch_size),
+            "--steps", str(args.steps), "--warmup", str(args.warmup),
+        ] + (["--augment"] if args.augment else [])
+        # A fresh port range per run avoids ports still in TIME_WAIT from the previous cluster
+        launch_local_workers(
+            command, num_workers, args.base_port + 100 * num_workers, os.path.join(tmp, f"logs-{num_workers}")
+        )
+        with open(result_path) as f:
+            results["runs"].append(json.load(f))
+
+    base = results["runs"][0]
+    for run_result in results["runs"]:
+        run_result["speedup"] = run_result["images_per_s"] / base["images_per_s"]
+        run_result["efficiency"] = run_result["speedup"] * base["workers"] / run_result["workers"]
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure training images/sec against the number of MultiWorkerMirroredStrategy workers")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4], help="Worker counts to measure")
+    parser.add_argument("--data", default=DEFAULT_DATA, help="Class-per-subdirectory dataset")
+    parser.add_argument("--synthetic", type=int, default=0, help="Use this many synthetic CT slices instead of --data")
+    parser.add_argument("--synthetic-size", type=int, default=512, help="Synthetic slice width and height")
+    parser.add_argument("--image-size", type=int, default=224, help="Model input width and height")
+    parser.add_argument("--batch-size", type=int, default=32, help="Batch size per worker")
+    parser.add_argument("--steps", type=int, default=30, help="Timed training steps")
+    parser.add_argument("--warmup", type=int, default=5, help="Untimed steps before the timed ones (at least 1)")
+    parser.add_argument("--augment", action="store_true", help="Apply the training augmentation")
+    parser.add_argument("--base-port", type=int, default=24000, help="Base port of the local workers")
+    parser.add_argument("--output", default=None, help="Optional path of the JSON report")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--manifest", default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--result", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    # Timing starts at the end of the last warm-up step, so at least one of each is needed
+    if args.warmup < 1:
+        parser.error("--warmup must be at least 1")
+    if args.steps < 1:
+        parser.error("--steps must be at least 1")
+
+    if args.worker:
+        worker(args)
+        sys.exit(0)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = args.data
+        if args.synthetic:
+            directory = os.path.join(tmp, "data")
+            write_synthetic_dataset(directory, args.synthetic, args.synthetic_size)
+        report = json.dumps(run(args, directory, tmp), indent=4)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(report)
+    print(report)
@@ -0,0 +1,104 @@
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+
+# Make the package and the synthetic image generator importable when run from the repository root
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import tensorflow as tf  # noqa: E402
+from cnnClassifier.components.data_loader import DataLoader, AUGMENTATION_KWARGS  # noqa: E402
+from cnnClassifier.components.split_manifest import SplitManifest, build_split_manifest  # noqa: E402
+from synthetic_ct import synthetic_ct_jpeg  # noqa: E402
+
+DEFAULT_DATA = "artifacts/data_ingestion/CT-KIDNEY-DATASET-Normal-Cyst-Tumor-Stone"
+CLASSES = ("Cyst", "Normal", "Stone", "Tumor")
+
+
+def write_synthetic_dataset(directory: str, images: int, size: int):
+    """Writes a class-per-subdirectory dataset of synthetic CT slices."""
+    for seed in range(images):
+        class_dir = os.path.join(directory, CLASSES[seed % len(CLASSES)])
+        os.makedirs(class_dir, exist_ok=True)
+        with open(os.path.join(class_dir, f"slice_{seed:06d}.jpg"), "wb") as f:
+            f.write(synthetic_ct_jpeg(seed, size))
+
+
+def image_data_generator(manifest_path: str, image_size: list, batch_size: int, augment: bool):
+    kwargs = dict(rescale=1.0 / 255)
+    if augment:
+        kwargs.update(AUGMENTATION_KWARGS)
+    generator = SplitManifest(manifest_path).flow(
+        tf.keras.preprocessing.image.ImageDataGenerator(**kwargs), subset="training", shuffle=True,
+        target_size=image_size[:-1], batch_size=batch_size, interpolation="bilinear",
+    )
+    return iter(generator), generator.samples
+
+def tf_data(manifest_path: str, image_size: list, batch_size: int, augment: bool):
+    loader = DataLoader(manifest_path, image_size, batch_size)
+    dataset = loader.dataset(subset="training", shuffle=True, augment=augment, repeat=True)
+    return iter(dataset), loader.samples("training")
+
+LOADERS = {"image_data_generator": image_data_generator, "tf_data": tf_data}
+
+
+def measure(make_loader, manifest_path: str, image_size: list, batch_size: int, augment: bool, epochs: int) -> dict:
+    """Times full epochs of a loader without a model, so only input throughput is measured."""
+    iterator, samples = make_loader(manifest_path, image_size, batch_size, augment)
+    steps = samples // batch_size
+    epoch_images_per_s = []
+    for _ in range(epochs):
+        start = time.perf_counter()
+        for _ in range(steps):
+            next(iterator)
+        epoch_images_per_s.append(steps * batch_size / (time.perf_counter() - start))
+    later = epoch_images_per_s[1:] or epoch_images_per_s
+    return {
+        "samples": samples,
+        "steps_per_epoch": steps,
+        # The first tf.data epoch fills the decode cache; later epochs read from it
+        "first_epoch_images_per_s": epoch_images_per_s[0],
+        "steady_images_per_s": sum(later) / len(later),
+        "epoch_images_per_s": epoch_images_per_s,
+    }
+
+
+def run(directory: str, manifest_path: str, image_size: list, batch_size: int, epochs: int) -> dict:
+    build_split_manifest(directory, manifest_path, validation_fraction=0.20, test_fraction=0.0)
+    results = {"data": directory, "image_size": image_size, "batch_size": batch_size, "epochs": epochs, "loaders": {}}
+    for augment in (False, True):
+        for name, make_loader in LOADERS.items():
+            key = f"{name}{'_augmented' if augment else ''}"
+            results["loaders"][key] = measure(make_loader, manifest_path, image_size, batch_size, augment, epochs)
+        base = results["loaders"][f"image_data_generator{'_augmented' if augment else ''}"]
+        fast = results["loaders"][f"tf_data{'_augmented' if augment else ''}"]
+        fast["speedup"] = fast["steady_images_per_s"] / base["steady_images_per_s"]
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare images/sec of the ImageDataGenerator and tf.data loaders")
+    parser.add_argument("--data", default=DEFAULT_DATA, help="Class-per-subdirectory dataset")
+    parser.add_argument("--synthetic", type=int, default=0, help="Use this many synthetic CT slices instead of --data")
+    parser.add_argument("--synthetic-size", type=int, default=512, help="Synthetic slice width and height")
+    parser.add_argument("--image-size", type=int, default=224, help="Model input width and height")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--epochs", type=int, default=3, help="Epochs timed per loader")
+    parser.add_argument("--output", default=None, help="Optional path of the JSON report")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = args.data
+        if args.synthetic:
+            directory = os.path.join(tmp, "data")
+            write_synthetic_dataset(directory, args.synthetic, args.synthetic_size)
+        manifest_path = os.path.join(tmp, "split_manifest.json")
+        report = json.dumps(run(directory, manifest_path, [args.image_size, args.image_size, 3], args.batch_size, args.epochs), indent=4)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(report)
+    print(report)
@@ -0,0 +1,354 @@
+import os
+import sys
+import json
+import time
+import uuid
+import random
+import signal
+import argparse
+import platform
+import tempfile
+import threading
+import subprocess
+import http.client
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic_ct import synthetic_ct_jpeg  # noqa: E402
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+# Request kinds of the mix: a fresh image, a batch of fresh images, or the same image again
+def unique_image(pool: list, counter: int) -> bytes:
+    """Returns a pool image made byte-unique so it misses the prediction cache.
+
+    Bytes after the JPEG end-of-image marker are ignored by decoders but change the content
+    hash the cache is keyed on, so the server does the full decode and forward pass.
+    """
+    return pool[counter % len(pool)] + b"\x00" + str(counter).encode()
+
+def multipart_body(images: list):
+    boundary = uuid.uuid4().hex
+    parts = []
+    for i, image in enumerate(images):
+        parts.extend([
+            f"--{boundary}\r\n".encode(),
+            f'Content-Disposition: form-data; name="images"; filename="slice{i}.jpg"\r\n'.encode(),
+            b"Content-Type: image/jpeg\r\n\r\n",
+            image,
+            b"\r\n",
+        ])
+    parts.append(f"--{boundary}--\r\n".encode())
+    return b"".join(parts), f"multipart/form-data; boundary={boundary}"
+
+
+class LoadTest:
+    """Closed-loop load generator: each client thread sends its next request as soon as the last returns."""
+
+    def __init__(self, host: str, port: int, mix: dict, pool: list, batch_size: int, timeout: float):
+        self.host = host
+        self.port = port
+        self.kinds = list(mix)
+        self.weights = [mix[kind] for kind in self.kinds]
+        self.pool = pool
+        self.batch_size = batch_size
+        self.timeout = timeout
+        self._counter = 0
+        self._lock = threading.Lock()
+        self.samples = []  # (kind, start, latency_s, status, images)
+
+    def _next_counter(self, n: int = 1) -> int:
+        with self._lock:
+            start = self._counter
+            self._counter += n
+            return start
+
+    def _request(self, kind: str):
+        """Builds the path, body and content type of one request of the given kind."""
+        if kind == "single":
+            return "/predict", unique_image(self.pool, self._next_counter()), "application/octet-stream", 1
+        if kind == "repeated":
+            return "/predict", self.pool[0], "application/octet-stream", 1
+        start = self._next_counter(self.batch_size)
+        body, content_type = multipart_body([unique_image(self.pool, start + i) for i in range(self.batch_size)])
+        return "/predict_batch", body, content_type, self.batch_size
+
+    def _send(self, path: str, body: bytes, content_type: str) -> int:
+        connection = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+        try:
+            connection.request("POST", path, body=body, headers={"Content-Type": content_type})
+            response = connection.getresponse()
+            response.read()
+            return response.status
+        except OSError:
+            return 0  # Connection error or timeout
+        finally:
+            connection.close()
+
+    def _client(self, seed: int, stop_at: float):
+        rng = random.Random(seed)
+        samples = []
+        while time.perf_counter() < stop_at:
+            kind = rng.choices(self.kinds, self.weights)[0]
+            path, body, content_type, images = self._request(kind)
+            start = time.perf_counter()
+            status = self._send(path, body, content_type)
+            samples.append((kind, start, time.perf_counter() - start, status, images))
+        with self._lock:
+            self.samples.extend(samples)
+
+    def run(self, concurrency: int, duration: float):
+        stop_at = time.perf_counter() + duration
+        clients = [threading.Thread(target=self._client, args=(seed, stop_at)) for seed in range(concurrency)]
+        for client in clients:
+            client.start()
+        for client in clients:
+            client.join()
+
+
+def summarize(samples: list, duration: float) -> dict:
+    """Throughput, error count and latency percentiles of a list of samples."""
+    ok = [s for s in samples if 200 <= s[3] < 300]
+    latencies_ms = np.array([s[2] for s in ok]) * 1000.0
+    result = {
+        "requests": len(samples),
+        "ok": len(ok),
+        "errors": len(samples) - len(ok),
+        "status_counts": {str(status): sum(1 for s in samples if s[3] == status) for status in sorted({s[3] for s in samples})},
+        "requests_per_s": len(ok) / duration,
+        "images_per_s": sum(s[4] for s in ok) / duration,
+    }
+    if len(ok):
+        result.update({
+            "latency_ms_mean": float(latencies_ms.mean()),
+            "latency_ms_p50": float(np.percentile(latencies_ms, 50)),
+            "latency_ms_p95": float(np.percentile(latencies_ms, 95)),
+            "latency_ms_p99": float(np.percentile(latencies_ms, 99)),
+            "latency_ms_max": float(latencies_ms.max()),
+        })
+    return result
+
+
+# Memory of the server process tree, read from /proc (Linux only)
+def process_tree(pid: int) -> list:
+    """Returns `pid` and all its descendants (pre-forked workers)."""
+    children = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children.setdefault(ppid, []).append(int(entry))
+    tree, stack = [], [pid]
+    while stack:
+        current = stack.pop()
+        tree.append(current)
+        stack.extend(children.get(current, []))
+    return tree
+
+def memory_kb(pid: int, field: str) -> int:
+    """Reads a memory field (VmRSS, VmHWM) of a process in kB, 0 if it has exited."""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return 0
+
+
+def shared_memory_kb(pid: int) -> dict:
+    """Reads the RSS, proportional set size and shared pages of a process in kB.
+
+    PSS splits every page shared by N processes as 1/N per process, so the workers' PSS
+    falling well below their RSS shows the preloaded model is shared copy-on-write.
+    """
+    fields = {"Rss": 0, "Pss": 0, "Shared_Clean": 0, "Shared_Dirty": 0}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                name = line.split(":", 1)[0]
+                if name in fields:
+                    fields[name] = int(line.split()[1])
+    except OSError:
+        pass
+    return {"rss": fields["Rss"], "pss": fields["Pss"], "shared": fields["Shared_Clean"] + fields["Shared_Dirty"]}
+
+
+class MemorySampler(threading.Thread):
+    """Tracks the summed RSS and the per-process peak RSS of the server process tree."""
+
+    def __init__(self, pid: int, interval: float = 0.25):
+        super().__init__(daemon=True)
+        self.pid = pid
+        self.interval = interval
+        self.peak_total_rss_kb = 0
+        self.peak_process_rss_kb = {}
+        self._stop_event = threading.Event()
+
+    def sample(self):
+        pids = process_tree(self.pid)
+        self.peak_total_rss_kb = max(self.peak_total_rss_kb, sum(memory_kb(pid, "VmRSS") for pid in pids))
+        for pid in pids:
+            self.peak_process_rss_kb[pid] = max(self.peak_process_rss_kb.get(pid, 0), memory_kb(pid, "VmHWM"))
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            self.sample()
+
+    def stop(self) -> dict:
+        self._stop_event.set()
+        self.join()
+        self.sample()
+        # Per-process memory at the end of the run: the parent first, then the forked workers
+        per_process = []
+        for pid in process_tree(self.pid):
+            memory = shared_memory_kb(pid)
+            per_process.append({
+                "pid": pid,
+                "role": "parent" if pid == self.pid else "worker",
+                "rss_mb": memory["rss"] / 1024.0,
+                "pss_mb": memory["pss"] / 1024.0,
+                "shared_mb": memory["shared"] / 1024.0,
+            })
+        return {
+            "peak_total_rss_mb": self.peak_total_rss_kb / 1024.0,
+            "peak_process_rss_mb": max(self.peak_process_rss_kb.values(), default=0) / 1024.0,
+            "processes": len(self.peak_process_rss_kb),
+            "total_pss_mb": sum(process["pss_mb"] for process in per_process),
+            "per_process": per_process,
+        }
+
+
+def git_revision() -> dict:
+    """Commit the server was built from, so reports of different commits can be compared."""
+    def git(*args):
+        return subprocess.run(["git", *args], cwd=REPO_ROOT, capture_output=True, text=True).stdout.strip()
+    return {"commit": git("rev-parse", "HEAD"), "dirty": bool(git("status", "--porcelain", "--untracked-files=no"))}
+
+def get(host: str, port: int, path: str, timeout: float = 5.0):
+    connection = http.client.HTTPConnection(host, port, timeout=timeout)
+    try:
+        connection.request("GET", path)
+        response = connection.getresponse()
+        return response.status, response.read()
+    finally:
+        connection.close()
+
+def wait_until_ready(host: str, port: int, server, timeout: float) -> float:
+    """Polls /ready until the model is warm; returns the seconds it took."""
+    start = time.perf_counter()
+    while time.perf_counter() - start < timeout:
+        if server is not None and server.poll() is not None:
+            raise RuntimeError(f"Server exited with code {server.returncode} before becoming ready")
+        try:
+            if get(host, port, "/ready")[0] == 200:
+                return time.perf_counter() - start
+        except OSError:
+            pass
+        time.sleep(0.25)
+    raise TimeoutError(f"Server not ready after {timeout:.0f}s")
+
+def start_server(port: int, workers: int, log_path: str):
+    """Starts app.py on localhost in its own process group."""
+    log = open(log_path, "w")
+    return subprocess.Popen(
+        [sys.executable, "app.py", "--host", "127.0.0.1", "--port", str(port), "--workers", str(workers)],
+        cwd=REPO_ROOT, stdout=log, stderr=subprocess.STDOUT, start_new_session=True,
+    )
+
+def stop_server(server):
+    os.killpg(server.pid, signal.SIGTERM)
+    try:
+        server.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        os.killpg(server.pid, signal.SIGKILL)
+        server.wait()
+
+
+def parse_mix(text: str) -> dict:
+    """Parses a request mix such as "single=0.7,batch=0.2,repeated=0.1"."""
+    mix = {}
+    for part in text.split(","):
+        kind, weight = part.split("=")
+        if kind not in ("single", "batch", "repeated"):
+            raise argparse.ArgumentTypeError(f"Unknown request kind: {kind}")
+        mix[kind] = float(weight)
+    return mix
+
+
+def main(args) -> dict:
+    pool = [synthetic_ct_jpeg(seed, args.size) for seed in range(args.images)]
+
+    server, log_path = None, None
+    if args.url_port is None:
+        log_path = os.path.join(tempfile.gettempdir(), f"load_test_server_{args.port}.log")
+        server = start_server(args.port, args.workers, log_path)
+    port = args.url_port or args.port
+
+    try:
+        ready_s = wait_until_ready("127.0.0.1", port, server, args.ready_timeout)
+        sampler = MemorySampler(server.pid) if server is not None else None
+        if sampler is not None:
+            sampler.start()
+
+        test = LoadTest("127.0.0.1", port, args.mix, pool, args.batch_size, args.request_timeout)
+        if args.warmup > 0:
+            test.run(args.concurrency, args.warmup)
+            test.samples = []
+        test.run(args.concurrency, args.duration)
+        memory = sampler.stop() if sampler is not None else None
+    except Exception:
+        if log_path is not None:
+            with open(log_path) as f:
+                sys.stderr.write(f.read()[-4000:])
+        raise
+    finally:
+        if server is not None:
+            stop_server(server)
+
+    return {
+        "git": git_revision(),
+        "host": {"platform": platform.platform(), "python": platform.python_version(), "cpus": os.cpu_count()},
+        "settings": {
+            "concurrency": args.concurrency, "duration_s": args.duration, "warmup_s": args.warmup,
+            "mix": args.mix, "batch_size": args.batch_size, "image_size": args.size,
+            "images": args.images, "workers": args.workers if server is not None else None,
+        },
+        "time_to_ready_s": ready_s,
+        "overall": summarize(test.samples, args.duration),
+        "by_kind": {kind: summarize([s for s in test.samples if s[0] == kind], args.duration) for kind in args.mix},
+        "memory": memory,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test the Flask serving stack with synthetic CT slices")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent closed-loop clients")
+    parser.add_argument("--duration", type=float, default=30.0, help="Measured seconds of load")
+    parser.add_argument("--warmup", type=float, default=5.0, help="Unmeasured seconds of load before measuring")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix("single=0.7,batch=0.1,repeated=0.2"),
+                        help="Request mix as kind=weight pairs (kinds: single, batch, repeated)")
+    parser.add_argument("--batch-size", type=int, default=8, help="Images per /predict_batch request")
+    parser.add_argument("--images", type=int, default=64, help="Distinct synthetic slices in the image set")
+    parser.add_argument("--size", type=int, default=512, help="Slice width and height in pixels")
+    parser.add_argument("--port", type=int, default=8765, help="Port of the locally started server")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes of the started server")
+    parser.add_argument("--url-port", type=int, default=None,
+                        help="Port of an already running local server to test instead (no RSS reported)")
+    parser.add_argument("--ready-timeout", type=float, default=300.0, help="Seconds to wait for /ready")
+    parser.add_argument("--request-timeout", type=float, default=60.0, help="Seconds before a request fails")
+    parser.add_argument("--output", default=None, help="Optional path of the JSON report")
+    args = parser.parse_args()
+
+    report = json.dumps(main(args), indent=4)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(report)
+    print(report)
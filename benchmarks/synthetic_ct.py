@@ -0,0 +1,55 @@
+import io
+import numpy as np
+from PIL import Image
+
+
+# Function to draw a deterministic synthetic axial CT slice
+def synthetic_ct_slice(seed: int, size: int = 512) -> np.ndarray:
+    """Draws a CT-like axial abdominal slice: body outline, spine, two kidneys, lesions and noise.
+
+    The images are not anatomically accurate; they only need realistic size, intensity
+    range and entropy so that encoding, decoding and inference cost match real slices.
+
+    Args:
+        seed (int): Random seed; the same seed always produces the same slice.
+        size (int, optional): Width and height in pixels. Defaults to 512.
+
+    Returns:
+        np.ndarray: Grayscale uint8 image of shape (size, size).
+    """
+    rng = np.random.default_rng(seed)
+    yy, xx = np.mgrid[0:size, 0:size] / size
+
+    def ellipse(cx, cy, rx, ry):
+        return ((xx - cx) / rx) ** 2 + ((yy - cy) / ry) ** 2 <= 1.0
+
+    image = np.zeros((size, size), dtype=np.float32)
+    image[ellipse(0.5, 0.52, 0.42 + rng.normal(0, 0.01), 0.33 + rng.normal(0, 0.01))] = 95.0  # Soft tissue
+    image[ellipse(0.5, 0.72, 0.05, 0.05)] = 230.0  # Vertebral body
+    for side in (-1, 1):
+        cx = 0.5 + side * (0.17 + rng.normal(0, 0.01))
+        image[ellipse(cx, 0.62, 0.06, 0.09)] = 140.0  # Kidney
+        if rng.random() < 0.5:
+            # Cyst (dark) or stone (bright) lesion inside the kidney
+            value = 60.0 if rng.random() < 0.5 else 250.0
+            image[ellipse(cx + rng.normal(0, 0.01), 0.62 + rng.normal(0, 0.02), 0.015, 0.015)] = value
+
+    # Scanner noise
+    image += rng.normal(0.0, 12.0, size=image.shape)
+    return np.clip(image, 0, 255).astype(np.uint8)
+
+# Function to encode a synthetic slice the way clients upload images
+def synthetic_ct_jpeg(seed: int, size: int = 512, quality: int = 95) -> bytes:
+    """Encodes a synthetic CT slice as an RGB JPEG, as the web client does.
+
+    Args:
+        seed (int): Random seed of the slice.
+        size (int, optional): Width and height in pixels. Defaults to 512.
+        quality (int, optional): JPEG quality. Defaults to 95.
+
+    Returns:
+        bytes: JPEG-encoded image.
+    """
+    buffer = io.BytesIO()
+    Image.fromarray(synthetic_ct_slice(seed, size)).convert("RGB").save(buffer, format="JPEG", quality=quality)
+    return buffer.getvalue()
@@ -0,0 +1,106 @@
+import os
+import sys
+import json
+import time
+import uuid
+import base64
+import argparse
+import numpy as np
+
+# Make the web app and the synthetic image generator importable when run from the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from flask import request  # noqa: E402
+from app import app, readImagePayload  # noqa: E402
+from synthetic_ct import synthetic_ct_jpeg  # noqa: E402
+
+
+# Functions building the request body of each upload encoding, as a client would
+def encode_json(jpeg: bytes):
+    return json.dumps({"image": base64.b64encode(jpeg).decode("ascii")}).encode(), "application/json"
+
+def encode_octet_stream(jpeg: bytes):
+    return jpeg, "application/octet-stream"
+
+def encode_multipart(jpeg: bytes):
+    boundary = uuid.uuid4().hex
+    body = b"".join([
+        f"--{boundary}\r\n".encode(),
+        b'Content-Disposition: form-data; name="image"; filename="slice.jpg"\r\n',
+        b"Content-Type: image/jpeg\r\n\r\n",
+        jpeg,
+        f"\r\n--{boundary}--\r\n".encode(),
+    ])
+    return body, f"multipart/form-data; boundary={boundary}"
+
+ENCODINGS = {
+    "base64_json": encode_json,
+    "octet_stream": encode_octet_stream,
+    "multipart": encode_multipart,
+}
+
+
+def summarize(values_ms: list) -> dict:
+    """Mean and percentiles of a list of timings in milliseconds."""
+    return {
+        "mean_ms": float(np.mean(values_ms)),
+        "p50_ms": float(np.percentile(values_ms, 50)),
+        "p95_ms": float(np.percentile(values_ms, 95)),
+    }
+
+
+def run(images: int, repeats: int, size: int) -> dict:
+    """Measures payload size, client encode time and server parse time of every encoding.
+
+    Args:
+        images (int): Number of distinct synthetic slices.
+        repeats (int): Timed repetitions per slice and encoding.
+        size (int): Slice width and height in pixels.
+
+    Returns:
+        dict: Per-encoding results, with sizes relative to the raw JPEG bytes.
+    """
+    jpegs = [synthetic_ct_jpeg(seed, size) for seed in range(images)]
+    raw_bytes = float(np.mean([len(jpeg) for jpeg in jpegs]))
+    results = {"image_size": [size, size], "images": images, "repeats": repeats,
+               "raw_jpeg_bytes": raw_bytes, "encodings": {}}
+
+    for name, encode in ENCODINGS.items():
+        payload_bytes, encode_ms, parse_ms = [], [], []
+        for jpeg in jpegs:
+            for _ in range(repeats):
+                start = time.perf_counter()
+                body, content_type = encode(jpeg)
+                encode_ms.append((time.perf_counter() - start) * 1000.0)
+                payload_bytes.append(len(body))
+
+                # Time only the server-side parse of the body, as done by /predict
+                with app.test_request_context("/predict", method="POST", data=body, content_type=content_type):
+                    start = time.perf_counter()
+                    decoded = readImagePayload(request)
+                    parse_ms.append((time.perf_counter() - start) * 1000.0)
+                assert decoded == jpeg, f"{name} round-trip changed the image bytes"
+
+        results["encodings"][name] = {
+            "payload_bytes": float(np.mean(payload_bytes)),
+            "payload_overhead": float(np.mean(payload_bytes)) / raw_bytes - 1.0,
+            "client_encode": summarize(encode_ms),
+            "server_parse": summarize(parse_ms),
+        }
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare /predict upload encodings on synthetic CT slices")
+    parser.add_argument("--images", type=int, default=20, help="Distinct synthetic slices")
+    parser.add_argument("--repeats", type=int, default=25, help="Timed repetitions per slice")
+    parser.add_argument("--size", type=int, default=512, help="Slice width and height in pixels")
+    parser.add_argument("--output", default=None, help="Optional path of the JSON report")
+    args = parser.parse_args()
+
+    report = json.dumps(run(args.images, args.repeats, args.size), indent=4)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(report)
+    print(report)
@@ -1,8 +1,11 @@
 from cnnClassifier import logger
 from cnnClassifier.pipeline.stage_01_data_ingestion import DataIngestionTrainingPipeline
+from cnnClassifier.pipeline.stage_07_dataset_cache import DatasetCachePipeline
 from cnnClassifier.pipeline.stage_02_prepare_base_model import PrepareBaseModelTrainingPipeline
 from cnnClassifier.pipeline.stage_03_model_training import ModelTrainingPipeline
 from cnnClassifier.pipeline.stage_04_model_evaluation import EvaluationPipeline
+from cnnClassifier.pipeline.stage_05_model_quantization import ModelQuantizationPipeline
+from cnnClassifier.pipeline.stage_06_embedding_extraction import EmbeddingExtractionPipeline
 
 # Run each stage of the pipeline, with logging and exception handling
 
@@ -17,6 +20,18 @@ except Exception as e:
     logger.exception(f"Exception occurred during {STAGE_NAME}")
     raise e
 
+# Stage 7: Dataset Cache (runs right after ingestion; training and evaluation read it)
+STAGE_NAME = "Dataset Cache"
+try:
+    logger.info(f"*******************")
+    logger.info(f">>>>>> stage {STAGE_NAME} started <<<<<<")
+    dataset_cache = DatasetCachePipeline()
+    dataset_cache.main()  # Execute dataset cache pipeline
+    logger.info(f">>>>>> stage {STAGE_NAME} completed <<<<<<\n\nx==========x")
+except Exception as e:
+    logger.exception(f"Exception occurred during {STAGE_NAME}")
+    raise e
+
 # Stage 2: Prepare Base Model
 STAGE_NAME = "Prepare Base Model"
 try: 
@@ -52,3 +67,27 @@ try:
 except Exception as e:
     logger.exception(f"Exception occurred during {STAGE_NAME}")
     raise e
+
+# Stage 5: Model Quantization
+STAGE_NAME = "Model Quantization"
+try:
+    logger.info(f"*******************")
+    logger.info(f">>>>>> stage {STAGE_NAME} started <<<<<<")
+    model_quantization = ModelQuantizationPipeline()
+    model_quantization.main()  # Execute model quantization pipeline
+    logger.info(f">>>>>> stage {STAGE_NAME} completed <<<<<<\n\nx==========x")
+except Exception as e:
+    logger.exception(f"Exception occurred during {STAGE_NAME}")
+    raise e
+
+# Stage 6: Embedding Extraction
+STAGE_NAME = "Embedding Extraction"
+try:
+    logger.info(f"*******************")
+    logger.info(f">>>>>> stage {STAGE_NAME} started <<<<<<")
+    embedding_extraction = EmbeddingExtractionPipeline()
+    embedding_extraction.main()  # Execute embedding extraction pipeline
+    logger.info(f">>>>>> stage {STAGE_NAME} completed <<<<<<\n\nx==========x")
+except Exception as e:
+    logger.exception(f"Exception occurred during {STAGE_NAME}")
+    raise e
@@ -0,0 +1,113 @@
+import math
+import time
+import threading
+from contextlib import contextmanager
+
+
+class Overloaded(RuntimeError):
+    """Raised when the inference queue is full; `retry_after` suggests when to try again (seconds)."""
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised for a request whose deadline passed before it reached the model."""
+
+
+def deadline_from_ms(budget_ms) -> float:
+    """
+    Converts a relative time budget into an absolute `time.perf_counter()` deadline.
+
+    :param budget_ms: Milliseconds the caller is willing to wait (None or <= 0 means no deadline).
+    :return: Absolute deadline, or None.
+    """
+    if budget_ms is None or float(budget_ms) <= 0:
+        return None
+    return time.perf_counter() + float(budget_ms) / 1000.0
+
+
+def check_deadline(deadline):
+    """
+    Raises DeadlineExceeded if the deadline has passed.
+
+    :param deadline: Absolute `time.perf_counter()` deadline, or None.
+    """
+    if deadline is not None and time.perf_counter() > deadline:
+        raise DeadlineExceeded("Request deadline exceeded before inference")
+
+
+class AdmissionController:
+    """
+    Bounds the number of requests waiting for or running inference, rejecting the
+    excess immediately instead of letting the queue (and everyone's latency) grow.
+    """
+
+    # Weight of the newest observation in the moving average of service times
+    EWMA_ALPHA = 0.1
+
+    def __init__(self, max_pending: int, parallelism: int = 1):
+        """
+        Initializes the AdmissionController.
+
+        :param max_pending: Maximum number of admitted requests (0 disables the limit).
+        :param parallelism: Requests served together, e.g. the batch size, used to estimate Retry-After.
+        """
+        self.max_pending = int(max_pending)
+        self.parallelism = max(1, int(parallelism))
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._service_time = 0.0  # Moving average of admitted request durations, in seconds
+
+        self._admitted = 0
+        self._rejected = 0
+        self._expired = 0
+
+    def retry_after(self) -> int:
+        """
+        Estimates the seconds until the current queue has drained.
+
+        :return: Whole seconds, at least 1.
+        """
+        return max(1, math.ceil(self._pending * self._service_time / self.parallelism))
+
+    @contextmanager
+    def admit(self):
+        """
+        Admits a request for the duration of the block, or raises Overloaded if the queue is full.
+        """
+        with self._lock:
+            if self.max_pending and self._pending >= self.max_pending:
+                self._rejected += 1
+                raise Overloaded("Inference queue is full", retry_after=self.retry_after())
+            self._pending += 1
+            self._admitted += 1
+
+        start = time.perf_counter()
+        try:
+            yield
+        except DeadlineExceeded:
+            with self._lock:
+                self._expired += 1
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self._pending -= 1
+                self._service_time += self.EWMA_ALPHA * (elapsed - self._service_time)
+
+    def stats(self) -> dict:
+        """
+        Returns the queue occupancy and admission counters.
+
+        :return: Dictionary of admission statistics.
+        """
+        return {
+            "pending": self._pending,
+            "max_pending": self.max_pending,
+            "admitted": self._admitted,
+            "rejected": self._rejected,
+            "expired": self._expired,
+            "mean_service_ms": self._service_time * 1000.0,
+        }
@@ -0,0 +1,143 @@
+import os
+import json
+import hashlib
+from pathlib import Path
+import numpy as np
+import tensorflow as tf
+from cnnClassifier import logger
+from cnnClassifier.components.data_loader import DataLoader
+from cnnClassifier.components.dataset_cache import dataset_fingerprint
+from cnnClassifier.utils.common import save_json
+
+
+def split_at_layer(model: tf.keras.Model, layer_name: str = "block5_pool") -> tuple:
+    """
+    Splits a sequential-style model into the part up to `layer_name` and the head after it.
+
+    Both parts reuse the layers (and weights) of `model`, so training the head updates the
+    full model in place and nothing has to be copied back before saving it.
+
+    :param model: Full model, e.g. the VGG19 backbone with the dense classification head.
+    :param layer_name: Last layer of the backbone.
+    :return: Tuple of (backbone model, head model).
+    """
+    cut = model.get_layer(layer_name)
+    backbone = tf.keras.models.Model(inputs=model.input, outputs=cut.output)
+
+    inputs = tf.keras.Input(shape=cut.output.shape[1:])
+    x = inputs
+    for layer in model.layers[model.layers.index(cut) + 1:]:
+        x = layer(x)
+    head = tf.keras.models.Model(inputs=inputs, outputs=x)
+    return backbone, head
+
+
+class BottleneckFeatures:
+    """
+    Computes the frozen backbone's outputs once per image (or once per fixed augmented
+    variant) into memory-mapped float16 files, so only the dense head is run per epoch.
+    """
+
+    def __init__(self, root_dir: Path, loader: DataLoader, variants: int, augment: bool):
+        """
+        Initializes the BottleneckFeatures.
+
+        :param root_dir: Directory of the feature files.
+        :param loader: DataLoader producing the preprocessed training and validation images.
+        :param variants: Fixed augmented variants per training image (1 when augmentation is off).
+        :param augment: Whether the training variants are augmented.
+        """
+        self.root_dir = Path(root_dir)
+        self.loader = loader
+        self.augment = augment
+        self.variants = max(1, int(variants)) if augment else 1
+
+    def _fingerprint(self, backbone: tf.keras.Model) -> str:
+        """
+        Identifies the features by backbone weights, dataset, split and augmentation settings.
+        """
+        digest = hashlib.sha256()
+        for weights in backbone.get_weights():
+            digest.update(np.ascontiguousarray(weights).tobytes())
+        digest.update(dataset_fingerprint(self.loader.manifest, list(backbone.input_shape[1:])).encode())
+        digest.update(json.dumps([self.variants, self.augment]).encode())
+        return digest.hexdigest()
+
+    def _extract(self, backbone: tf.keras.Model, subset: str, augment: bool, variants: int, path: Path):
+        """
+        Runs the backbone over a subset `variants` times and writes the outputs row by row.
+
+        Variant v of image i is stored at row v * n + i; augmented variants use a fixed seed
+        per variant, so the same features are reproduced whenever they are rebuilt.
+        """
+        n = self.loader.samples(subset)
+        features = np.lib.format.open_memmap(
+            path, mode="w+", dtype=np.float16, shape=(variants * n, *backbone.output_shape[1:])
+        )
+        for variant in range(variants):
+            tf.random.set_seed(variant)
+            row = variant * n
+            for images, _ in self.loader.dataset(subset=subset, shuffle=False, augment=augment):
+                outputs = backbone.predict_on_batch(images)
+                features[row:row + len(outputs)] = outputs
+                row += len(outputs)
+            logger.info(f"Extracted {subset} bottleneck features, variant {variant + 1}/{variants}")
+        features.flush()
+
+    def prepare(self, backbone: tf.keras.Model):
+        """
+        Extracts the training and validation features, unless files for the same backbone,
+        dataset and settings already exist.
+
+        :param backbone: Frozen backbone whose outputs are cached.
+        """
+        os.makedirs(self.root_dir, exist_ok=True)
+        meta_path = self.root_dir / "features.json"
+        fingerprint = self._fingerprint(backbone)
+        if meta_path.exists():
+            with open(meta_path) as f:
+                if json.load(f).get("fingerprint") == fingerprint:
+                    logger.info(f"Reusing bottleneck features in {self.root_dir}")
+                    return
+
+        self._extract(backbone, "training", self.augment, self.variants, self.root_dir / "training.npy")
+        self._extract(backbone, "validation", False, 1, self.root_dir / "validation.npy")
+        save_json(path=meta_path, data={"fingerprint": fingerprint, "variants": self.variants})
+
+    def dataset(self, subset: str, batch_size: int, shuffle: bool = False, repeat: bool = False):
+        """
+        Builds a pipeline over the cached features of a subset.
+
+        Each time an image is drawn, one of its variants is picked at random, so an epoch
+        still covers every image once.
+
+        :param subset: "training" or "validation".
+        :param batch_size: Number of feature rows per batch.
+        :param shuffle: Whether to shuffle every epoch.
+        :param repeat: Whether to repeat indefinitely (use with `steps_per_epoch`).
+        :return: tf.data.Dataset of (features, one-hot labels) batches.
+        """
+        features = np.load(self.root_dir / f"{subset}.npy", mmap_mode="r")
+        labels = np.asarray(self.loader.labels, dtype=np.int32)[self.loader.manifest.indices(subset)]
+        n = len(labels)
+        variants = len(features) // n
+        num_classes = self.loader.num_classes
+        rng = np.random.default_rng()
+
+        dataset = tf.data.Dataset.from_tensor_slices(np.arange(n, dtype=np.int64))
+        if shuffle:
+            dataset = dataset.shuffle(n, reshuffle_each_iteration=True)
+        if repeat:
+            dataset = dataset.repeat()
+        dataset = dataset.batch(batch_size)
+
+        def gather(batch_indices):
+            rows = rng.integers(0, variants, size=len(batch_indices)) * n + batch_indices
+            return features[rows].astype(np.float32), labels[batch_indices]
+
+        def load(batch_indices):
+            batch_features, batch_labels = tf.numpy_function(gather, [batch_indices], (tf.float32, tf.int32))
+            batch_features.set_shape([None, *features.shape[1:]])
+            return batch_features, tf.one_hot(batch_labels, num_classes)
+
+        return dataset.map(load, num_parallel_calls=tf.data.AUTOTUNE).prefetch(tf.data.AUTOTUNE)
@@ -3,6 +3,7 @@ import gdown
 import zipfile
 from cnnClassifier import logger
 from cnnClassifier.utils.common import get_size
+from cnnClassifier.components.split_manifest import build_split_manifest
 from cnnClassifier.entity.config_entity import DataIngestionConfig
 
 class DataIngestion:
@@ -68,3 +69,24 @@ class DataIngestion:
         except Exception as e:
             logger.error("An error occurred during extraction.", exc_info=True)
             raise e
+
+    def build_split_manifest(self) -> dict:
+        """
+        Hashes the extracted images and assigns each to the training, validation or test subset.
+
+        Images already listed in the previous manifest keep their subset, so the split stays
+        stable as the dataset grows; only new images are assigned, stratified per class.
+
+        :return: The manifest.
+        """
+        try:
+            logger.info(f"Building the split manifest of {self.config.dataset_dir}")
+            return build_split_manifest(
+                directory=self.config.dataset_dir,
+                manifest_path=self.config.split_manifest_path,
+                validation_fraction=self.config.params_validation_fraction,
+                test_fraction=self.config.params_test_fraction
+            )
+        except Exception as e:
+            logger.error("An error occurred while building the split manifest.", exc_info=True)
+            raise e
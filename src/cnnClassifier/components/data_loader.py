@@ -0,0 +1,239 @@
+import os
+import math
+import numpy as np
+import tensorflow as tf
+from cnnClassifier import logger
+from cnnClassifier.components.split_manifest import SplitManifest
+from cnnClassifier.components.dataset_cache import load_dataset_cache
+
+# Training augmentation, shared by the ImageDataGenerator and tf.data loaders
+AUGMENTATION_KWARGS = dict(
+    rotation_range=40,        # Degrees
+    horizontal_flip=True,
+    width_shift_range=0.2,    # Fraction of the width
+    height_shift_range=0.2,   # Fraction of the height
+    shear_range=0.2,          # Degrees, as interpreted by ImageDataGenerator
+    zoom_range=0.2,           # Zoom factors drawn from [0.8, 1.2] per axis
+)
+
+def _stack_matrices(rows) -> tf.Tensor:
+    """Builds a batch of 3x3 matrices from nested lists of per-sample tensors."""
+    return tf.stack([tf.stack(row, axis=-1) for row in rows], axis=-2)
+
+
+def random_affine_augment(images: tf.Tensor, augmentation: dict = AUGMENTATION_KWARGS, seed=None) -> tf.Tensor:
+    """
+    Applies ImageDataGenerator-style random augmentation to a whole batch in one op.
+
+    One affine matrix per image is composed like `ImageDataGenerator.apply_transform`
+    (rotation, shift, shear, zoom about the image centre, in row/column coordinates), all
+    images are warped by a single ImageProjectiveTransform with bilinear interpolation and
+    nearest fill, and half of them are flipped horizontally.
+
+    :param images: Float images of shape (n, height, width, channels).
+    :param augmentation: ImageDataGenerator augmentation arguments.
+    :param seed: Optional op-level random seed.
+    :return: Augmented images.
+    """
+    n = tf.shape(images)[0]
+    height = tf.cast(tf.shape(images)[1], tf.float32)
+    width = tf.cast(tf.shape(images)[2], tf.float32)
+
+    def symmetric(limit):
+        return tf.random.uniform([n], -limit, limit, seed=seed)
+
+    to_radians = math.pi / 180.0
+    theta = symmetric(augmentation["rotation_range"]) * to_radians
+    tx = symmetric(augmentation["height_shift_range"]) * height  # Rows
+    ty = symmetric(augmentation["width_shift_range"]) * width  # Columns
+    shear = symmetric(augmentation["shear_range"]) * to_radians
+    zx = 1.0 + symmetric(augmentation["zoom_range"])
+    zy = 1.0 + symmetric(augmentation["zoom_range"])
+    zeros, ones = tf.zeros([n]), tf.ones([n])
+
+    rotation = _stack_matrices([[tf.cos(theta), -tf.sin(theta), zeros], [tf.sin(theta), tf.cos(theta), zeros], [zeros, zeros, ones]])
+    shift = _stack_matrices([[ones, zeros, tx], [zeros, ones, ty], [zeros, zeros, ones]])
+    shearing = _stack_matrices([[ones, -tf.sin(shear), zeros], [zeros, tf.cos(shear), zeros], [zeros, zeros, ones]])
+    zoom = _stack_matrices([[zx, zeros, zeros], [zeros, zy, zeros], [zeros, zeros, ones]])
+    transform = rotation @ shift @ shearing @ zoom
+
+    # Apply about the image centre, then swap (row, column) to the (x, y) order of the transform op
+    center_row, center_col = (height - 1.0) / 2.0, (width - 1.0) / 2.0
+    offset = tf.stack([tf.stack([1.0, 0.0, center_row]), tf.stack([0.0, 1.0, center_col]), tf.constant([0.0, 0.0, 1.0])])
+    reset = tf.stack([tf.stack([1.0, 0.0, -center_row]), tf.stack([0.0, 1.0, -center_col]), tf.constant([0.0, 0.0, 1.0])])
+    swap = tf.constant([[0.0, 1.0, 0.0], [1.0, 0.0, 0.0], [0.0, 0.0, 1.0]])
+    transform = swap @ offset @ transform @ reset @ swap
+
+    images = tf.raw_ops.ImageProjectiveTransformV3(
+        images=images,
+        transforms=tf.reshape(transform, [n, 9])[:, :8],
+        output_shape=tf.shape(images)[1:3],
+        fill_value=0.0,
+        interpolation="BILINEAR",
+        fill_mode="NEAREST",
+    )
+
+    if augmentation.get("horizontal_flip"):
+        flip = tf.random.uniform([n], seed=seed) < 0.5
+        images = tf.where(flip[:, None, None, None], tf.reverse(images, axis=[2]), images)
+    return images
+
+
+class DataLoader:
+    """
+    A tf.data replacement for ImageDataGenerator: reads the subsets of the split manifest,
+    decodes and resizes in parallel, caches the decoded images, augments whole batches
+    on-graph and prefetches.
+    """
+
+    # Decoded images shuffled per epoch after the cache (the file order is shuffled once before it)
+    SHUFFLE_BUFFER = 2048
+
+    def __init__(self, manifest_path, image_size: list, batch_size: int,
+                 cache_dir=None, dataset_cache_index=None, seed: int = 42):
+        """
+        Initializes the DataLoader.
+
+        :param manifest_path: Split manifest of the dataset, written by the data ingestion stage.
+        :param image_size: Model input size (height, width, channels).
+        :param batch_size: Number of images per batch.
+        :param cache_dir: Optional directory for on-disk caches of the decoded images (memory otherwise).
+        :param dataset_cache_index: Optional index of the preprocessed dataset cache; when it matches
+            the dataset, images are read from its memory-mapped array instead of being decoded.
+        :param seed: Seed of the file-order shuffle.
+        """
+        self.manifest = SplitManifest(manifest_path)
+        self.directory = self.manifest.directory
+        self.class_indices = self.manifest.class_indices
+        self.target_size = tuple(image_size[:-1])
+        self.batch_size = batch_size
+        self.cache_dir = cache_dir
+        self.seed = seed
+        self._paths, self._labels = self.manifest.paths, self.manifest.labels
+
+        cached = load_dataset_cache(dataset_cache_index, self.manifest, image_size)
+        self._cached_images = cached[0] if cached is not None else None
+        if self._cached_images is not None:
+            logger.info(f"Reading preprocessed images from {cached[1]['images_path']}")
+
+    @property
+    def num_classes(self) -> int:
+        return len(self.class_indices)
+
+    @property
+    def paths(self) -> list:
+        """Every image path, in manifest order."""
+        return self._paths
+
+    @property
+    def labels(self) -> list:
+        """Labels of `paths`."""
+        return self._labels
+
+    def samples(self, subset: str = None) -> int:
+        """
+        Number of images in a subset.
+
+        :param subset: "training", "validation", "test" or None for every image.
+        :return: Image count.
+        """
+        return len(self.manifest.indices(subset))
+
+    def _decode(self, path, label):
+        """
+        Reads, decodes and resizes one image to uint8 RGB.
+
+        The antialiased bilinear resize matches PIL's bilinear downscaling used by
+        flow_from_directory and the serving path.
+        """
+        image = tf.io.decode_image(tf.io.read_file(path), channels=3, expand_animations=False)
+        image = tf.image.resize(image, self.target_size, method="bilinear", antialias=True)
+        return tf.cast(tf.clip_by_value(tf.round(image), 0.0, 255.0), tf.uint8), label
+
+    def dataset(self, subset: str = None, shuffle: bool = False, augment: bool = False, repeat: bool = False,
+                num_shards: int = 1, shard_index: int = 0):
+        """
+        Builds the input pipeline of a subset.
+
+        :param subset: "training", "validation", "test" or None for every image.
+        :param shuffle: Whether to shuffle the images every epoch.
+        :param augment: Whether to apply the training augmentation.
+        :param repeat: Whether to repeat indefinitely (use with `steps_per_epoch`).
+        :param num_shards: Number of disjoint shards the subset is split into (one per training worker).
+        :param shard_index: Shard read by this pipeline; only its images are decoded.
+        :return: tf.data.Dataset of (images rescaled to [0, 1], one-hot labels) batches.
+        """
+        shard = (num_shards, shard_index)
+        if self._cached_images is not None:
+            dataset = self._cached_batches(subset, shuffle, repeat, shard)
+        else:
+            dataset = self._decoded_batches(subset, shuffle, repeat, shard)
+
+        num_classes = self.num_classes
+
+        def to_model_input(images, labels):
+            images = tf.cast(images, tf.float32)
+            if augment:
+                images = random_affine_augment(images)
+            return images / 255.0, tf.one_hot(labels, num_classes)
+
+        dataset = dataset.map(to_model_input, num_parallel_calls=tf.data.AUTOTUNE)
+        return dataset.prefetch(tf.data.AUTOTUNE)
+
+    def _decoded_batches(self, subset: str, shuffle: bool, repeat: bool, shard: tuple = (1, 0)):
+        """
+        Batches of uint8 images decoded from the image files, cached after the first epoch.
+        """
+        num_shards, shard_index = shard
+        paths, labels = self.manifest.subset(subset)
+        paths, labels = paths[shard_index::num_shards], labels[shard_index::num_shards]
+        dataset = tf.data.Dataset.from_tensor_slices((paths, labels))
+        if shuffle:
+            # Mix the class-sorted files once so the cached order is not grouped by class
+            dataset = dataset.shuffle(len(paths), seed=self.seed, reshuffle_each_iteration=False)
+
+        dataset = dataset.map(self._decode, num_parallel_calls=tf.data.AUTOTUNE)
+        if self.cache_dir:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            dataset = dataset.cache(os.path.join(self.cache_dir, f"{subset or 'all'}_{shuffle}_{shard_index}of{num_shards}"))
+        else:
+            dataset = dataset.cache()
+
+        if shuffle:
+            dataset = dataset.shuffle(min(self.SHUFFLE_BUFFER, len(paths)), reshuffle_each_iteration=True)
+        if repeat:
+            dataset = dataset.repeat()
+        return dataset.batch(self.batch_size)
+
+    def _cached_batches(self, subset: str, shuffle: bool, repeat: bool, shard: tuple = (1, 0)):
+        """
+        Batches of uint8 images gathered from the memory-mapped dataset cache.
+
+        Only indices flow through tf.data, so shuffling is a full per-epoch permutation and
+        each batch is a single gather from the page cache with no decoding.
+        """
+        images = self._cached_images
+        labels = np.asarray(self._labels, dtype=np.int32)
+        num_shards, shard_index = shard
+        indices = np.asarray(self.manifest.indices(subset), dtype=np.int64)
+        indices = indices[shard_index::num_shards]
+
+        dataset = tf.data.Dataset.from_tensor_slices(indices)
+        if shuffle:
+            dataset = dataset.shuffle(len(indices), seed=self.seed, reshuffle_each_iteration=True)
+        if repeat:
+            dataset = dataset.repeat()
+        dataset = dataset.batch(self.batch_size)
+
+        height, width = self.target_size
+
+        def gather(batch_indices):
+            return images[batch_indices], labels[batch_indices]
+
+        def load(batch_indices):
+            batch_images, batch_labels = tf.numpy_function(gather, [batch_indices], (tf.uint8, tf.int32))
+            batch_images.set_shape([None, height, width, 3])
+            batch_labels.set_shape([None])
+            return batch_images, batch_labels
+
+        return dataset.map(load, num_parallel_calls=tf.data.AUTOTUNE)
@@ -0,0 +1,108 @@
+import os
+import json
+import shutil
+import hashlib
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from cnnClassifier import logger
+from cnnClassifier.entity.config_entity import DatasetCacheConfig
+from cnnClassifier.components.split_manifest import SplitManifest
+from cnnClassifier.utils.common import preprocess_image, save_json
+
+
+def dataset_fingerprint(manifest: SplitManifest, image_size: list) -> str:
+    """
+    Combines the image size with the split manifest's fingerprint (paths, content hashes and
+    splits), so a cache is rebuilt whenever images are added, removed or replaced, or the
+    input size changes, without touching the image files.
+
+    :param manifest: Split manifest of the dataset.
+    :param image_size: Model input size (height, width, channels).
+    :return: Hex digest identifying the cache contents.
+    """
+    return hashlib.sha256(f"{json.dumps(list(image_size))}\0{manifest.fingerprint}".encode()).hexdigest()
+
+
+def load_dataset_cache(index_path, manifest: SplitManifest, image_size: list):
+    """
+    Opens the preprocessed cache if it matches the dataset and input size.
+
+    :param index_path: Path to the cache index written by the dataset cache stage.
+    :param manifest: Split manifest the cache must have been built from.
+    :param image_size: Model input size (height, width, channels).
+    :return: Tuple of (memory-mapped uint8 images, index dictionary), or None if absent or stale.
+    """
+    if index_path is None or not os.path.exists(index_path):
+        return None
+    with open(index_path) as f:
+        index = json.load(f)
+
+    if index["fingerprint"] != dataset_fingerprint(manifest, image_size):
+        logger.warning(f"Dataset cache {index_path} is stale; decoding the images instead")
+        return None
+    return np.load(index["images_path"], mmap_mode="r"), index
+
+
+class DatasetCache:
+    """
+    A class to decode and resize the ingested dataset once into a memory-mappable uint8 array.
+    """
+
+    def __init__(self, config: DatasetCacheConfig):
+        """
+        Initializes the DatasetCache class with the provided configuration.
+
+        :param config: DatasetCacheConfig object containing configuration parameters.
+        """
+        self.config = config
+
+    def _decode(self, path):
+        """
+        Decodes and resizes one image exactly as the serving path does, as uint8 pixels.
+        """
+        with open(path, "rb") as f:
+            pixels = preprocess_image(f.read(), tuple(self.config.params_image_size[:-1]), rescale=1.0)
+        return pixels.astype(np.uint8)
+
+    def build(self):
+        """
+        Writes the cache under a directory named after the dataset fingerprint, unless it
+        already exists, then points the index at it and removes older caches.
+        """
+        manifest = SplitManifest(self.config.split_manifest_path)
+        paths, labels = manifest.paths, manifest.labels
+        fingerprint = dataset_fingerprint(manifest, self.config.params_image_size)
+        cache_dir = Path(self.config.root_dir, fingerprint[:16])
+        images_path = cache_dir / "images.npy"
+
+        if images_path.exists():
+            logger.info(f"Dataset cache {cache_dir} is up to date")
+        else:
+            os.makedirs(cache_dir, exist_ok=True)
+            height, width, channels = self.config.params_image_size
+            tmp_path = cache_dir / "images.tmp.npy"
+            images = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=np.uint8, shape=(len(paths), height, width, channels))
+            with ThreadPoolExecutor(max_workers=os.cpu_count()) as pool:
+                # PIL releases the GIL while decoding and resizing, so threads decode in parallel
+                for i, pixels in enumerate(pool.map(self._decode, paths)):
+                    images[i] = pixels
+            images.flush()
+            del images
+            os.replace(tmp_path, images_path)  # Only a complete cache is ever visible
+            logger.info(f"Cached {len(paths)} images at {images_path}")
+
+        save_json(path=Path(self.config.index_path), data={
+            "fingerprint": fingerprint,
+            "images_path": str(images_path),
+            "image_size": list(self.config.params_image_size),
+            "paths": manifest.relative_paths,
+            "labels": labels,
+            "class_indices": manifest.class_indices,
+        })
+
+        # Keep only the current cache on disk
+        for entry in os.listdir(self.config.root_dir):
+            stale = Path(self.config.root_dir, entry)
+            if stale.is_dir() and stale != cache_dir:
+                shutil.rmtree(stale)
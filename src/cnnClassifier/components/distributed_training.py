@@ -0,0 +1,134 @@
+import os
+import json
+import time
+import subprocess
+from pathlib import Path
+import tensorflow as tf
+from cnnClassifier import logger
+from cnnClassifier.components.data_loader import DataLoader
+from cnnClassifier.utils.runtime import thread_limit_env, worker_cpu_slices
+
+
+def localhost_workers(num_workers: int, base_port: int) -> list:
+    """
+    Lists worker addresses for a cluster of processes on this host.
+
+    :param num_workers: Number of worker processes.
+    :param base_port: Port of the first worker; the others use the following ports.
+    :return: List of "localhost:port" addresses.
+    """
+    return [f"localhost:{base_port + i}" for i in range(num_workers)]
+
+
+def tf_config(worker_hosts: list, index: int) -> str:
+    """
+    Builds the TF_CONFIG of one worker of a MultiWorkerMirroredStrategy cluster.
+
+    :param worker_hosts: Addresses of every worker, identical on all workers.
+    :param index: Position of this worker in `worker_hosts`; worker 0 is the chief.
+    :return: JSON string for the TF_CONFIG environment variable.
+    """
+    return json.dumps({"cluster": {"worker": list(worker_hosts)}, "task": {"type": "worker", "index": index}})
+
+
+def cluster_from_env() -> tuple:
+    """
+    Reads the cluster size and this process's worker index from TF_CONFIG.
+
+    :return: Tuple of (number of workers, worker index); (1, 0) outside a cluster.
+    """
+    config = json.loads(os.environ.get("TF_CONFIG") or "{}")
+    workers = config.get("cluster", {}).get("worker", [])
+    return max(1, len(workers)), int(config.get("task", {}).get("index", 0))
+
+
+def multi_worker_strategy():
+    """
+    Creates the MultiWorkerMirroredStrategy of the cluster in TF_CONFIG.
+
+    Must be called before any other TensorFlow op runs in the process.
+
+    :return: The strategy, or None when this process is not part of a multi-worker cluster.
+    """
+    num_workers, index = cluster_from_env()
+    if num_workers == 1:
+        return None
+    # Ring all-reduce over gRPC; NCCL only applies to GPUs
+    options = tf.distribute.experimental.CommunicationOptions(
+        implementation=tf.distribute.experimental.CommunicationImplementation.RING
+    )
+    strategy = tf.distribute.MultiWorkerMirroredStrategy(communication_options=options)
+    logger.info(f"Worker {index} of {num_workers} joined the training cluster")
+    return strategy
+
+
+def sharded_dataset(loader: DataLoader, **dataset_kwargs):
+    """
+    Wraps a DataLoader pipeline so every worker reads only its own shard of the subset.
+
+    Each worker builds batches of `loader.batch_size` images, so the global batch is
+    `loader.batch_size` times the number of workers.
+
+    :param loader: DataLoader whose batch size is the per-worker batch size.
+    :param dataset_kwargs: Arguments of `DataLoader.dataset` (subset, shuffle, augment, repeat).
+    :return: DatasetCreator accepted by `model.fit` under the strategy.
+    """
+    def dataset_fn(input_context):
+        return loader.dataset(
+            num_shards=input_context.num_input_pipelines,
+            shard_index=input_context.input_pipeline_id,
+            **dataset_kwargs
+        )
+    return tf.keras.utils.experimental.DatasetCreator(dataset_fn)
+
+
+def launch_local_workers(command: list, num_workers: int, base_port: int, log_dir: Path, env: dict = None) -> list:
+    """
+    Runs `command` as a cluster of worker processes on this host and waits for all of them.
+
+    The CPUs are split evenly between the workers: each worker is pinned to its own slice
+    and its thread pools are capped to match, so the workers do not oversubscribe the host.
+
+    :param command: Command of one worker, e.g. the training stage.
+    :param num_workers: Number of worker processes.
+    :param base_port: Port of the first worker.
+    :param log_dir: Directory of the per-worker log files.
+    :param env: Extra environment variables of every worker.
+    :return: Paths of the worker log files.
+    """
+    os.makedirs(log_dir, exist_ok=True)
+    hosts = localhost_workers(num_workers, base_port)
+    slices = worker_cpu_slices(num_workers)
+
+    processes, log_paths = [], []
+    for index, cpus in enumerate(slices):
+        worker_env = {**os.environ, **thread_limit_env(len(cpus)), "TF_CONFIG": tf_config(hosts, index), **(env or {})}
+        log_path = Path(log_dir, f"worker-{index}.log")
+        with open(log_path, "w") as log:
+            processes.append(subprocess.Popen(
+                command,
+                env=worker_env,
+                stdout=log,
+                stderr=subprocess.STDOUT,
+                preexec_fn=(lambda cpus=cpus: os.sched_setaffinity(0, cpus)) if hasattr(os, "sched_setaffinity") else None
+            ))
+        log_paths.append(log_path)
+    logger.info(f"Launched {num_workers} workers on {', '.join(hosts)}; logs in {log_dir}")
+
+    # A failed worker leaves the others blocked in collectives, so stop them all
+    try:
+        while True:
+            codes = [process.poll() for process in processes]
+            failed = next((i for i, code in enumerate(codes) if code not in (None, 0)), None)
+            if failed is not None:
+                raise RuntimeError(f"Worker {failed} exited with code {codes[failed]}; see {log_paths[failed]}")
+            if all(code == 0 for code in codes):
+                break
+            time.sleep(1.0)
+    finally:
+        for process in processes:
+            if process.poll() is None:
+                process.terminate()
+        for process in processes:
+            process.wait()
+    return log_paths
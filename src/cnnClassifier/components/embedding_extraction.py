@@ -0,0 +1,134 @@
+import os
+from pathlib import Path
+import numpy as np
+import tensorflow as tf
+from cnnClassifier import logger
+from cnnClassifier.entity.config_entity import EmbeddingExtractionConfig
+from cnnClassifier.components.split_manifest import SplitManifest
+from cnnClassifier.utils.common import save_json
+
+
+def backbone_embedding_model(model: tf.keras.Model) -> tf.keras.Model:
+    """
+    Builds a model returning the globally average-pooled VGG19 features of `model`.
+
+    Works on the bare backbone and on the trained classifier alike: the backbone is frozen
+    during training, so both produce the same embeddings, and the returned model shares
+    the weights of `model` instead of copying them.
+
+    :param model: Keras model containing the VGG19 `block5_pool` layer.
+    :return: Model mapping preprocessed images to embeddings of shape (n, 512).
+    """
+    features = model.get_layer("block5_pool").output
+    pooled = tf.keras.layers.GlobalAveragePooling2D(name="embedding")(features)
+    return tf.keras.models.Model(inputs=model.input, outputs=pooled)
+
+
+def l2_normalize(embeddings: np.ndarray) -> np.ndarray:
+    """
+    Scales each row to unit length so cosine similarity becomes a dot product.
+
+    :param embeddings: Array of shape (n, dim).
+    :return: Normalised float32 array.
+    """
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    return embeddings / np.maximum(norms, 1e-12)
+
+
+class EmbeddingExtraction:
+    """
+    A class to embed the whole ingested dataset with the frozen backbone and index the embeddings.
+    """
+
+    # Iterations of the k-means clustering that builds the IVF lists
+    KMEANS_ITERATIONS = 20
+    # Embeddings sampled per IVF list to train the clustering
+    KMEANS_SAMPLES_PER_LIST = 256
+
+    def __init__(self, config: EmbeddingExtractionConfig):
+        """
+        Initializes the EmbeddingExtraction class with the provided configuration.
+
+        :param config: EmbeddingExtractionConfig object containing configuration parameters.
+        """
+        self.config = config
+        self.model = None
+
+    def load_model(self):
+        """
+        Loads the frozen VGG19 backbone and adds global average pooling on top.
+        """
+        self.model = backbone_embedding_model(tf.keras.models.load_model(self.config.base_model_path))
+
+    def extract(self):
+        """
+        Embeds every ingested image in batched forward passes, writing the rows straight into
+        a float16 memory-mapped matrix, and saves the image paths and labels of the rows.
+        """
+        datagenerator = tf.keras.preprocessing.image.ImageDataGenerator(rescale=1.0 / 255)
+        generator = SplitManifest(self.config.split_manifest_path).flow(
+            datagenerator,
+            shuffle=False,  # Keep rows aligned with generator.filenames
+            target_size=self.config.params_image_size[:-1],  # Exclude channel dimension
+            batch_size=self.config.params_batch_size,
+            interpolation="bilinear"
+        )
+
+        dim = int(self.model.output_shape[-1])
+        embeddings = np.lib.format.open_memmap(
+            self.config.embeddings_path, mode="w+", dtype=np.float16, shape=(generator.samples, dim)
+        )
+        for batch_index in range(len(generator)):
+            images, _ = generator[batch_index]
+            start = batch_index * self.config.params_batch_size
+            embeddings[start:start + len(images)] = l2_normalize(self.model.predict_on_batch(images))
+        embeddings.flush()
+        logger.info(f"Embedded {generator.samples} images into {self.config.embeddings_path}")
+
+        class_names = [name for name, _ in sorted(generator.class_indices.items(), key=lambda item: item[1])]
+        save_json(path=Path(self.config.metadata_path), data={
+            "dim": dim,
+            "count": int(generator.samples),
+            "class_names": class_names,
+            "paths": list(generator.filenames),  # Relative to the dataset directory
+            "labels": [int(label) for label in generator.classes],
+        })
+
+    def build_ivf_index(self):
+        """
+        Clusters the embeddings with spherical k-means and stores, for each cluster, the rows
+        assigned to it, so queries only scan the few lists closest to them.
+        """
+        num_lists = self.config.params_ivf_lists
+        if num_lists <= 0:
+            if os.path.exists(self.config.ivf_index_path):
+                os.remove(self.config.ivf_index_path)
+            return
+
+        embeddings = np.load(self.config.embeddings_path, mmap_mode="r")
+        num_lists = min(num_lists, len(embeddings))
+        rng = np.random.default_rng(42)
+
+        # Train the centroids on a sample, then assign every embedding
+        sample_size = min(len(embeddings), num_lists * self.KMEANS_SAMPLES_PER_LIST)
+        sample = np.asarray(embeddings[np.sort(rng.choice(len(embeddings), sample_size, replace=False))], dtype=np.float32)
+        centroids = sample[rng.choice(len(sample), num_lists, replace=False)]
+        for _ in range(self.KMEANS_ITERATIONS):
+            assignments = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignments, sample)
+            counts = np.bincount(assignments, minlength=num_lists)
+            # Empty clusters keep their previous centroid
+            centroids = np.where(counts[:, None] > 0, l2_normalize(sums), centroids)
+
+        assignments = np.concatenate([
+            np.argmax(np.asarray(embeddings[start:start + 65536], dtype=np.float32) @ centroids.T, axis=1)
+            for start in range(0, len(embeddings), 65536)
+        ])
+
+        # Store the lists contiguously: rows of list i are list_ids[list_offsets[i]:list_offsets[i + 1]]
+        list_ids = np.argsort(assignments, kind="stable").astype(np.int64)
+        list_offsets = np.concatenate([[0], np.cumsum(np.bincount(assignments, minlength=num_lists))]).astype(np.int64)
+        np.savez(self.config.ivf_index_path, centroids=centroids, list_ids=list_ids, list_offsets=list_offsets)
+        logger.info(f"IVF index with {num_lists} lists saved at: {self.config.ivf_index_path}")
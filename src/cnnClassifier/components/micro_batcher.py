@@ -0,0 +1,178 @@
+import time
+import queue
+import threading
+from concurrent.futures import Future
+import numpy as np
+from cnnClassifier import logger
+from cnnClassifier.utils.metrics import PHASE_LATENCY, BATCH_SIZE
+from cnnClassifier.components.admission_control import DeadlineExceeded
+
+
+class MicroBatcher:
+    """
+    Collects concurrent single-image requests into batches and runs one forward pass per batch.
+    """
+
+    def __init__(self, predict_fn, max_batch_size: int, max_wait_ms: float):
+        """
+        Initializes the MicroBatcher.
+
+        :param predict_fn: Callable taking a stacked input batch and returning one output row per input.
+        :param max_batch_size: Maximum number of requests merged into a single forward pass.
+        :param max_wait_ms: Maximum time the first request of a batch waits for others to join.
+        """
+        self.predict_fn = predict_fn
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        self._queue = queue.Queue()
+        self._stop_event = threading.Event()
+        self._worker = None
+
+        # Statistics, only written by the worker thread
+        self._batches = 0
+        self._items = 0
+        self._expired = 0
+        self._last_batch_size = 0
+        self._batch_size_counts = [0] * (self.max_batch_size + 1)
+
+    def start(self):
+        """
+        Starts the background thread that forms and runs batches.
+        """
+        if self._worker is not None:
+            return
+        self._stop_event.clear()
+        self._worker = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+        self._worker.start()
+
+    def stop(self):
+        """
+        Stops the batching thread after the batch currently being run.
+        """
+        if self._worker is None:
+            return
+        self._stop_event.set()
+        self._worker.join()
+        self._worker = None
+
+    def submit(self, item: np.ndarray, deadline: float = None) -> Future:
+        """
+        Queues a single preprocessed input for the next batch.
+
+        The future records `queue_wait` and `compute` (seconds) once its batch has run.
+
+        :param item: Input array without the batch dimension.
+        :param deadline: Optional `time.perf_counter()` deadline; the input is dropped with
+            DeadlineExceeded instead of being run if its batch starts later.
+        :return: Future resolved with the model output row for this input.
+        """
+        future = Future()
+        future.enqueued_at = time.perf_counter()
+        future.deadline = deadline
+        self._queue.put((item, future))
+        return future
+
+    def predict(self, item: np.ndarray, deadline: float = None):
+        """
+        Queues a single input and blocks until its batch has been run.
+
+        :param item: Input array without the batch dimension.
+        :param deadline: Optional `time.perf_counter()` deadline (see `submit`).
+        :return: Model output row for this input.
+        """
+        return self.submit(item, deadline).result()
+
+    def _collect(self):
+        """
+        Blocks for the first request, then gathers more until the batch is full or the wait expires.
+
+        :return: List of (item, future) pairs, empty if the batcher is stopping.
+        """
+        batch = []
+        while not batch:
+            if self._stop_event.is_set():
+                return batch
+            try:
+                batch.append(self._queue.get(timeout=0.1))
+            except queue.Empty:
+                continue
+
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                # Drain what is already queued without waiting, then wait out the remaining budget
+                batch.append(self._queue.get_nowait() if remaining <= 0 else self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        """
+        Worker loop: forms batches, runs a single forward pass and distributes the results.
+        """
+        while not self._stop_event.is_set():
+            batch = self._collect()
+            if not batch:
+                continue
+
+            # Skip requests whose callers have already given up
+            batch = [(item, future) for item, future in batch if future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+
+            # Time each request spent queued before its batch started
+            started_at = time.perf_counter()
+            for _, future in batch:
+                future.queue_wait = started_at - future.enqueued_at
+                PHASE_LATENCY.labels("queue_wait").observe(future.queue_wait)
+
+            # Drop requests whose deadline passed while queued, before they cost a forward pass
+            live = []
+            for item, future in batch:
+                if future.deadline is not None and started_at > future.deadline:
+                    self._expired += 1
+                    future.set_exception(DeadlineExceeded("Request deadline exceeded while queued"))
+                else:
+                    live.append((item, future))
+            batch = live
+            if not batch:
+                continue
+            BATCH_SIZE.observe(len(batch))
+
+            try:
+                outputs = self.predict_fn(np.stack([item for item, _ in batch]))
+            except Exception as e:
+                logger.error("Batched prediction failed.", exc_info=True)
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            compute = time.perf_counter() - started_at
+            for (_, future), output in zip(batch, outputs):
+                future.compute = compute
+                future.set_result(output)
+
+            self._batches += 1
+            self._items += len(batch)
+            self._last_batch_size = len(batch)
+            self._batch_size_counts[len(batch)] += 1
+
+    def stats(self) -> dict:
+        """
+        Returns queue depth and achieved batch sizes for tuning the latency/throughput tradeoff.
+
+        :return: Dictionary of batching statistics.
+        """
+        batches = self._batches
+        return {
+            "queue_depth": self._queue.qsize(),
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000.0,
+            "batches": batches,
+            "items": self._items,
+            "expired": self._expired,
+            "mean_batch_size": (self._items / batches) if batches else 0.0,
+            "last_batch_size": self._last_batch_size,
+            "batch_size_counts": {size: count for size, count in enumerate(self._batch_size_counts) if count},
+        }
@@ -4,6 +4,8 @@ import mlflow
 import mlflow.keras
 from urllib.parse import urlparse
 from cnnClassifier.entity.config_entity import EvaluationConfig
+from cnnClassifier.components.data_loader import DataLoader
+from cnnClassifier.components.split_manifest import SplitManifest
 from cnnClassifier.utils.common import read_yaml, create_directories, save_json
 
 
@@ -25,12 +27,21 @@ class Evaluation:
 
     def _valid_generator(self):
         """
-        Prepares the validation data generator for evaluation.
+        Prepares the data generator for evaluation over the held-out test subset of the split
+        manifest, which neither training nor validation sees.
         """
+        if self.config.params_data_loader == "tf_data":
+            self.valid_generator = DataLoader(
+                manifest_path=self.config.split_manifest_path,
+                image_size=self.config.params_image_size,
+                batch_size=self.config.params_batch_size,
+                dataset_cache_index=self.config.dataset_cache_index  # Preprocessed images, when cached
+            ).dataset(subset="test")
+            return
+
         # Arguments for the data generator
         datagenerator_kwargs = dict(
-            rescale=1.0 / 255,  # Rescale pixel values
-            validation_split=0.30  # Use 30% of data for validation
+            rescale=1.0 / 255  # Rescale pixel values
         )
 
         # Arguments for data flow
@@ -40,11 +51,11 @@ class Evaluation:
             interpolation="bilinear"
         )
 
-        # Validation data generator
+        # Test data generator
         valid_datagenerator = tf.keras.preprocessing.image.ImageDataGenerator(**datagenerator_kwargs)
-        self.valid_generator = valid_datagenerator.flow_from_directory(
-            directory=self.config.training_data,
-            subset="validation",
+        self.valid_generator = SplitManifest(self.config.split_manifest_path).flow(
+            valid_datagenerator,
+            subset="test",
             shuffle=False,  # No shuffling for evaluation
             **dataflow_kwargs
         )
@@ -0,0 +1,164 @@
+import os
+import time
+from pathlib import Path
+import numpy as np
+import tensorflow as tf
+from cnnClassifier import logger
+from cnnClassifier.entity.config_entity import ModelQuantizationConfig
+from cnnClassifier.components.tflite_model import TFLiteModel
+from cnnClassifier.components.split_manifest import SplitManifest
+from cnnClassifier.utils.common import save_json
+
+
+class ModelQuantization:
+    """
+    A class to export post-training quantized TFLite models and compare them against the Keras model.
+    """
+
+    def __init__(self, config: ModelQuantizationConfig):
+        """
+        Initializes the ModelQuantization class with the provided configuration.
+
+        :param config: ModelQuantizationConfig object containing configuration parameters.
+        """
+        self.config = config
+        self.model = None
+
+    def load_model(self):
+        """
+        Loads the trained Keras model to be quantized.
+        """
+        self.model = tf.keras.models.load_model(self.config.path_of_model)
+
+    def _generator(self, subset: str, batch_size: int, shuffle: bool):
+        """
+        Builds a data generator over a subset of the split manifest with the evaluation preprocessing.
+
+        :param subset: "training" for calibration data, "test" for the comparison set (as in evaluation).
+        :param batch_size: Number of images per batch.
+        :param shuffle: Whether to shuffle the images.
+        :return: DataFrameIterator yielding (images, labels) batches.
+        """
+        datagenerator = tf.keras.preprocessing.image.ImageDataGenerator(rescale=1.0 / 255)
+        return SplitManifest(self.config.split_manifest_path).flow(
+            datagenerator,
+            subset=subset,
+            shuffle=shuffle,
+            seed=42,
+            target_size=self.config.params_image_size[:-1],  # Exclude channel dimension
+            batch_size=batch_size,
+            interpolation="bilinear"
+        )
+
+    def _representative_dataset(self):
+        """
+        Yields calibration samples drawn from the training subset of the ingested dataset.
+        """
+        generator = self._generator(subset="training", batch_size=1, shuffle=True)
+        for _ in range(min(self.config.params_calibration_samples, generator.samples)):
+            images, _ = next(generator)
+            yield [images.astype(np.float32)]
+
+    def _write(self, path: Path, tflite_model: bytes):
+        """
+        Writes a converted TFLite flatbuffer to disk.
+
+        :param path: Destination path of the .tflite file.
+        :param tflite_model: Serialized TFLite model.
+        """
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(tflite_model)
+        logger.info(f"TFLite model saved at: {path} ({len(tflite_model) / 1024 / 1024:.1f} MB)")
+
+    def export_dynamic_range(self):
+        """
+        Exports a dynamic-range quantized model (int8 weights, float activations).
+        """
+        converter = tf.lite.TFLiteConverter.from_keras_model(self.model)
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        self._write(self.config.dynamic_range_model_path, converter.convert())
+
+    def export_int8(self):
+        """
+        Exports a full-integer quantized model calibrated on a subset of the ingested dataset.
+        """
+        converter = tf.lite.TFLiteConverter.from_keras_model(self.model)
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.representative_dataset = self._representative_dataset
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+        converter.inference_input_type = tf.int8
+        converter.inference_output_type = tf.int8
+        self._write(self.config.int8_model_path, converter.convert())
+
+    @staticmethod
+    def _measure(model, images: np.ndarray, labels: np.ndarray, batch_size: int, latency_runs: int) -> dict:
+        """
+        Measures accuracy over the comparison set and single-image latency of a model.
+
+        :param model: Keras model or TFLiteModel exposing `predict_on_batch`.
+        :param images: Comparison images.
+        :param labels: One-hot labels of the comparison images.
+        :param batch_size: Batch size used for the accuracy pass.
+        :param latency_runs: Number of timed single-image predictions.
+        :return: Dictionary with accuracy and latency percentiles in milliseconds.
+        """
+        predictions = np.concatenate([
+            np.asarray(model.predict_on_batch(images[start:start + batch_size]))
+            for start in range(0, len(images), batch_size)
+        ])
+        accuracy = float(np.mean(np.argmax(predictions, axis=1) == np.argmax(labels, axis=1)))
+
+        # Warm up once, then time single-image requests as served by /predict
+        single = images[:1]
+        model.predict_on_batch(single)
+        latencies = []
+        for _ in range(latency_runs):
+            start = time.perf_counter()
+            model.predict_on_batch(single)
+            latencies.append((time.perf_counter() - start) * 1000.0)
+
+        return {
+            "accuracy": accuracy,
+            "latency_ms_mean": float(np.mean(latencies)),
+            "latency_ms_p50": float(np.percentile(latencies, 50)),
+            "latency_ms_p95": float(np.percentile(latencies, 95)),
+        }
+
+    def compare_backends(self):
+        """
+        Compares the quantized models with the Keras model and writes the accuracy-delta and latency report.
+        """
+        batch_size = self.config.params_batch_size
+        generator = self._generator(subset="test", batch_size=batch_size, shuffle=False)
+
+        # Collect the comparison set once so every backend sees identical inputs
+        images, labels = [], []
+        collected = 0
+        while collected < min(self.config.params_eval_samples, generator.samples):
+            batch_images, batch_labels = next(generator)
+            images.append(batch_images)
+            labels.append(batch_labels)
+            collected += len(batch_images)
+        images = np.concatenate(images)[:self.config.params_eval_samples]
+        labels = np.concatenate(labels)[:self.config.params_eval_samples]
+
+        backends = {
+            "keras": (self.model, self.config.path_of_model),
+            "tflite_dynamic_range": (TFLiteModel(self.config.dynamic_range_model_path), self.config.dynamic_range_model_path),
+            "tflite_int8": (TFLiteModel(self.config.int8_model_path), self.config.int8_model_path),
+        }
+        report = {"samples": int(len(images)), "backends": {}}
+        for name, (model, path) in backends.items():
+            logger.info(f"Measuring backend: {name}")
+            result = self._measure(model, images, labels, batch_size, latency_runs=50)
+            result["size_mb"] = os.path.getsize(path) / 1024 / 1024
+            report["backends"][name] = result
+
+        # Express quantized results relative to the float32 Keras model
+        keras_result = report["backends"]["keras"]
+        for name, result in report["backends"].items():
+            result["accuracy_delta"] = result["accuracy"] - keras_result["accuracy"]
+            result["speedup"] = keras_result["latency_ms_mean"] / result["latency_ms_mean"]
+
+        save_json(path=Path(self.config.report_path), data=report)
@@ -0,0 +1,215 @@
+import os
+import hashlib
+import threading
+from pathlib import Path
+from cnnClassifier import logger
+from cnnClassifier.entity.config_entity import PredictionConfig
+
+
+def load_keras_model(path):
+    """
+    Loads a Keras model, importing TensorFlow only when a model is actually needed.
+
+    :param path: Path to the Keras model file.
+    :return: Loaded TensorFlow model.
+    """
+    import tensorflow as tf
+    return tf.keras.models.load_model(path)
+
+
+class ModelRegistry:
+    """
+    Keeps the served model resident in memory and hot-swaps it in the background
+    whenever a new model artifact is published.
+    """
+
+    # Registries shared by every pipeline in the process, keyed by model path
+    _instances = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, config: PredictionConfig, loader=None):
+        """
+        Initializes the ModelRegistry with the provided configuration.
+
+        :param config: PredictionConfig object containing the model path and reload settings.
+        :param loader: Optional callable that loads a model from a path (defaults to Keras `load_model`).
+        """
+        self.config = config
+        self.loader = loader or load_keras_model
+        self.warmup = None  # Optional callable run on a newly loaded model before it is served
+        self._load_lock = threading.Lock()  # Serialises loads, never held while serving
+        self._current = None  # (model, version) tuple, replaced atomically on swap
+        self._fingerprint = None  # File stats of the artifact currently served
+        self._pending_fingerprint = None  # File stats seen on the previous poll
+        self._stop_event = threading.Event()
+        self._watcher = None
+        self._swap_listeners = []  # Callables notified with the new version after a hot-swap
+
+    @classmethod
+    def shared(cls, config: PredictionConfig, loader=None):
+        """
+        Returns the process-wide registry for the configured model path, creating it on first use.
+
+        :param config: PredictionConfig object containing the model path and reload settings.
+        :param loader: Optional callable that loads a model from a path.
+        :return: The shared ModelRegistry instance.
+        """
+        key = str(config.model_path)
+        with cls._instances_lock:
+            if key not in cls._instances:
+                cls._instances[key] = cls(config, loader=loader)
+            return cls._instances[key]
+
+    def get(self):
+        """
+        Returns the resident model and its version, loading it on first use.
+
+        Callers should keep the returned tuple for the whole request so that a
+        concurrent swap never changes the model underneath them.
+
+        :return: Tuple of (model, version).
+        """
+        current = self._current
+        if current is None:
+            with self._load_lock:
+                # Another thread may have finished the initial load while we waited
+                if self._current is None:
+                    self._load(self._stat_artifacts())
+                current = self._current
+        return current
+
+    @property
+    def version(self):
+        """
+        Version string of the model currently being served, or None if nothing is loaded yet.
+        """
+        current = self._current
+        return current[1] if current is not None else None
+
+    def _stat_artifacts(self):
+        """
+        Cheap fingerprint of the model and version files used to detect changes without hashing.
+
+        :return: Tuple of (mtime, size) pairs, or None if the model file is missing.
+        """
+        try:
+            model_stat = os.stat(self.config.model_path)
+        except FileNotFoundError:
+            return None
+        fingerprint = [(model_stat.st_mtime_ns, model_stat.st_size)]
+        if os.path.exists(self.config.model_version_file):
+            version_stat = os.stat(self.config.model_version_file)
+            fingerprint.append((version_stat.st_mtime_ns, version_stat.st_size))
+        return tuple(fingerprint)
+
+    def _read_version(self) -> str:
+        """
+        Reads the model version from the version file, falling back to a content hash of the model.
+
+        The version file is only trusted when it was written after the model: a stale or
+        leftover file would otherwise keep reporting the old version of a new model, which
+        is then never swapped in.
+
+        :return: Version string identifying the model artifact.
+        """
+        version_file = Path(self.config.model_version_file)
+        if version_file.exists() and version_file.stat().st_mtime_ns >= os.stat(self.config.model_path).st_mtime_ns:
+            version = version_file.read_text().strip()
+            if version:
+                return version
+
+        digest = hashlib.sha256()
+        with open(self.config.model_path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+        return digest.hexdigest()[:12]
+
+    def _load(self, fingerprint):
+        """
+        Loads the model artifact and swaps it in as the served model.
+
+        :param fingerprint: File stats of the artifact being loaded.
+        """
+        version = self._read_version()
+        logger.info(f"Loading model {self.config.model_path} (version {version})")
+        model = self.loader(self.config.model_path)
+
+        # Trace the new model off the request path so the swap never slows a request down
+        if self.warmup is not None:
+            self.warmup(model)
+
+        # Single reference assignment: in-flight requests keep the tuple they already hold
+        previous, self._current = self._current, (model, version)
+        self._fingerprint = fingerprint
+        logger.info(f"Serving model version {version}")
+
+        # Let dependants (e.g. prediction caches) drop state tied to the old model
+        if previous is not None:
+            for listener in self._swap_listeners:
+                try:
+                    listener(version)
+                except Exception:
+                    logger.error("Model swap listener failed.", exc_info=True)
+
+    def add_swap_listener(self, listener):
+        """
+        Registers a callable invoked with the new version whenever a model is hot-swapped.
+
+        :param listener: Callable taking the new version string.
+        """
+        self._swap_listeners.append(listener)
+
+    def check_for_update(self) -> bool:
+        """
+        Reloads the model if a new artifact has been published and has stopped changing.
+
+        :return: True if a new model version was swapped in.
+        """
+        fingerprint = self._stat_artifacts()
+
+        # Skip while the artifact is missing, unchanged, or still being written
+        if fingerprint is None or fingerprint == self._fingerprint:
+            self._pending_fingerprint = None
+            return False
+        if fingerprint != self._pending_fingerprint:
+            self._pending_fingerprint = fingerprint
+            return False
+
+        with self._load_lock:
+            if self._current is not None and self._read_version() == self._current[1]:
+                # Same content re-written (e.g. touched by DVC), no need to reload
+                self._fingerprint = fingerprint
+                return False
+            try:
+                self._load(fingerprint)
+            except Exception:
+                logger.error("Failed to load the new model artifact, keeping the current model.", exc_info=True)
+                return False
+        return True
+
+    def _watch(self):
+        """
+        Background loop polling for new model artifacts until stopped.
+        """
+        while not self._stop_event.wait(self.config.reload_interval):
+            self.check_for_update()
+
+    def start_watching(self):
+        """
+        Starts the background thread that hot-swaps new model artifacts.
+        """
+        if self.config.reload_interval <= 0 or self._watcher is not None:
+            return
+        self._stop_event.clear()
+        self._watcher = threading.Thread(target=self._watch, name="model-registry-watcher", daemon=True)
+        self._watcher.start()
+
+    def stop_watching(self):
+        """
+        Stops the background watcher thread.
+        """
+        if self._watcher is None:
+            return
+        self._stop_event.set()
+        self._watcher.join()
+        self._watcher = None
@@ -3,7 +3,16 @@ from pathlib import Path
 import matplotlib.pyplot as plt
 import tensorflow as tf
 from tensorflow.keras.utils import plot_model
+from cnnClassifier import logger
 from cnnClassifier.entity.config_entity import TrainingConfig
+from cnnClassifier.components.data_loader import DataLoader, AUGMENTATION_KWARGS
+from cnnClassifier.components.split_manifest import SplitManifest
+from cnnClassifier.components.bottleneck_features import BottleneckFeatures, split_at_layer
+from cnnClassifier.components.training_checkpoint import TrainingCheckpoint
+from cnnClassifier.components.training_profiler import TrainingProfiler
+from cnnClassifier.components.distributed_training import cluster_from_env, multi_worker_strategy, sharded_dataset
+from cnnClassifier.utils.common import save_json
+from cnnClassifier.utils.runtime import apply_runtime_profile
 
 
 class Training:
@@ -15,20 +24,48 @@ class Training:
         """
         self.config = config
 
+        # Thread pools as tuned for this host, sized before the first TensorFlow op
+        apply_runtime_profile(self.config.runtime_profile_path, "training", self.config.params_batch_size)
+
+        # Inside a TF_CONFIG cluster, training runs under MultiWorkerMirroredStrategy
+        self.num_workers, self.task_index = cluster_from_env()
+        self.strategy = multi_worker_strategy()
+        self.is_chief = self.task_index == 0
+        self.global_batch_size = self.config.params_batch_size * self.num_workers
+
     def get_base_model(self):
         """
         Loads the pre-trained and updated base model for further training.
+
+        Under a multi-worker strategy the model is created in its scope and the learning rate
+        is scaled linearly with the global batch size.
         """
-        self.model = tf.keras.models.load_model(self.config.updated_base_model_path)
+        if self.strategy is None:
+            self.model = tf.keras.models.load_model(self.config.updated_base_model_path)
+            return
+
+        with self.strategy.scope():
+            self.model = tf.keras.models.load_model(self.config.updated_base_model_path)
+        learning_rate = tf.keras.backend.get_value(self.model.optimizer.lr) * self.num_workers
+        tf.keras.backend.set_value(self.model.optimizer.lr, learning_rate)
+        logger.info(f"Global batch size {self.global_batch_size}, learning rate {learning_rate:g}")
 
     def train_valid_generator(self):
         """
         Prepares the training and validation data generators with optional augmentation.
+
+        Uses the tf.data loader or the legacy ImageDataGenerator, as selected by `DATA_LOADER`.
         """
+        if self.config.params_data_loader == "tf_data" or self.strategy is not None:
+            self._train_valid_datasets()
+            return
+
+        # Training and validation subsets of the split manifest
+        manifest = SplitManifest(self.config.split_manifest_path)
+
         # Common data generator arguments
         datagenerator_kwargs = dict(
-            rescale=1.0 / 255,
-            validation_split=0.20  # 20% data reserved for validation
+            rescale=1.0 / 255
         )
 
         # Data flow arguments
@@ -40,8 +77,8 @@ class Training:
 
         # Validation data generator
         valid_datagenerator = tf.keras.preprocessing.image.ImageDataGenerator(**datagenerator_kwargs)
-        self.valid_generator = valid_datagenerator.flow_from_directory(
-            directory=self.config.training_data,
+        self.valid_generator = manifest.flow(
+            valid_datagenerator,
             subset="validation",
             shuffle=False,
             **dataflow_kwargs
@@ -50,23 +87,55 @@ class Training:
         # Training data generator (with or without augmentation)
         if self.config.params_is_augmentation:
             train_datagenerator = tf.keras.preprocessing.image.ImageDataGenerator(
-                rotation_range=40,
-                horizontal_flip=True,
-                width_shift_range=0.2,
-                height_shift_range=0.2,
-                shear_range=0.2,
-                zoom_range=0.2,
+                **AUGMENTATION_KWARGS,
                 **datagenerator_kwargs
             )
         else:
             train_datagenerator = valid_datagenerator  # Reuse the validation generator if no augmentation
 
-        self.train_generator = train_datagenerator.flow_from_directory(
-            directory=self.config.training_data,
+        self.train_generator = manifest.flow(
+            train_datagenerator,
             subset="training",
             shuffle=True,
             **dataflow_kwargs
         )
+        self.train_samples = self.train_generator.samples
+        self.valid_samples = self.valid_generator.samples
+
+        # Persist the label mapping so serving does not hard-code the class order
+        save_json(path=self.config.class_indices_path, data=self.train_generator.class_indices)
+
+    def _train_valid_datasets(self):
+        """
+        Prepares tf.data training and validation pipelines with the same split, preprocessing
+        and augmentation as the ImageDataGenerator path, decoded in parallel and prefetched.
+
+        Under a multi-worker strategy, every worker reads its own shard of each subset.
+        """
+        loader = DataLoader(
+            manifest_path=self.config.split_manifest_path,
+            image_size=self.config.params_image_size,
+            batch_size=self.config.params_batch_size,
+            dataset_cache_index=self.config.dataset_cache_index  # Preprocessed images, when cached
+        )
+        train_kwargs = dict(
+            subset="training",
+            shuffle=True,
+            augment=self.config.params_is_augmentation,
+            repeat=True  # Epoch length is set by steps_per_epoch
+        )
+        if self.strategy is None:
+            self.valid_generator = loader.dataset(subset="validation")
+            self.train_generator = loader.dataset(**train_kwargs)
+        else:
+            self.valid_generator = sharded_dataset(loader, subset="validation")
+            self.train_generator = sharded_dataset(loader, **train_kwargs)
+        self.train_samples = loader.samples("training")
+        self.valid_samples = loader.samples("validation")
+
+        # Persist the label mapping so serving does not hard-code the class order
+        if self.is_chief:
+            save_json(path=self.config.class_indices_path, data=loader.class_indices)
 
     @staticmethod
     def save_model(path: Path, model: tf.keras.Model):
@@ -78,14 +147,98 @@ class Training:
         """
         model.save(path)
 
-    def train(self):
+    def _bottleneck_split(self):
+        """
+        Splits the model for bottleneck training, if its backbone is frozen.
+
+        :return: Tuple of (backbone, head) sharing the layers of `self.model`, or None.
+        """
+        backbone, head = split_at_layer(self.model)
+        if backbone.trainable_weights:
+            logger.warning("Backbone has trainable layers; training the full model instead of bottleneck features")
+            return None
+        return backbone, head
+
+    def _bottleneck_features(self, backbone) -> BottleneckFeatures:
         """
-        Trains the model using the prepared data generators, applies callbacks for early stopping
-        and learning rate reduction, and plots training/validation metrics.
+        Extracts (or reuses) the cached backbone outputs of the training and validation images.
+
+        :param backbone: Frozen backbone whose outputs are cached.
+        :return: The prepared BottleneckFeatures.
+        """
+        loader = DataLoader(
+            manifest_path=self.config.split_manifest_path,
+            image_size=self.config.params_image_size,
+            batch_size=self.config.params_batch_size,
+            dataset_cache_index=self.config.dataset_cache_index
+        )
+        features = BottleneckFeatures(
+            root_dir=self.config.bottleneck_dir,
+            loader=loader,
+            variants=self.config.params_bottleneck_variants,
+            augment=self.config.params_is_augmentation
+        )
+        features.prepare(backbone)
+        return features
+
+    def prepare_bottleneck_features(self) -> bool:
+        """
+        Extracts the bottleneck features ahead of training, e.g. once before concurrent sweep trials.
+
+        :return: Whether bottleneck training applies to the loaded model.
         """
-        # Define training steps
-        self.steps_per_epoch = self.train_generator.samples // self.train_generator.batch_size
-        self.validation_steps = self.valid_generator.samples // self.valid_generator.batch_size
+        bottleneck = self._bottleneck_split()
+        if bottleneck is None:
+            return False
+        self._bottleneck_features(bottleneck[0])
+        return True
+
+    def _fit_head_on_bottleneck_features(self, backbone, head, callbacks: list, initial_epoch: int = 0):
+        """
+        Trains only the dense head on cached backbone outputs.
+
+        The head shares its layers with `self.model`, so the trained head weights are already
+        part of the full model when it is saved.
+
+        :param backbone: Frozen backbone whose outputs are cached.
+        :param head: Dense head trained on the cached outputs.
+        :param callbacks: Keras callbacks applied to the head's training.
+        :param initial_epoch: Epoch to resume from.
+        :return: Training history.
+        """
+        features = self._bottleneck_features(backbone)
+
+        # Same optimizer settings and loss as the full model, with a fresh optimizer state
+        optimizer = self.model.optimizer
+        head.compile(
+            optimizer=type(optimizer).from_config(optimizer.get_config()),
+            loss=tf.keras.losses.CategoricalCrossentropy(),
+            metrics=["accuracy"]
+        )
+        return head.fit(
+            features.dataset("training", self.config.params_batch_size, shuffle=True, repeat=True),
+            epochs=self.config.params_epochs,
+            initial_epoch=initial_epoch,
+            steps_per_epoch=self.steps_per_epoch,
+            validation_data=features.dataset("validation", self.config.params_batch_size),
+            validation_steps=self.validation_steps,
+            callbacks=callbacks
+        )
+
+    def fit(self):
+        """
+        Fits the model on the prepared data with early stopping and learning rate reduction,
+        without saving it.
+
+        With `BOTTLENECK_TRAINING`, only the head is trained on cached backbone outputs. The
+        training state is checkpointed every `CHECKPOINT_EVERY` epochs, and a run resumes from
+        its latest checkpoint, so calling `fit` again with more epochs continues training.
+
+        :return: Training history, including the epochs before a resume.
+        """
+        # Define training steps (every step consumes one global batch across the workers)
+        self.steps_per_epoch = self.train_samples // self.global_batch_size
+        self.validation_steps = self.valid_samples // self.global_batch_size
 
         # Callbacks for training
         reduce_lr = tf.keras.callbacks.ReduceLROnPlateau(
@@ -108,15 +261,71 @@ class Training:
             restore_best_weights=True
         )
 
-        # Train the model
-        history = self.model.fit(
-            self.train_generator,
-            epochs=self.config.params_epochs,
-            steps_per_epoch=self.steps_per_epoch,
-            validation_data=self.valid_generator,
-            validation_steps=self.validation_steps,
-            callbacks=[reduce_lr, early_stopping]
+        # Cached bottleneck features make the head too cheap to be worth distributing
+        bottleneck = None
+        if self.config.params_bottleneck_training and self.strategy is None:
+            bottleneck = self._bottleneck_split()
+
+        # Checkpoints are only resumed by a run with the same settings; every worker keeps its own
+        checkpoint_dir = self.config.checkpoint_dir
+        if not self.is_chief:
+            checkpoint_dir = Path(f"{checkpoint_dir}-worker-{self.task_index}")
+        checkpoint = TrainingCheckpoint(
+            checkpoint_dir=checkpoint_dir,
+            callbacks=[reduce_lr, early_stopping],
+            signature={
+                "image_size": self.config.params_image_size,
+                "batch_size": self.config.params_batch_size,
+                "augmentation": self.config.params_is_augmentation,
+                "data_loader": self.config.params_data_loader,
+                "bottleneck": bottleneck is not None,
+                "bottleneck_variants": self.config.params_bottleneck_variants,
+                "workers": self.num_workers,
+            },
+            every=self.config.params_checkpoint_every,
+            keep=self.config.params_checkpoint_keep
         )
+        callbacks = [reduce_lr, early_stopping]
+        if self.config.params_profile_training:
+            if self.strategy is None:
+                callbacks.append(TrainingProfiler(
+                    output_path=self.config.training_profile_path,
+                    trace_dir=self.config.profile_trace_dir,
+                    trace_steps=self.config.params_profile_trace_steps
+                ))
+            else:
+                logger.warning("Training profiling is not supported with multiple workers")
+        callbacks.append(checkpoint)  # The checkpoint must come last
+        initial_epoch = self.config.params_epochs if checkpoint.stopped else checkpoint.initial_epoch
+
+        # Train the model
+        if bottleneck is not None:
+            history = self._fit_head_on_bottleneck_features(*bottleneck, callbacks, initial_epoch)
+        else:
+            history = self.model.fit(
+                self.train_generator,
+                epochs=self.config.params_epochs,
+                initial_epoch=initial_epoch,
+                steps_per_epoch=self.steps_per_epoch,
+                validation_data=self.valid_generator,
+                validation_steps=self.validation_steps,
+                callbacks=callbacks
+            )
+        history.history = checkpoint.history  # Includes the epochs before a resume
+        self.checkpoint = checkpoint
+        return history
+
+    def train(self):
+        """
+        Trains the model using the prepared data generators, then plots the training/validation
+        metrics and saves the model.
+        """
+        history = self.fit()
+
+        # The workers hold identical weights; only the chief writes the outputs
+        if not self.is_chief:
+            self.checkpoint.clear()
+            return
 
         # Plot and save training metrics
         self._plot_metrics(history)
@@ -127,6 +336,9 @@ class Training:
             model=self.model
         )
 
+        # The saved model supersedes the checkpoints
+        self.checkpoint.clear()
+
         # Save model architecture visualization
         plot_model(self.model, to_file="../../../visualisations/trained_model.png", show_shapes=True)
 
@@ -0,0 +1,304 @@
+import os
+import time
+import shutil
+import hashlib
+import threading
+from collections import OrderedDict
+from pathlib import Path
+import numpy as np
+from cnnClassifier import logger
+
+
+class PredictionCache:
+    """
+    Content-addressed cache of model outputs with LRU and TTL eviction and an optional on-disk tier.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float, disk_dir: Path = None,
+                 disk_max_entries: int = 100000, disk_sweep_interval: float = 300.0):
+        """
+        Initializes the PredictionCache.
+
+        :param max_entries: Maximum number of entries kept in memory (least recently used are evicted).
+        :param ttl_seconds: Seconds an entry stays valid (0 disables expiry).
+        :param disk_dir: Optional directory for a persistent second tier shared across restarts.
+        :param disk_max_entries: Maximum number of entries kept on disk (oldest are evicted).
+        :param disk_sweep_interval: Seconds between sweeps deleting expired and excess disk entries
+                                    (0 disables the background sweep).
+        """
+        self.max_entries = max(1, int(max_entries))
+        self.ttl = float(ttl_seconds)
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        self.disk_max_entries = max(1, int(disk_max_entries))
+        self.disk_sweep_interval = float(disk_sweep_interval)
+        self._entries = OrderedDict()  # key -> (stored_at, value), most recently used last
+        self._disk_entries = OrderedDict()  # key -> stored_at of the entries on disk, oldest first
+        self._lock = threading.Lock()
+        self._disk_lock = threading.Lock()
+        self._stop_event = threading.Event()
+
+        # Counters exposed through stats()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self.disk_evictions = 0
+        self.disk_write_errors = 0
+
+        if self.disk_dir is not None:
+            os.makedirs(self.disk_dir, exist_ok=True)
+            self.sweep_disk()  # Index the entries left by previous runs and drop the stale ones
+            if self.disk_sweep_interval > 0:
+                threading.Thread(target=self._sweep_loop, name="prediction-cache-sweeper", daemon=True).start()
+
+    @staticmethod
+    def make_key(image, model_version: str) -> str:
+        """
+        Builds the cache key from the decoded image content and the model version.
+
+        :param image: Encoded image bytes or a decoded pixel array.
+        :param model_version: Version of the model producing the prediction.
+        :return: Hex digest identifying the (image, model) pair.
+        """
+        digest = hashlib.sha256()
+        if isinstance(image, np.ndarray):
+            digest.update(f"{image.shape}{image.dtype}".encode())
+            digest.update(np.ascontiguousarray(image).tobytes())
+        else:
+            digest.update(image)
+        digest.update(str(model_version).encode())
+        return digest.hexdigest()
+
+    def _expired(self, stored_at: float) -> bool:
+        """
+        Checks whether an entry stored at the given time has outlived the TTL.
+
+        :param stored_at: Wall-clock time at which the entry was stored.
+        :return: True if the entry must not be served.
+        """
+        return self.ttl > 0 and (time.time() - stored_at) > self.ttl
+
+    def _disk_path(self, key: str) -> Path:
+        """
+        Path of the on-disk entry for a key, fanned out over sub-directories.
+
+        :param key: Cache key.
+        :return: Path of the .npy file.
+        """
+        return self.disk_dir / key[:2] / f"{key}.npy"
+
+    def get(self, key: str):
+        """
+        Looks up a cached model output.
+
+        :param key: Cache key from `make_key`.
+        :return: Cached output, or None on a miss.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if not self._expired(entry[0]):
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                del self._entries[key]
+                self.expirations += 1
+
+        entry = self._get_from_disk(key)
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+        # Promote with the time the entry was first stored, so disk hits never extend its TTL
+        self._put_in_memory(key, entry[1], stored_at=entry[0])
+        return entry[1]
+
+    def _get_from_disk(self, key: str):
+        """
+        Reads an entry from the on-disk tier, dropping it if expired.
+
+        :param key: Cache key.
+        :return: (stored_at, cached output), or None if absent, expired or unreadable.
+        """
+        if self.disk_dir is None:
+            return None
+        path = self._disk_path(key)
+        try:
+            stored_at = os.path.getmtime(path)
+            if self._expired(stored_at):
+                self._remove_from_disk(key)
+                with self._lock:
+                    self.expirations += 1
+                return None
+            return stored_at, np.load(path)
+        except (OSError, ValueError):
+            return None
+
+    def _remove_from_disk(self, key: str):
+        """
+        Deletes an on-disk entry, if it still exists.
+
+        :param key: Cache key.
+        """
+        with self._disk_lock:
+            self._disk_entries.pop(key, None)
+        try:
+            os.remove(self._disk_path(key))
+        except FileNotFoundError:
+            pass
+
+    def _evict_from_disk(self):
+        """
+        Deletes the oldest on-disk entries beyond `disk_max_entries`.
+        """
+        while True:
+            with self._disk_lock:
+                if len(self._disk_entries) <= self.disk_max_entries:
+                    return
+                key, _ = self._disk_entries.popitem(last=False)
+            try:
+                os.remove(self._disk_path(key))
+            except FileNotFoundError:
+                pass
+            with self._lock:
+                self.disk_evictions += 1
+
+    def sweep_disk(self):
+        """
+        Rescans the on-disk tier: deletes expired entries and abandoned temporary files,
+        then evicts the oldest entries beyond `disk_max_entries`.
+
+        Pre-forked workers share the directory, so the rescan also picks up their entries.
+        """
+        if self.disk_dir is None:
+            return
+        found = []
+        for root, _, files in os.walk(self.disk_dir):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    stored_at = os.path.getmtime(path)
+                    if name.endswith(".tmp"):
+                        # Left by a writer that died mid-write; live writes finish within seconds
+                        if time.time() - stored_at > 60:
+                            os.remove(path)
+                    elif self._expired(stored_at):
+                        os.remove(path)
+                        with self._lock:
+                            self.expirations += 1
+                    elif name.endswith(".npy"):
+                        found.append((stored_at, name[:-len(".npy")]))
+                except FileNotFoundError:
+                    continue
+        with self._disk_lock:
+            self._disk_entries = OrderedDict((key, stored_at) for stored_at, key in sorted(found))
+        self._evict_from_disk()
+
+    def _sweep_loop(self):
+        """
+        Background loop sweeping the on-disk tier until stopped.
+        """
+        while not self._stop_event.wait(self.disk_sweep_interval):
+            try:
+                self.sweep_disk()
+            except OSError:
+                pass  # E.g. the directory is being cleared; the next sweep retries
+
+    def stop(self):
+        """
+        Stops the background sweep of the on-disk tier.
+        """
+        self._stop_event.set()
+
+    def _put_in_memory(self, key: str, value, stored_at: float = None):
+        """
+        Stores an entry in memory and evicts the least recently used entries beyond capacity.
+
+        :param key: Cache key.
+        :param value: Model output to cache.
+        :param stored_at: Time the entry was first stored, from which its TTL runs. Defaults to now.
+        """
+        with self._lock:
+            self._entries[key] = (time.time() if stored_at is None else stored_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def put(self, key: str, value):
+        """
+        Stores a model output in memory and, when configured, on disk.
+
+        The disk tier is best-effort: a failed write (e.g. a full disk, or the directory being
+        cleared by another worker) is logged and counted, and the entry stays in memory only.
+
+        :param key: Cache key from `make_key`.
+        :param value: Model output to cache.
+        """
+        value = np.asarray(value)
+        self._put_in_memory(key, value)
+
+        if self.disk_dir is not None:
+            path = self._disk_path(key)
+            # Write to a temporary file first so readers never see a partial entry
+            tmp_path = path.with_suffix(f".{threading.get_ident()}.tmp")
+            try:
+                os.makedirs(path.parent, exist_ok=True)
+                with open(tmp_path, "wb") as f:
+                    np.save(f, value)
+                os.replace(tmp_path, path)
+            except OSError as e:
+                logger.warning(f"Could not write prediction cache entry {key} to disk: {e}")
+                with self._lock:
+                    self.disk_write_errors += 1
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+                return
+            with self._disk_lock:
+                self._disk_entries[key] = time.time()
+                self._disk_entries.move_to_end(key)
+            self._evict_from_disk()
+
+    def clear(self, *args):
+        """
+        Drops every entry from both tiers, e.g. when the served model is hot-swapped.
+
+        Accepts and ignores positional arguments so it can be registered as a swap listener.
+        """
+        with self._lock:
+            self._entries.clear()
+            self.invalidations += 1
+        if self.disk_dir is not None:
+            with self._disk_lock:
+                self._disk_entries.clear()
+            shutil.rmtree(self.disk_dir, ignore_errors=True)
+            os.makedirs(self.disk_dir, exist_ok=True)
+
+    def stats(self) -> dict:
+        """
+        Returns cache occupancy and hit/miss counters.
+
+        :return: Dictionary of cache statistics.
+        """
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_ratio": ((self.hits + self.disk_hits) / lookups) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+            "disk_entries": len(self._disk_entries),
+            "disk_max_entries": self.disk_max_entries if self.disk_dir is not None else 0,
+            "disk_evictions": self.disk_evictions,
+            "disk_write_errors": self.disk_write_errors,
+        }
@@ -0,0 +1,91 @@
+import os
+import json
+import numpy as np
+from cnnClassifier import logger
+from cnnClassifier.entity.config_entity import SimilaritySearchConfig
+
+
+class SimilarityIndex:
+    """
+    Cosine nearest-neighbour search over the memory-mapped float16 embedding matrix,
+    optionally narrowed to the closest lists of a coarse-quantized (IVF) index.
+    """
+
+    # Rows scored per matrix product when scanning the whole matrix
+    CHUNK_ROWS = 65536
+
+    def __init__(self, config: SimilaritySearchConfig):
+        """
+        Initializes the SimilarityIndex, memory-mapping the embeddings so only the pages
+        touched by queries are read into memory.
+
+        :param config: SimilaritySearchConfig object containing the artifact paths and search settings.
+        """
+        self.config = config
+        self.embeddings = np.load(config.embeddings_path, mmap_mode="r")
+        with open(config.metadata_path) as f:
+            metadata = json.load(f)
+        self.paths = metadata["paths"]
+        self.labels = metadata["labels"]
+        self.class_names = metadata["class_names"]
+
+        self.centroids = None
+        if config.nprobe > 0 and os.path.exists(config.ivf_index_path):
+            index = np.load(config.ivf_index_path)
+            self.centroids = index["centroids"]
+            self.list_ids = index["list_ids"]
+            self.list_offsets = index["list_offsets"]
+        logger.info(
+            f"Similarity index loaded: {len(self.embeddings)} embeddings, "
+            f"{'IVF with %d lists' % len(self.centroids) if self.centroids is not None else 'exact search'}"
+        )
+
+    def _candidates(self, query: np.ndarray):
+        """
+        Returns the rows of the IVF lists closest to the query, or None to scan every row.
+
+        :param query: Normalised query embedding.
+        :return: Sorted row indices, or None.
+        """
+        if self.centroids is None or self.config.nprobe >= len(self.centroids):
+            return None
+        probes = np.argpartition(self.centroids @ query, -self.config.nprobe)[-self.config.nprobe:]
+        return np.sort(np.concatenate([
+            self.list_ids[self.list_offsets[i]:self.list_offsets[i + 1]] for i in probes
+        ]))
+
+    def search(self, query: np.ndarray, k: int) -> list:
+        """
+        Finds the k stored embeddings most similar to the query.
+
+        :param query: Query embedding of shape (dim,); it is normalised here.
+        :param k: Number of neighbours to return.
+        :return: List of dictionaries with the path, label and cosine similarity of each neighbour.
+        """
+        query = np.asarray(query, dtype=np.float32)
+        query = query / max(float(np.linalg.norm(query)), 1e-12)
+
+        rows = self._candidates(query)
+        if rows is None:
+            scores = np.concatenate([
+                np.asarray(self.embeddings[start:start + self.CHUNK_ROWS], dtype=np.float32) @ query
+                for start in range(0, len(self.embeddings), self.CHUNK_ROWS)
+            ])
+            rows = np.arange(len(scores))
+        else:
+            scores = np.asarray(self.embeddings[rows], dtype=np.float32) @ query
+
+        k = min(k, len(scores))
+        if k <= 0:
+            return []
+        top = np.argpartition(scores, -k)[-k:]
+        top = top[np.argsort(scores[top])[::-1]]
+
+        return [
+            {
+                "path": self.paths[rows[i]],
+                "label": self.class_names[self.labels[rows[i]]],
+                "similarity": float(scores[i]),
+            }
+            for i in top
+        ]
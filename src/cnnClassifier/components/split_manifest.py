@@ -0,0 +1,203 @@
+import os
+import json
+import hashlib
+from pathlib import Path
+from cnnClassifier import logger
+from cnnClassifier.utils.common import save_json
+
+# File extensions accepted by flow_from_directory
+WHITELIST_FORMATS = ("png", "jpg", "jpeg", "bmp", "ppm", "tif", "tiff")
+
+# Subsets of the split, named like Keras' `subset` arguments
+SUBSETS = ("training", "validation", "test")
+
+
+def list_image_files(directory) -> tuple:
+    """
+    Lists the images of a class-per-subdirectory dataset in flow_from_directory's order.
+
+    :param directory: Dataset directory with one subdirectory per class.
+    :return: Tuple of (paths grouped by class, integer labels, class_indices mapping).
+    """
+    classes = sorted(entry for entry in os.listdir(directory) if os.path.isdir(os.path.join(directory, entry)))
+    class_indices = {name: index for index, name in enumerate(classes)}
+    paths, labels = [], []
+    for name in classes:
+        for root, _, files in sorted(os.walk(os.path.join(directory, name))):
+            for file in sorted(files):
+                if file.lower().endswith(WHITELIST_FORMATS):
+                    paths.append(os.path.join(root, file))
+                    labels.append(class_indices[name])
+    return paths, labels, class_indices
+
+
+def file_sha256(path) -> str:
+    """Hashes the content of a file."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def build_split_manifest(directory, manifest_path, validation_fraction: float, test_fraction: float) -> dict:
+    """
+    Walks the dataset once and writes the manifest of its images and their split.
+
+    Images keep the split recorded in the previous manifest (matched by content hash, so
+    renamed or duplicated images stay in the same subset), and only new images are
+    assigned: within each class, in hash order, each goes to the subset furthest below its
+    target share. Adding images therefore never moves existing ones between subsets, while
+    every class stays split in the requested proportions. Hashes of files whose size and
+    modification time are unchanged are reused instead of being recomputed.
+
+    :param directory: Dataset directory with one subdirectory per class.
+    :param manifest_path: Path of the manifest, read first if it exists.
+    :param validation_fraction: Share of each class in the validation subset.
+    :param test_fraction: Share of each class in the test subset.
+    :return: The manifest.
+    """
+    previous = {"images": []}
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            previous = json.load(f)
+    previous_by_path = {image["path"]: image for image in previous["images"]}
+    split_by_hash = {image["sha256"]: image["split"] for image in previous["images"]}
+
+    paths, labels, class_indices = list_image_files(directory)
+    class_names = {index: name for name, index in class_indices.items()}
+    images = []
+    for path, label in zip(paths, labels):
+        relative_path = os.path.relpath(path, directory)
+        stat = os.stat(path)
+        known = previous_by_path.get(relative_path)
+        if known and known["size"] == stat.st_size and known["mtime_ns"] == stat.st_mtime_ns:
+            sha256 = known["sha256"]
+        else:
+            sha256 = file_sha256(path)
+        images.append({
+            "path": relative_path,
+            "label": class_names[label],
+            "sha256": sha256,
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "split": split_by_hash.get(sha256),
+        })
+
+    fractions = {"training": 1.0 - validation_fraction - test_fraction, "validation": validation_fraction, "test": test_fraction}
+    for name in class_indices:
+        members = [image for image in images if image["label"] == name]
+        counts = {subset: sum(image["split"] == subset for image in members) for subset in SUBSETS}
+        targets = {subset: fractions[subset] * len(members) for subset in SUBSETS}
+        for image in sorted((image for image in members if image["split"] is None), key=lambda image: (image["sha256"], image["path"])):
+            if image["sha256"] in split_by_hash:  # Duplicate of an image assigned earlier in this loop
+                image["split"] = split_by_hash[image["sha256"]]
+            else:
+                image["split"] = max(SUBSETS, key=lambda subset: targets[subset] - counts[subset])
+                split_by_hash[image["sha256"]] = image["split"]
+            counts[image["split"]] += 1
+
+    digest = hashlib.sha256(json.dumps(class_indices, sort_keys=True).encode())
+    for image in images:
+        digest.update(f"{image['path']}\0{image['sha256']}\0{image['split']}\n".encode())
+
+    manifest = {
+        "directory": str(directory),
+        "fingerprint": digest.hexdigest(),
+        "fractions": fractions,
+        "class_indices": class_indices,
+        "images": images,
+    }
+    save_json(path=Path(manifest_path), data=manifest)
+
+    sizes = {subset: sum(image["split"] == subset for image in images) for subset in SUBSETS}
+    added = sum(image["path"] not in previous_by_path for image in images)
+    logger.info(f"Split manifest {manifest_path}: {sizes} ({added} new images)")
+    return manifest
+
+
+class SplitManifest:
+    """
+    Read-only view of a split manifest: image paths, labels and the indices of each subset.
+    """
+
+    def __init__(self, manifest_path):
+        """
+        Loads the manifest written by the data ingestion stage.
+
+        :param manifest_path: Path of the manifest.
+        """
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+        self.directory = manifest["directory"]
+        self.fingerprint = manifest["fingerprint"]
+        self.class_indices = manifest["class_indices"]
+        images = manifest["images"]
+        self.relative_paths = [image["path"] for image in images]
+        self.paths = [os.path.join(self.directory, path) for path in self.relative_paths]
+        self.labels = [self.class_indices[image["label"]] for image in images]
+        self._subsets = {subset: [] for subset in SUBSETS}
+        for index, image in enumerate(images):
+            self._subsets[image["split"]].append(index)
+
+    @property
+    def class_names(self) -> list:
+        """Class names in label order."""
+        return [name for name, _ in sorted(self.class_indices.items(), key=lambda item: item[1])]
+
+    def indices(self, subset: str = None) -> list:
+        """
+        Positions of a subset's images in `paths`.
+
+        :param subset: "training", "validation", "test" or None for every image.
+        :return: List of indices.
+        """
+        if subset is None:
+            return list(range(len(self.paths)))
+        return self._subsets[subset]
+
+    def subset(self, subset: str = None) -> tuple:
+        """
+        Paths and labels of a subset.
+
+        :param subset: "training", "validation", "test" or None for every image.
+        :return: Tuple of (absolute paths, integer labels).
+        """
+        indices = self.indices(subset)
+        return [self.paths[i] for i in indices], [self.labels[i] for i in indices]
+
+    def dataframe(self, subset: str = None):
+        """
+        Builds the input of `ImageDataGenerator.flow_from_dataframe` for a subset.
+
+        :param subset: "training", "validation", "test" or None for every image.
+        :return: pandas DataFrame with "filename" (relative to `directory`) and "class" columns.
+        """
+        import pandas as pd
+
+        class_names = self.class_names
+        indices = self.indices(subset)
+        return pd.DataFrame({
+            "filename": [self.relative_paths[i] for i in indices],
+            "class": [class_names[self.labels[i]] for i in indices],
+        })
+
+    def flow(self, datagenerator, subset: str = None, **kwargs):
+        """
+        Iterates over a subset with an ImageDataGenerator, in manifest order unless shuffled.
+
+        :param datagenerator: ImageDataGenerator applying the preprocessing and augmentation.
+        :param subset: "training", "validation", "test" or None for every image.
+        :param kwargs: Further `flow_from_dataframe` arguments (target_size, batch_size, shuffle, ...).
+        :return: DataFrameIterator yielding (images, one-hot labels) batches.
+        """
+        return datagenerator.flow_from_dataframe(
+            dataframe=self.dataframe(subset),
+            directory=self.directory,
+            x_col="filename",
+            y_col="class",
+            classes=self.class_names,  # Same label order as the manifest
+            class_mode="categorical",
+            validate_filenames=False,  # The manifest lists existing images only
+            **kwargs
+        )
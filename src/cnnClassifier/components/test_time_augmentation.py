@@ -0,0 +1,102 @@
+import numpy as np
+import tensorflow as tf
+
+
+class TestTimeAugmentation:
+    """
+    Builds K augmented views of each image on-graph and stacks them into a single batch,
+    so one forward pass scores every view.
+    """
+
+    # Aggregations of the per-view probabilities
+    AGGREGATIONS = ("mean", "max")
+
+    def __init__(self, shift_fraction: float, max_views: int):
+        """
+        Initializes the TestTimeAugmentation.
+
+        The views mirror the training augmentation (horizontal flips and width/height shifts
+        with nearest fill), using shifts smaller than the training range.
+
+        :param shift_fraction: Shift of the shifted views as a fraction of the image size.
+        :param max_views: Maximum number of views a request may ask for.
+        """
+        self.shift_fraction = shift_fraction
+        self.transforms = self._transforms()[:max_views]
+        self._augment = tf.function(self._augment_views)
+
+    def _transforms(self) -> list:
+        """
+        Ordered list of (horizontal flip, vertical shift, horizontal shift) view transforms.
+
+        :return: Transforms, starting with the original image; the first K are used for K views.
+        """
+        s = self.shift_fraction
+        shifts = [(0.0, s), (0.0, -s), (s, 0.0), (-s, 0.0)]
+        return (
+            [(False, 0.0, 0.0), (True, 0.0, 0.0)]
+            + [(False, dy, dx) for dy, dx in shifts]
+            + [(True, dy, dx) for dy, dx in shifts]
+        )
+
+    @property
+    def max_views(self) -> int:
+        return len(self.transforms)
+
+    @staticmethod
+    def _shift(images, shift: float, axis: int):
+        """
+        Shifts images along an axis with nearest-pixel fill, as ImageDataGenerator does.
+
+        :param images: Tensor of shape (n, height, width, channels).
+        :param shift: Shift as a fraction of the axis length (positive moves content forward).
+        :param axis: 1 for height, 2 for width.
+        :return: Shifted images.
+        """
+        length = tf.shape(images)[axis]
+        offset = tf.cast(tf.round(shift * tf.cast(length, tf.float32)), tf.int32)
+        indices = tf.clip_by_value(tf.range(length) - offset, 0, length - 1)
+        return tf.gather(images, indices, axis=axis)
+
+    def _augment_views(self, images, num_views: int):
+        """
+        Stacks the first `num_views` views of every image view-major: (num_views * n, h, w, c).
+
+        :param images: Tensor of shape (n, height, width, channels).
+        :param num_views: Number of views per image.
+        :return: Tensor with all views of all images.
+        """
+        views = []
+        for flip, dy, dx in self.transforms[:num_views]:
+            view = tf.image.flip_left_right(images) if flip else images
+            if dy:
+                view = self._shift(view, dy, axis=1)
+            if dx:
+                view = self._shift(view, dx, axis=2)
+            views.append(view)
+        return tf.concat(views, axis=0)
+
+    def predict(self, model, images: np.ndarray, num_views: int, aggregation: str = "mean") -> np.ndarray:
+        """
+        Scores K views of every image in one forward pass and aggregates them.
+
+        :param model: Keras model or TFLiteModel exposing `predict_on_batch`.
+        :param images: Preprocessed images of shape (n, height, width, channels).
+        :param num_views: Number of views per image (1 disables augmentation).
+        :param aggregation: "mean" or "max" over the views.
+        :return: Aggregated class probabilities of shape (n, classes).
+        """
+        if not 1 <= num_views <= self.max_views:
+            raise ValueError(f"num_views must be between 1 and {self.max_views}")
+        if aggregation not in self.AGGREGATIONS:
+            raise ValueError(f"aggregation must be one of {self.AGGREGATIONS}")
+
+        views = self._augment(tf.convert_to_tensor(images, dtype=tf.float32), num_views)
+        probabilities = np.asarray(model.predict_on_batch(views.numpy()))
+        probabilities = probabilities.reshape(num_views, len(images), -1)
+
+        if aggregation == "mean":
+            return probabilities.mean(axis=0)
+        # Max per class, renormalised so the result is still a distribution
+        maxima = probabilities.max(axis=0)
+        return maxima / maxima.sum(axis=1, keepdims=True)
@@ -0,0 +1,143 @@
+import os
+import threading
+from pathlib import Path
+import numpy as np
+
+
+def _interpreter_class():
+    """
+    Returns the TFLite Interpreter class, preferring the lightweight tflite_runtime package
+    so serving does not have to import the full TensorFlow runtime.
+    """
+    try:
+        from tflite_runtime.interpreter import Interpreter
+    except ImportError:
+        import tensorflow as tf
+        Interpreter = tf.lite.Interpreter
+    return Interpreter
+
+
+class TFLiteModel:
+    """
+    Wraps a TFLite interpreter behind the `predict_on_batch` interface of a Keras model,
+    so quantized models can be served by the same prediction pipeline.
+    """
+
+    # Flatbuffers read before forking serving workers, keyed by path: {path: (file stats, bytes)}
+    _preloaded = {}
+
+    def __init__(self, path: Path, num_threads: int = None):
+        """
+        Initializes the TFLiteModel by loading the flatbuffer at the given path.
+
+        :param path: Path to the .tflite model file.
+        :param num_threads: Optional number of CPU threads used by the interpreter
+                            (defaults to TF_NUM_INTRAOP_THREADS when set).
+        """
+        self.path = Path(path)
+        if num_threads is None and os.environ.get("TF_NUM_INTRAOP_THREADS"):
+            num_threads = int(os.environ["TF_NUM_INTRAOP_THREADS"])
+
+        # Build from the preloaded buffer when it is still current, so forked workers share its pages
+        Interpreter = _interpreter_class()
+        content = self._preloaded_content(self.path)
+        if content is not None:
+            self.interpreter = Interpreter(model_content=content, num_threads=num_threads)
+        else:
+            self.interpreter = Interpreter(model_path=str(self.path), num_threads=num_threads)
+        self.interpreter.allocate_tensors()
+        self._input = self.interpreter.get_input_details()[0]
+        self._output = self.interpreter.get_output_details()[0]
+        self._lock = threading.Lock()  # Interpreters are not safe to invoke concurrently
+
+    @staticmethod
+    def _file_stats(path: Path):
+        """
+        Modification time and size identifying the current contents of a model file.
+
+        :param path: Path to the .tflite model file.
+        :return: Tuple of (mtime_ns, size).
+        """
+        stat = os.stat(path)
+        return stat.st_mtime_ns, stat.st_size
+
+    @classmethod
+    def preload(cls, path: Path):
+        """
+        Reads a flatbuffer into memory in the parent process before workers are forked.
+
+        Interpreters built from this buffer read weights in place, so every forked
+        worker shares the same copy-on-write pages instead of loading its own copy.
+
+        :param path: Path to the .tflite model file.
+        """
+        path = Path(path)
+        stats = cls._file_stats(path)
+        with open(path, "rb") as f:
+            cls._preloaded[str(path)] = (stats, f.read())
+
+    @classmethod
+    def _preloaded_content(cls, path: Path):
+        """
+        Returns the preloaded flatbuffer for a path if the file has not changed since.
+
+        :param path: Path to the .tflite model file.
+        :return: Model bytes, or None if nothing current was preloaded.
+        """
+        entry = cls._preloaded.get(str(path))
+        if entry is None or entry[0] != cls._file_stats(path):
+            return None
+        return entry[1]
+
+    def _resize(self, batch_size: int):
+        """
+        Resizes the input tensor to the given batch size if needed.
+
+        :param batch_size: Number of images in the next batch.
+        """
+        if self._input["shape"][0] == batch_size:
+            return
+        shape = list(self._input["shape"])
+        shape[0] = batch_size
+        self.interpreter.resize_tensor_input(self._input["index"], shape)
+        self.interpreter.allocate_tensors()
+        self._input = self.interpreter.get_input_details()[0]
+        self._output = self.interpreter.get_output_details()[0]
+
+    def predict_on_batch(self, batch: np.ndarray) -> np.ndarray:
+        """
+        Runs the interpreter on a batch of float images, (de)quantizing integer inputs and outputs.
+
+        :param batch: Preprocessed images of shape (n, height, width, 3).
+        :return: Class probabilities of shape (n, classes) as float32.
+        """
+        batch = np.asarray(batch, dtype=np.float32)
+        with self._lock:
+            self._resize(len(batch))
+
+            # Full-integer models take quantized inputs
+            input_dtype = self._input["dtype"]
+            if input_dtype != np.float32:
+                scale, zero_point = self._input["quantization"]
+                info = np.iinfo(input_dtype)
+                batch = np.clip(np.round(batch / scale + zero_point), info.min, info.max).astype(input_dtype)
+
+            self.interpreter.set_tensor(self._input["index"], batch)
+            self.interpreter.invoke()
+            output = self.interpreter.get_tensor(self._output["index"])
+
+            # Dequantize integer outputs back to probabilities
+            if self._output["dtype"] != np.float32:
+                scale, zero_point = self._output["quantization"]
+                output = (output.astype(np.float32) - zero_point) * scale
+        return output
+
+    def predict(self, batch: np.ndarray, verbose=0) -> np.ndarray:
+        """
+        Alias of `predict_on_batch` matching the Keras `predict` signature.
+
+        :param batch: Preprocessed images of shape (n, height, width, 3).
+        :param verbose: Ignored, accepted for Keras compatibility.
+        :return: Class probabilities of shape (n, classes).
+        """
+        return self.predict_on_batch(batch)
@@ -0,0 +1,210 @@
+import os
+import re
+import json
+import random
+import pickle
+import shutil
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import tensorflow as tf
+from cnnClassifier import logger
+
+# Callback attributes that make up the state of ReduceLROnPlateau and EarlyStopping
+CALLBACK_STATE_ATTRIBUTES = ("wait", "best", "cooldown_counter", "best_epoch", "stopped_epoch")
+
+CHECKPOINT_PATTERN = re.compile(r"^epoch-(\d+)\.npz$")
+
+
+class TrainingCheckpoint(tf.keras.callbacks.Callback):
+    """
+    Checkpoints the training state at the end of epochs and restores it when `fit` resumes.
+
+    A checkpoint holds the model and optimizer weights, the learning rate, the number of
+    completed epochs, the state of the other callbacks (e.g. ReduceLROnPlateau and
+    EarlyStopping, including its best weights), the Python/NumPy/TensorFlow RNG states and
+    the metrics history. The state is copied on the training thread and written by a
+    background thread, so the next epoch starts while the file is being written.
+
+    Must be the last callback passed to `fit`: the other callbacks reset their state in
+    `on_train_begin`, and this callback restores it afterwards.
+    """
+
+    def __init__(self, checkpoint_dir: Path, callbacks: list, signature: dict, every: int = 1, keep: int = 3):
+        """
+        Initializes the TrainingCheckpoint and loads the latest valid checkpoint, if any.
+
+        :param checkpoint_dir: Directory of the checkpoint files.
+        :param callbacks: Callbacks whose state is saved and restored.
+        :param signature: Training settings a checkpoint must match to be resumed from.
+        :param every: Epochs between checkpoints.
+        :param keep: Number of most recent checkpoints kept on disk.
+        """
+        super().__init__()
+        self.checkpoint_dir = Path(checkpoint_dir)
+        self.callbacks = callbacks
+        self.signature = json.loads(json.dumps(signature))  # Normalise tuples to lists, as read back from JSON
+        self.every = max(1, int(every))
+        self.keep = max(1, int(keep))
+        self.history = {}
+        self._writer = None
+        self._pending = None
+
+        os.makedirs(self.checkpoint_dir, exist_ok=True)
+        for name in os.listdir(self.checkpoint_dir):
+            if name.endswith(".tmp.npz"):  # Left behind by a run killed while writing
+                os.remove(self.checkpoint_dir / name)
+        self._restored = self._load_latest()
+
+    @property
+    def initial_epoch(self) -> int:
+        """Number of epochs completed by the checkpoint being resumed (0 when starting fresh)."""
+        return self._restored["state"]["epoch"] if self._restored else 0
+
+    @property
+    def stopped(self) -> bool:
+        """Whether the resumed run had already been stopped early."""
+        return bool(self._restored and self._restored["state"]["stopped"])
+
+    def _paths(self) -> list:
+        """
+        Lists checkpoint files, newest first.
+        """
+        matches = [(CHECKPOINT_PATTERN.match(name), name) for name in os.listdir(self.checkpoint_dir)]
+        return [
+            self.checkpoint_dir / name
+            for match, name in sorted(((m, n) for m, n in matches if m), key=lambda item: -int(item[0].group(1)))
+        ]
+
+    def _load_latest(self):
+        """
+        Reads the newest checkpoint that loads completely and matches the signature.
+        """
+        for path in self._paths():
+            try:
+                with np.load(path) as data:
+                    checkpoint = {key: data[key] for key in data.files}
+                state = json.loads(checkpoint["state"].tobytes().decode())
+            except Exception as e:
+                logger.warning(f"Skipping unreadable checkpoint {path}: {e}")
+                continue
+
+            if state["signature"] != self.signature:
+                logger.warning(f"Checkpoints in {self.checkpoint_dir} belong to other training settings; starting fresh")
+                self.clear()
+                return None
+
+            logger.info(f"Resuming training from {path} (epoch {state['epoch']})")
+            return {"path": path, "state": state, "arrays": checkpoint}
+        return None
+
+    @staticmethod
+    def _arrays(checkpoint: dict, prefix: str, count: int) -> list:
+        return [checkpoint[f"{prefix}_{i}"] for i in range(count)]
+
+    def on_train_begin(self, logs=None):
+        if self._restored is None:
+            return
+        state, arrays = self._restored["state"], self._restored["arrays"]
+
+        self.model.set_weights(self._arrays(arrays, "weights", state["num_weights"]))
+
+        # Optimizer slots are created on the first step; create them now so they can be set
+        optimizer = self.model.optimizer
+        if state["num_optimizer_weights"]:
+            if hasattr(optimizer, "_create_all_weights"):
+                optimizer._create_all_weights(self.model.trainable_variables)
+            optimizer.set_weights(self._arrays(arrays, "optimizer", state["num_optimizer_weights"]))
+        tf.keras.backend.set_value(optimizer.lr, state["learning_rate"])
+
+        for callback, saved in zip(self.callbacks, state["callbacks"]):
+            for name, value in saved.items():
+                setattr(callback, name, value)
+            if hasattr(callback, "best_weights") and state["num_best_weights"]:
+                callback.best_weights = self._arrays(arrays, "best_weights", state["num_best_weights"])
+
+        python_state, numpy_state = pickle.loads(arrays["rng"].tobytes())
+        random.setstate(python_state)
+        np.random.set_state(numpy_state)
+        tf.random.get_global_generator().reset(arrays["tf_rng"])
+
+        self.history = state["history"]
+        self._restored["arrays"] = None  # Release the restored copies
+
+    def on_epoch_end(self, epoch, logs=None):
+        for name, value in (logs or {}).items():
+            self.history.setdefault(name, []).append(float(value))
+
+        completed = epoch + 1
+        if completed % self.every and not self.model.stop_training:
+            return
+
+        # Copy everything on the training thread so the background write sees a consistent state
+        optimizer = self.model.optimizer
+        weights = self.model.get_weights()
+        optimizer_weights = optimizer.get_weights()
+        best_weights = next(
+            (callback.best_weights for callback in self.callbacks if getattr(callback, "best_weights", None) is not None),
+            []
+        )
+        callback_states = [
+            {
+                name: float(getattr(callback, name)) if name == "best" else int(getattr(callback, name))
+                for name in CALLBACK_STATE_ATTRIBUTES if hasattr(callback, name)
+            }
+            for callback in self.callbacks
+        ]
+        state = {
+            "signature": self.signature,
+            "epoch": completed,
+            "stopped": bool(self.model.stop_training),
+            "learning_rate": float(tf.keras.backend.get_value(optimizer.lr)),
+            "num_weights": len(weights),
+            "num_optimizer_weights": len(optimizer_weights),
+            "num_best_weights": len(best_weights),
+            "callbacks": callback_states,
+            "history": {name: list(values) for name, values in self.history.items()},
+        }
+        arrays = {
+            "state": np.frombuffer(json.dumps(state).encode(), dtype=np.uint8),
+            "rng": np.frombuffer(pickle.dumps((random.getstate(), np.random.get_state())), dtype=np.uint8),
+            "tf_rng": tf.random.get_global_generator().state.numpy(),
+        }
+        for prefix, values in (("weights", weights), ("optimizer", optimizer_weights), ("best_weights", best_weights)):
+            arrays.update({f"{prefix}_{i}": np.array(value, copy=True) for i, value in enumerate(values)})
+
+        # At most one write in flight; waiting here only happens if a write outlasts an epoch
+        if self._pending is not None:
+            self._pending.result()
+        if self._writer is None:
+            self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="checkpoint")
+        self._pending = self._writer.submit(self._write, completed, arrays)
+
+    def _write(self, epoch: int, arrays: dict):
+        """
+        Writes a checkpoint atomically, then deletes all but the `keep` newest ones.
+        """
+        path = self.checkpoint_dir / f"epoch-{epoch:04d}.npz"
+        tmp_path = self.checkpoint_dir / f"epoch-{epoch:04d}.tmp.npz"
+        with open(tmp_path, "wb") as f:
+            np.savez(f, **arrays)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)  # A partially written file is never mistaken for a checkpoint
+
+        for old in self._paths()[self.keep:]:
+            old.unlink(missing_ok=True)
+
+    def on_train_end(self, logs=None):
+        if self._writer is not None:
+            if self._pending is not None:
+                self._pending.result()
+            self._writer.shutdown()
+            self._writer, self._pending = None, None
+
+    def clear(self):
+        """
+        Deletes all checkpoints, e.g. once the trained model has been saved.
+        """
+        shutil.rmtree(self.checkpoint_dir, ignore_errors=True)
+        os.makedirs(self.checkpoint_dir, exist_ok=True)
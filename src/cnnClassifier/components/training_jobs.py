@@ -0,0 +1,251 @@
+import os
+import time
+import uuid
+import fcntl
+import shlex
+import threading
+import subprocess
+from pathlib import Path
+from cnnClassifier import logger
+from cnnClassifier.entity.config_entity import TrainingJobConfig
+from cnnClassifier.utils.common import save_json, load_json
+from cnnClassifier.utils.runtime import thread_limit_env, available_cpus
+
+
+class TrainingJobAlreadyRunning(RuntimeError):
+    """
+    Raised when a training job is submitted while another one is still running.
+    """
+
+    def __init__(self, job: dict):
+        super().__init__(f"Training job {job.get('job_id')} is already running")
+        self.job = job
+
+
+class TrainingJobRunner:
+    """
+    Runs the training pipeline as a background process with CPU and thread limits,
+    allowing at most one training job at a time.
+    """
+
+    def __init__(self, config: TrainingJobConfig):
+        """
+        Initializes the TrainingJobRunner with the provided configuration.
+
+        :param config: TrainingJobConfig object containing the command and resource limits.
+        """
+        self.config = config
+        self._lock = threading.Lock()
+        os.makedirs(self.config.root_dir, exist_ok=True)
+
+    def _status_path(self, job_id: str) -> Path:
+        """
+        Path of the JSON status file of a job.
+
+        :param job_id: Identifier of the job.
+        :return: Path to the status file.
+        """
+        return Path(self.config.root_dir) / f"{job_id}.json"
+
+    def _save(self, job: dict):
+        """
+        Persists the job status so any serving process can report it.
+
+        :param job: Job status dictionary.
+        """
+        save_json(path=self._status_path(job["job_id"]), data=job)
+
+    def _training_cpus(self) -> list:
+        """
+        CPUs assigned to the training process, taken from the end of the available set
+        so the lower cores stay free for inference.
+
+        :return: List of CPU ids.
+        """
+        cpus = available_cpus()
+        num_threads = self.config.cpu_threads or max(1, len(cpus) // 2)
+        return cpus[-num_threads:]
+
+    def _limit_resources(self, cpus: list):
+        """
+        Runs in the child process before exec: lowers its priority and pins it to its CPUs.
+
+        :param cpus: CPU ids the training process may run on.
+        """
+        os.nice(self.config.nice)
+        if hasattr(os, "sched_setaffinity"):
+            os.sched_setaffinity(0, cpus)
+
+    def _acquire_lock(self):
+        """
+        Takes the cross-process training lock without blocking.
+
+        :return: File descriptor holding the lock, or None if another job holds it.
+        """
+        fd = os.open(Path(self.config.root_dir) / "train.lock", os.O_RDWR | os.O_CREAT)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return None
+        return fd
+
+    @staticmethod
+    def _process_start_time(pid: int):
+        """
+        Start time of a process in clock ticks since boot, which tells a reused pid apart.
+
+        :param pid: Process id.
+        :return: Start time, or None if the process does not exist or /proc is unavailable.
+        """
+        try:
+            with open(f"/proc/{pid}/stat") as f:
+                return int(f.read().rsplit(")", 1)[1].split()[19])
+        except (OSError, IndexError, ValueError):
+            return None
+
+    def _process_alive(self, job: dict) -> bool:
+        """
+        Checks whether the training process of a job is still running.
+
+        :param job: Job status dictionary with the `pid` and `pid_start_time` recorded at submission.
+        :return: True if the process (and not a later one reusing its pid) is alive.
+        """
+        pid = job.get("pid")
+        if not pid:
+            return False
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            pass  # Exists, owned by another user
+        started = job.get("pid_start_time")
+        return started is None or self._process_start_time(pid) in (None, started)
+
+    def _reconcile(self, job: dict) -> dict:
+        """
+        Marks a job as failed if its process is gone but it is still recorded as running.
+
+        Only the submitting serving process waits for the child; if that process restarted or
+        crashed (e.g. a recycled pre-fork worker), nobody recorded the outcome. `_wait` saves the
+        outcome before reaping the child, so once the process is gone the status file is re-read
+        and a job is only marked as failed if it is still recorded as running.
+
+        :param job: Job status dictionary read from its status file.
+        :return: The job status, updated if it was stale.
+        """
+        if job.get("status") in ("queued", "running") and not self._process_alive(job):
+            path = self._status_path(job["job_id"])
+            if path.exists():
+                job = dict(load_json(path))
+            if job.get("status") not in ("queued", "running"):
+                return job  # The outcome was recorded after the status was first read
+            job.update({
+                "status": "failed",
+                "finished_at": time.time(),
+                "error": "The training process exited without its outcome being recorded",
+            })
+            self._save(job)
+            logger.warning(f"Training job {job['job_id']} (pid {job.get('pid')}) is no longer running; marked as failed")
+        return job
+
+    def _running_job(self) -> dict:
+        """
+        Finds the most recent job still marked as running.
+
+        :return: Job status dictionary, or an empty placeholder if it cannot be found.
+        """
+        jobs = sorted(Path(self.config.root_dir).glob("*.json"), key=os.path.getmtime, reverse=True)
+        for path in jobs:
+            job = self._reconcile(dict(load_json(path)))
+            if job.get("status") in ("queued", "running"):
+                return job
+        return {"job_id": None, "status": "running"}
+
+    def submit(self) -> dict:
+        """
+        Starts a training job in the background.
+
+        :return: Status dictionary of the new job.
+        :raises TrainingJobAlreadyRunning: If another training job is still running.
+        """
+        with self._lock:
+            lock_fd = self._acquire_lock()
+            if lock_fd is None:
+                raise TrainingJobAlreadyRunning(self._running_job())
+
+            job_id = uuid.uuid4().hex[:12]
+            cpus = self._training_cpus()
+            job = {
+                "job_id": job_id,
+                "status": "running",
+                "command": self.config.command,
+                "cpus": cpus,
+                "submitted_at": time.time(),
+                "finished_at": None,
+                "returncode": None,
+                "log_path": str(Path(self.config.root_dir) / f"{job_id}.log"),
+            }
+
+            try:
+                env = dict(os.environ, **thread_limit_env(len(cpus)))
+                with open(job["log_path"], "wb") as log_file:
+                    # The child inherits the lock descriptor, so the lock lives exactly as long as the job
+                    process = subprocess.Popen(
+                        shlex.split(self.config.command),
+                        stdout=log_file,
+                        stderr=subprocess.STDOUT,
+                        env=env,
+                        pass_fds=(lock_fd,),
+                        preexec_fn=lambda: self._limit_resources(cpus),
+                    )
+            except Exception:
+                os.close(lock_fd)
+                raise
+            os.close(lock_fd)
+
+            job.update({"pid": process.pid, "pid_start_time": self._process_start_time(process.pid)})
+            self._save(job)
+            logger.info(f"Started training job {job_id} (pid {process.pid}) on CPUs {cpus}")
+
+        threading.Thread(target=self._wait, args=(job, process), name=f"training-job-{job_id}", daemon=True).start()
+        return job
+
+    def _wait(self, job: dict, process: subprocess.Popen):
+        """
+        Waits for a training process to exit and records its outcome.
+
+        The outcome is saved while the exited child is still unreaped (its pid stays valid), so
+        `_reconcile` in any serving process never sees the process gone before its outcome.
+
+        :param job: Status dictionary of the job.
+        :param process: The running training process.
+        """
+        if hasattr(os, "waitid"):
+            info = os.waitid(os.P_PID, process.pid, os.WEXITED | os.WNOWAIT)
+            returncode = info.si_status if info.si_code == os.CLD_EXITED else -info.si_status
+        else:
+            returncode = process.wait()
+        job.update({
+            "status": "succeeded" if returncode == 0 else "failed",
+            "returncode": returncode,
+            "finished_at": time.time(),
+        })
+        self._save(job)
+        process.wait()  # Reap the child only now that its outcome is on disk
+        logger.info(f"Training job {job['job_id']} {job['status']} (exit code {returncode})")
+
+    def status(self, job_id: str) -> dict:
+        """
+        Returns the status of a job submitted by any serving process.
+
+        :param job_id: Identifier of the job.
+        :return: Job status dictionary, or None if the job is unknown.
+        """
+        if not job_id.isalnum():
+            return None
+        path = self._status_path(job_id)
+        if not path.exists():
+            return None
+        return self._reconcile(dict(load_json(path)))
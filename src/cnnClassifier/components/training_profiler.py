@@ -0,0 +1,144 @@
+import time
+import resource
+from pathlib import Path
+import numpy as np
+import tensorflow as tf
+from cnnClassifier import logger
+from cnnClassifier.utils.common import save_json
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process so far, in MiB (ru_maxrss is in KiB on Linux)."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+class TrainingProfiler(tf.keras.callbacks.Callback):
+    """
+    Measures where training time goes: waiting for the input pipeline or computing the step.
+
+    While attached, the model's train function is replaced by one that fetches each batch
+    eagerly (the time blocked on the input pipeline) and then runs the compiled train step
+    and waits for its result (the compute time). Per-step and per-epoch images/sec, the
+    input-stall ratio and the peak RSS are written to a JSON file after every epoch.
+    Optionally a TensorBoard profiler trace is captured for a window of steps.
+    """
+
+    def __init__(self, output_path: Path, trace_dir: Path = None, trace_steps: list = None):
+        """
+        Initializes the TrainingProfiler.
+
+        :param output_path: Path of the JSON summary.
+        :param trace_dir: Directory of the TensorBoard profiler trace.
+        :param trace_steps: [first, last) global steps to trace; empty or None disables tracing.
+        :raises ValueError: If `trace_steps` is not [start, stop] with 0 < start < stop.
+        """
+        super().__init__()
+        self.output_path = Path(output_path)
+        self.trace_dir = trace_dir
+        self.trace_steps = [int(step) for step in trace_steps or []]
+        if self.trace_steps and not (len(self.trace_steps) == 2 and 0 < self.trace_steps[0] < self.trace_steps[1]):
+            raise ValueError(f"PROFILE_TRACE_STEPS must be [start, stop] with 0 < start < stop, got {list(trace_steps)}")
+        self.epochs = []
+        self._step = 0
+        self._tracing = False
+
+    def set_model(self, model):
+        super().set_model(model)
+        # `fit` calls make_train_function after handing the model to its callbacks
+        model.make_train_function = self._make_train_function
+
+    def _make_train_function(self, force=False):
+        model = self.model
+        train_step = tf.function(model.train_step, reduce_retracing=True)
+
+        def train_function(iterator):
+            start = time.perf_counter()
+            data = next(iterator)
+            fetched = time.perf_counter()
+            outputs = tf.nest.map_structure(lambda t: t.numpy(), train_step(data))  # Waits for the step
+            done = time.perf_counter()
+
+            images = int(tf.nest.flatten(data)[0].shape[0])
+            self._steps.append((fetched - start, done - fetched, images))
+            return outputs
+
+        model.train_function = train_function
+        return train_function
+
+    def on_train_begin(self, logs=None):
+        self._steps = []
+
+    def on_epoch_begin(self, epoch, logs=None):
+        self._steps = []
+        self._epoch_start = time.perf_counter()
+
+    def on_train_batch_begin(self, batch, logs=None):
+        if self.trace_steps and self._step == self.trace_steps[0]:
+            tf.profiler.experimental.start(str(self.trace_dir))
+            self._tracing = True
+
+    def on_train_batch_end(self, batch, logs=None):
+        self._step += 1
+        if self._tracing and self._step >= self.trace_steps[1]:
+            tf.profiler.experimental.stop()
+            self._tracing = False
+            logger.info(f"Saved a profiler trace of steps {self.trace_steps[0]}-{self.trace_steps[1]} to {self.trace_dir}")
+
+    def on_epoch_end(self, epoch, logs=None):
+        if not self._steps:
+            return
+        stall, compute, images = (np.asarray(column, dtype=np.float64) for column in zip(*self._steps))
+        step_time = stall + compute
+        step_images_per_s = images / step_time
+        self.epochs.append({
+            "epoch": epoch + 1,
+            "steps": len(self._steps),
+            "images": int(images.sum()),
+            # Wall time includes validation and callbacks; training time only the steps
+            "wall_time_s": time.perf_counter() - self._epoch_start,
+            "training_time_s": float(step_time.sum()),
+            "images_per_s": float(images.sum() / step_time.sum()),
+            "input_stall_s": float(stall.sum()),
+            "compute_s": float(compute.sum()),
+            "input_stall_ratio": float(stall.sum() / step_time.sum()),
+            "step_images_per_s": {
+                "p5": float(np.percentile(step_images_per_s, 5)),
+                "p50": float(np.percentile(step_images_per_s, 50)),
+                "p95": float(np.percentile(step_images_per_s, 95)),
+            },
+            "peak_rss_mb": peak_rss_mb(),
+            # Per step: [input stall ms, compute ms, images]
+            "step_times": [[round(s * 1000, 3), round(c * 1000, 3), int(n)] for s, c, n in self._steps],
+        })
+        self._save()
+
+    def on_train_end(self, logs=None):
+        if self._tracing:
+            tf.profiler.experimental.stop()
+            self._tracing = False
+        # Hand the model back to Keras' own train function
+        self.model.__dict__.pop("make_train_function", None)
+        self.model.train_function = None
+        self._save()
+
+    def summary(self) -> dict:
+        """
+        Summarizes the run over every profiled epoch.
+
+        :return: Totals and per-epoch measurements.
+        """
+        training_time = sum(epoch["training_time_s"] for epoch in self.epochs)
+        images = sum(epoch["images"] for epoch in self.epochs)
+        stall = sum(epoch["input_stall_s"] for epoch in self.epochs)
+        return {
+            "epochs_profiled": len(self.epochs),
+            "images": images,
+            "images_per_s": images / training_time if training_time else 0.0,
+            "input_stall_ratio": stall / training_time if training_time else 0.0,
+            "peak_rss_mb": peak_rss_mb(),
+            "trace_dir": str(self.trace_dir) if self.trace_steps else None,
+            "epochs": self.epochs,
+        }
+
+    def _save(self):
+        save_json(path=self.output_path, data=self.summary())
@@ -1,4 +1,3 @@
-import os
 from pathlib import Path
 from cnnClassifier.constants import CONFIG_FILE_PATH, PARAMS_FILE_PATH
 from cnnClassifier.utils.common import read_yaml, create_directories, save_json
@@ -7,6 +6,15 @@ from cnnClassifier.entity.config_entity import (
     PrepareBaseModelConfig,
     TrainingConfig,
     EvaluationConfig,
+    DatasetCacheConfig,
+    HyperparameterSweepConfig,
+    RuntimeTuningConfig,
+    TrainingJobConfig,
+    ModelQuantizationConfig,
+    EmbeddingExtractionConfig,
+    SimilaritySearchConfig,
+    PredictionConfig,
+    ServingConfig,
 )
 
 
@@ -48,6 +56,10 @@ class ConfigurationManager:
             source_URL=config.source_URL,
             local_data_file=config.local_data_file,
             unzip_dir=config.unzip_dir,
+            dataset_dir=Path(config.dataset_dir),
+            split_manifest_path=Path(config.split_manifest_path),
+            params_validation_fraction=self.params.VALIDATION_FRACTION,
+            params_test_fraction=self.params.TEST_FRACTION,
         )
 
         return data_ingestion_config
@@ -90,11 +102,6 @@ class ConfigurationManager:
         prepare_base_model = self.config.prepare_base_model
         params = self.params
 
-        # Path to the training data
-        training_data = os.path.join(
-            self.config.data_ingestion.unzip_dir, "CT-KIDNEY-DATASET-Normal-Cyst-Tumor-Stone"
-        )
-
         # Ensure the root directory for training exists
         create_directories([Path(training.root_dir)])
 
@@ -102,12 +109,29 @@ class ConfigurationManager:
         training_config = TrainingConfig(
             root_dir=Path(training.root_dir),
             trained_model_path=Path(training.trained_model_path),
+            class_indices_path=Path(training.class_indices_path),
             updated_base_model_path=Path(prepare_base_model.updated_base_model_path),
-            training_data=Path(training_data),
+            split_manifest_path=Path(self.config.data_ingestion.split_manifest_path),
+            dataset_cache_index=Path(self.config.dataset_cache.index_path),
             params_epochs=params.EPOCHS,
             params_batch_size=params.BATCH_SIZE,
             params_is_augmentation=params.AUGMENTATION,
             params_image_size=params.IMAGE_SIZE,
+            params_data_loader=params.DATA_LOADER,
+            bottleneck_dir=Path(training.bottleneck_dir),
+            params_bottleneck_training=params.BOTTLENECK_TRAINING,
+            params_bottleneck_variants=params.BOTTLENECK_VARIANTS,
+            checkpoint_dir=Path(training.checkpoint_dir),
+            params_checkpoint_every=params.CHECKPOINT_EVERY,
+            params_checkpoint_keep=params.CHECKPOINT_KEEP,
+            worker_log_dir=Path(training.worker_log_dir),
+            distributed_base_port=training.distributed_base_port,
+            params_distributed_workers=params.DISTRIBUTED_WORKERS,
+            training_profile_path=Path(training.training_profile_path),
+            profile_trace_dir=Path(training.profile_trace_dir),
+            params_profile_training=params.PROFILE_TRAINING,
+            params_profile_trace_steps=list(params.PROFILE_TRACE_STEPS),
+            runtime_profile_path=Path(self.config.runtime_tuning.profile_path),
         )
 
         return training_config
@@ -122,10 +146,261 @@ class ConfigurationManager:
         # Create and return the EvaluationConfig object
         eval_config = EvaluationConfig(
             path_of_model="artifacts/training/model.h5",
-            training_data="artifacts/data_ingestion/CT-KIDNEY-DATASET-Normal-Cyst-Tumor-Stone",
+            split_manifest_path=Path(self.config.data_ingestion.split_manifest_path),
+            dataset_cache_index=Path(self.config.dataset_cache.index_path),
             mlflow_uri="https://dagshub.com/om.mallick02/Kidney-Disease-Classification-Tensorflow.mlflow",
             all_params=self.params,
             params_image_size=self.params.IMAGE_SIZE,
             params_batch_size=self.params.BATCH_SIZE,
+            params_data_loader=self.params.DATA_LOADER,
         )
         return eval_config
+
+    def get_dataset_cache_config(self) -> DatasetCacheConfig:
+        """
+        Get the Dataset Cache configuration.
+
+        Returns:
+            DatasetCacheConfig: Configuration for caching the preprocessed dataset.
+        """
+        config = self.config.dataset_cache
+
+        # Ensure the root directory for the cache exists
+        create_directories([config.root_dir])
+
+        # Create and return the DatasetCacheConfig object
+        dataset_cache_config = DatasetCacheConfig(
+            root_dir=Path(config.root_dir),
+            index_path=Path(config.index_path),
+            split_manifest_path=Path(self.config.data_ingestion.split_manifest_path),
+            params_image_size=self.params.IMAGE_SIZE,
+        )
+
+        return dataset_cache_config
+
+    def get_hyperparameter_sweep_config(self) -> HyperparameterSweepConfig:
+        """
+        Get the Hyperparameter Sweep configuration.
+
+        Returns:
+            HyperparameterSweepConfig: Configuration for the hyperparameter sweep runner.
+        """
+        config = self.config.hyperparameter_sweep
+
+        # Ensure the root directory for the trials exists
+        create_directories([config.root_dir])
+
+        # Create and return the HyperparameterSweepConfig object
+        hyperparameter_sweep_config = HyperparameterSweepConfig(
+            root_dir=Path(config.root_dir),
+            results_path=Path(config.results_path),
+            parallel_trials=config.parallel_trials,
+            num_trials=config.num_trials,
+            min_epochs=config.min_epochs,
+            eta=config.eta,
+            seed=config.seed,
+            search_space=config.search_space.to_dict(),
+            params_epochs=self.params.EPOCHS,
+        )
+
+        return hyperparameter_sweep_config
+
+    def get_runtime_tuning_config(self) -> RuntimeTuningConfig:
+        """
+        Get the Runtime Tuning configuration.
+
+        Returns:
+            RuntimeTuningConfig: Configuration for the CPU runtime autotuner.
+        """
+        config = self.config.runtime_tuning
+
+        # Ensure the root directory for tuning artifacts exists
+        create_directories([config.root_dir])
+
+        # Create and return the RuntimeTuningConfig object
+        runtime_tuning_config = RuntimeTuningConfig(
+            root_dir=Path(config.root_dir),
+            profile_path=Path(config.profile_path),
+            workloads=list(config.workloads),
+            intra_op_threads=[int(threads) for threads in config.intra_op_threads],
+            inter_op_threads=[int(threads) for threads in config.inter_op_threads],
+            batch_sizes=[int(batch_size) for batch_size in config.batch_sizes],
+            onednn=[bool(enabled) for enabled in config.onednn],
+            warmup_steps=int(config.warmup_steps),
+            steps=int(config.steps),
+        )
+
+        return runtime_tuning_config
+
+    def get_training_job_config(self) -> TrainingJobConfig:
+        """
+        Get the background Training Job configuration.
+
+        Returns:
+            TrainingJobConfig: Configuration for running training as a background job.
+        """
+        config = self.config.training_jobs
+
+        # Ensure the directory for job status files exists
+        create_directories([config.root_dir])
+
+        # Create and return the TrainingJobConfig object
+        training_job_config = TrainingJobConfig(
+            root_dir=Path(config.root_dir),
+            command=config.command,
+            cpu_threads=int(config.cpu_threads),
+            nice=int(config.nice),
+        )
+
+        return training_job_config
+
+    def get_model_quantization_config(self) -> ModelQuantizationConfig:
+        """
+        Get the Model Quantization configuration.
+
+        Returns:
+            ModelQuantizationConfig: Configuration for exporting quantized TFLite models.
+        """
+        config = self.config.model_quantization
+
+        # Ensure the root directory for quantized models exists
+        create_directories([config.root_dir])
+
+        # Create and return the ModelQuantizationConfig object
+        model_quantization_config = ModelQuantizationConfig(
+            root_dir=Path(config.root_dir),
+            path_of_model=Path(self.config.training.trained_model_path),
+            split_manifest_path=Path(self.config.data_ingestion.split_manifest_path),
+            dynamic_range_model_path=Path(config.dynamic_range_model_path),
+            int8_model_path=Path(config.int8_model_path),
+            report_path=Path(config.report_path),
+            params_image_size=self.params.IMAGE_SIZE,
+            params_batch_size=self.params.BATCH_SIZE,
+            params_calibration_samples=self.params.CALIBRATION_SAMPLES,
+            params_eval_samples=self.params.QUANTIZATION_EVAL_SAMPLES,
+        )
+
+        return model_quantization_config
+
+    def get_embedding_extraction_config(self) -> EmbeddingExtractionConfig:
+        """
+        Get the Embedding Extraction configuration.
+
+        Returns:
+            EmbeddingExtractionConfig: Configuration for extracting backbone embeddings.
+        """
+        config = self.config.embeddings
+
+        # Ensure the root directory for embedding artifacts exists
+        create_directories([config.root_dir])
+
+        # Create and return the EmbeddingExtractionConfig object
+        embedding_extraction_config = EmbeddingExtractionConfig(
+            root_dir=Path(config.root_dir),
+            base_model_path=Path(self.config.prepare_base_model.base_model_path),
+            split_manifest_path=Path(self.config.data_ingestion.split_manifest_path),
+            embeddings_path=Path(config.embeddings_path),
+            metadata_path=Path(config.metadata_path),
+            ivf_index_path=Path(config.ivf_index_path),
+            params_image_size=self.params.IMAGE_SIZE,
+            params_batch_size=self.params.BATCH_SIZE,
+            params_ivf_lists=self.params.IVF_LISTS,
+        )
+
+        return embedding_extraction_config
+
+    def get_similarity_search_config(self) -> SimilaritySearchConfig:
+        """
+        Get the Similarity Search configuration.
+
+        Returns:
+            SimilaritySearchConfig: Configuration for the similar-case search.
+        """
+        config = self.config.embeddings
+
+        # Create and return the SimilaritySearchConfig object
+        similarity_search_config = SimilaritySearchConfig(
+            base_model_path=Path(self.config.prepare_base_model.base_model_path),
+            embeddings_path=Path(config.embeddings_path),
+            metadata_path=Path(config.metadata_path),
+            ivf_index_path=Path(config.ivf_index_path),
+            top_k=int(config.top_k),
+            max_k=int(config.max_k),
+            nprobe=int(config.nprobe),
+        )
+
+        return similarity_search_config
+
+    def get_prediction_config(self) -> PredictionConfig:
+        """
+        Get the Prediction configuration.
+
+        Returns:
+            PredictionConfig: Configuration for serving predictions.
+        """
+        config = self.config.prediction
+
+        # Resolve the artifact served by the selected backend
+        model_paths = {
+            "keras": Path(config.model_path),
+            "tflite_dynamic_range": Path(self.config.model_quantization.dynamic_range_model_path),
+            "tflite_int8": Path(self.config.model_quantization.int8_model_path),
+        }
+        if config.backend not in model_paths:
+            raise ValueError(f"Unknown prediction backend: {config.backend}")
+        model_path = model_paths[config.backend]
+
+        # The version file belongs to the Keras model; TFLite artifacts use their own (or a content hash)
+        model_version_file = Path(config.model_version_file)
+        if config.backend != "keras":
+            model_version_file = model_path.with_suffix(".version")
+
+        # Create and return the PredictionConfig object
+        prediction_config = PredictionConfig(
+            backend=config.backend,
+            model_path=model_path,
+            model_version_file=model_version_file,
+            class_indices_path=Path(config.class_indices_path),
+            reload_interval=float(config.reload_interval),
+            preload=config.preload,
+            warmup_batch_sizes=list(config.warmup_batch_sizes),
+            warmup_iterations=int(config.warmup_iterations),
+            batching=config.batching,
+            max_batch_size=int(config.max_batch_size),
+            max_wait_ms=float(config.max_wait_ms),
+            max_pending_requests=int(config.max_pending_requests),
+            default_deadline_ms=float(config.default_deadline_ms),
+            cache_enabled=config.cache_enabled,
+            cache_max_entries=int(config.cache_max_entries),
+            cache_ttl_seconds=float(config.cache_ttl_seconds),
+            cache_dir=Path(config.cache_dir) if config.cache_dir else None,
+            cache_disk_max_entries=int(config.cache_disk_max_entries),
+            cache_disk_sweep_interval=float(config.cache_disk_sweep_interval),
+            tta_views=int(config.tta_views),
+            tta_max_views=int(config.tta_max_views),
+            tta_shift_fraction=float(config.tta_shift_fraction),
+            tta_aggregation=config.tta_aggregation,
+            runtime_profile_path=Path(self.config.runtime_tuning.profile_path),
+            params_image_size=self.params.IMAGE_SIZE,
+        )
+
+        return prediction_config
+
+    def get_serving_config(self) -> ServingConfig:
+        """
+        Get the Serving configuration.
+
+        Returns:
+            ServingConfig: Configuration for the web server.
+        """
+        config = self.config.serving
+
+        # Create and return the ServingConfig object
+        serving_config = ServingConfig(
+            host=config.host,
+            port=int(config.port),
+            workers=int(config.workers),
+            threads_per_worker=int(config.threads_per_worker),
+        )
+
+        return serving_config
@@ -11,11 +11,19 @@ class DataIngestionConfig:
         source_URL (str): URL to download the source data.
         local_data_file (Path): Path to the local data file.
         unzip_dir (Path): Directory where the downloaded data will be unzipped.
+        dataset_dir (Path): Class-per-subdirectory dataset inside `unzip_dir`.
+        split_manifest_path (Path): Path to save the manifest of images, hashes and splits.
+        params_validation_fraction (float): Share of each class in the validation subset.
+        params_test_fraction (float): Share of each class in the test subset.
     """
     root_dir: Path
     source_URL: str
     local_data_file: Path
     unzip_dir: Path
+    dataset_dir: Path
+    split_manifest_path: Path
+    params_validation_fraction: float
+    params_test_fraction: float
 
 # Configuration for preparing the base model
 @dataclass(frozen=True)
@@ -51,21 +59,55 @@ class TrainingConfig:
     Attributes:
         root_dir (Path): Root directory for training outputs.
         trained_model_path (Path): Path to save the trained model.
+        class_indices_path (Path): Path to save the class-name to index mapping.
         updated_base_model_path (Path): Path to the updated base model.
-        training_data (Path): Path to the training dataset.
+        split_manifest_path (Path): Split manifest of the ingested dataset.
+        dataset_cache_index (Path): Index of the preprocessed dataset cache read by the tf.data loader.
         params_epochs (int): Number of training epochs.
         params_batch_size (int): Batch size for training.
         params_is_augmentation (bool): Whether to apply data augmentation.
         params_image_size (list): Input image size for training.
+        params_data_loader (str): Input pipeline, "tf_data" or "image_data_generator".
+        bottleneck_dir (Path): Directory of the cached backbone outputs.
+        params_bottleneck_training (bool): Whether to train only the head on cached backbone outputs.
+        params_bottleneck_variants (int): Fixed augmented variants cached per training image.
+        checkpoint_dir (Path): Directory of the resumable training checkpoints.
+        params_checkpoint_every (int): Epochs between checkpoints.
+        params_checkpoint_keep (int): Number of most recent checkpoints kept.
+        worker_log_dir (Path): Directory of the logs of locally launched training workers.
+        distributed_base_port (int): Port of the first locally launched training worker.
+        params_distributed_workers (int): Training worker processes (1 trains in a single process).
+        training_profile_path (Path): Path to save the training throughput profile.
+        profile_trace_dir (Path): Directory of the TensorBoard profiler trace.
+        params_profile_training (bool): Whether to profile training throughput.
+        params_profile_trace_steps (list): [first, last) training steps to trace (empty disables tracing).
+        runtime_profile_path (Path): Thread and oneDNN settings tuned for this host (applied when present).
     """
     root_dir: Path
     trained_model_path: Path
+    class_indices_path: Path
     updated_base_model_path: Path
-    training_data: Path
+    split_manifest_path: Path
+    dataset_cache_index: Path
     params_epochs: int
     params_batch_size: int
     params_is_augmentation: bool
     params_image_size: list
+    params_data_loader: str
+    bottleneck_dir: Path
+    params_bottleneck_training: bool
+    params_bottleneck_variants: int
+    checkpoint_dir: Path
+    params_checkpoint_every: int
+    params_checkpoint_keep: int
+    worker_log_dir: Path
+    distributed_base_port: int
+    params_distributed_workers: int
+    training_profile_path: Path
+    profile_trace_dir: Path
+    params_profile_training: bool
+    params_profile_trace_steps: list
+    runtime_profile_path: Path
 
 # Configuration for model evaluation
 @dataclass(frozen=True)
@@ -74,15 +116,253 @@ class EvaluationConfig:
 
     Attributes:
         path_of_model (Path): Path to the trained model to be evaluated.
-        training_data (Path): Path to the evaluation dataset.
+        split_manifest_path (Path): Split manifest of the ingested dataset.
+        dataset_cache_index (Path): Index of the preprocessed dataset cache read by the tf.data loader.
         all_params (dict): Dictionary containing all evaluation parameters.
         mlflow_uri (str): MLflow tracking URI for logging metrics and results.
         params_image_size (list): Input image size for evaluation.
         params_batch_size (int): Batch size for evaluation.
+        params_data_loader (str): Input pipeline, "tf_data" or "image_data_generator".
     """
     path_of_model: Path
-    training_data: Path
+    split_manifest_path: Path
+    dataset_cache_index: Path
     all_params: dict
     mlflow_uri: str
     params_image_size: list
     params_batch_size: int
+    params_data_loader: str
+
+# Configuration for the preprocessed dataset cache
+@dataclass(frozen=True)
+class DatasetCacheConfig:
+    """Configuration for caching the decoded and resized dataset.
+
+    Attributes:
+        root_dir (Path): Root directory for the cache.
+        index_path (Path): Path to the index describing the current cache.
+        split_manifest_path (Path): Split manifest of the ingested dataset.
+        params_image_size (list): Size the images are resized to.
+    """
+    root_dir: Path
+    index_path: Path
+    split_manifest_path: Path
+    params_image_size: list
+
+# Configuration for hyperparameter sweeps
+@dataclass(frozen=True)
+class HyperparameterSweepConfig:
+    """Configuration for concurrent hyperparameter trials pruned by successive halving.
+
+    Attributes:
+        root_dir (Path): Root directory for the trials' models and checkpoints.
+        results_path (Path): Path to save the results table.
+        parallel_trials (int): Trials trained concurrently, each on its own slice of the CPUs.
+        num_trials (int): Configurations sampled from the search space (0 runs the full grid).
+        min_epochs (int): Epochs of the first rung.
+        eta (int): Only the best 1/eta of the trials are promoted to the next rung.
+        seed (int): Seed of the configuration sampling.
+        search_space (dict): Candidate values (lists) or ranges ({low, high, log}) per parameter.
+        params_epochs (int): Epochs of the last rung.
+    """
+    root_dir: Path
+    results_path: Path
+    parallel_trials: int
+    num_trials: int
+    min_epochs: int
+    eta: int
+    seed: int
+    search_space: dict
+    params_epochs: int
+
+# Configuration for the CPU runtime autotuner
+@dataclass(frozen=True)
+class RuntimeTuningConfig:
+    """Configuration for tuning thread pools, batch sizes and oneDNN on the local host.
+
+    Attributes:
+        root_dir (Path): Root directory for tuning artifacts.
+        profile_path (Path): Path to save the best settings per workload and batch size.
+        workloads (list): Workloads benchmarked ("inference" and/or "training").
+        intra_op_threads (list): Intra-op thread counts tried (empty derives them from the CPU count).
+        inter_op_threads (list): Inter-op thread counts tried.
+        batch_sizes (list): Batch sizes measured for every setting.
+        onednn (list): oneDNN settings (TF_ENABLE_ONEDNN_OPTS) tried.
+        warmup_steps (int): Untimed steps per batch size.
+        steps (int): Timed steps per batch size.
+    """
+    root_dir: Path
+    profile_path: Path
+    workloads: list
+    intra_op_threads: list
+    inter_op_threads: list
+    batch_sizes: list
+    onednn: list
+    warmup_steps: int
+    steps: int
+
+# Configuration for background training jobs
+@dataclass(frozen=True)
+class TrainingJobConfig:
+    """Configuration for running training as a background job.
+
+    Attributes:
+        root_dir (Path): Directory for job status files, logs and the lock file.
+        command (str): Command that retrains the model.
+        cpu_threads (int): CPU cores given to a training job (0 uses half of the available cores).
+        nice (int): Scheduling niceness of the training process.
+    """
+    root_dir: Path
+    command: str
+    cpu_threads: int
+    nice: int
+
+# Configuration for post-training quantization
+@dataclass(frozen=True)
+class ModelQuantizationConfig:
+    """Configuration for exporting quantized TFLite models.
+
+    Attributes:
+        root_dir (Path): Root directory for quantized model artifacts.
+        path_of_model (Path): Path to the trained Keras model to be quantized.
+        split_manifest_path (Path): Split manifest of the ingested dataset.
+        dynamic_range_model_path (Path): Path to save the dynamic-range quantized model.
+        int8_model_path (Path): Path to save the full-integer quantized model.
+        report_path (Path): Path to save the accuracy-delta and latency report.
+        params_image_size (list): Input image size of the model.
+        params_batch_size (int): Batch size used for the accuracy comparison.
+        params_calibration_samples (int): Number of images used to calibrate the int8 model.
+        params_eval_samples (int): Number of test images used for the comparison.
+    """
+    root_dir: Path
+    path_of_model: Path
+    split_manifest_path: Path
+    dynamic_range_model_path: Path
+    int8_model_path: Path
+    report_path: Path
+    params_image_size: list
+    params_batch_size: int
+    params_calibration_samples: int
+    params_eval_samples: int
+
+# Configuration for backbone embedding extraction
+@dataclass(frozen=True)
+class EmbeddingExtractionConfig:
+    """Configuration for extracting backbone embeddings of the ingested dataset.
+
+    Attributes:
+        root_dir (Path): Root directory for embedding artifacts.
+        base_model_path (Path): Path to the frozen VGG19 backbone.
+        split_manifest_path (Path): Split manifest of the ingested dataset.
+        embeddings_path (Path): Path to save the float16 embedding matrix (.npy, memory-mappable).
+        metadata_path (Path): Path to save the image paths and labels of the matrix rows.
+        ivf_index_path (Path): Path to save the coarse-quantized (IVF) index.
+        params_image_size (list): Input image size of the backbone.
+        params_batch_size (int): Number of images per forward pass.
+        params_ivf_lists (int): Number of IVF lists (0 disables the index).
+    """
+    root_dir: Path
+    base_model_path: Path
+    split_manifest_path: Path
+    embeddings_path: Path
+    metadata_path: Path
+    ivf_index_path: Path
+    params_image_size: list
+    params_batch_size: int
+    params_ivf_lists: int
+
+# Configuration for the similar-case search served by /similar
+@dataclass(frozen=True)
+class SimilaritySearchConfig:
+    """Configuration for searching the embedding matrix.
+
+    Attributes:
+        base_model_path (Path): Backbone used to embed queries when the served model is not Keras.
+        embeddings_path (Path): Path to the float16 embedding matrix.
+        metadata_path (Path): Path to the image paths and labels of the matrix rows.
+        ivf_index_path (Path): Path to the optional IVF index.
+        top_k (int): Default number of similar cases returned.
+        max_k (int): Maximum number of similar cases a request may ask for.
+        nprobe (int): IVF lists scanned per query (0 always scans the whole matrix).
+    """
+    base_model_path: Path
+    embeddings_path: Path
+    metadata_path: Path
+    ivf_index_path: Path
+    top_k: int
+    max_k: int
+    nprobe: int
+
+# Configuration for serving predictions
+@dataclass(frozen=True)
+class PredictionConfig:
+    """Configuration for serving predictions.
+
+    Attributes:
+        backend (str): Inference backend (keras, tflite_dynamic_range or tflite_int8).
+        model_path (Path): Path to the model artifact served by the selected backend.
+        model_version_file (Path): Optional file whose contents identify the model version.
+        class_indices_path (Path): Class-name to index mapping written by the training stage.
+        reload_interval (float): Seconds between checks for a new model artifact (0 disables reloading).
+        preload (bool): Whether the model is loaded and warmed up at startup.
+        warmup_batch_sizes (list): Batch sizes of the warmup forward passes.
+        warmup_iterations (int): Forward passes per warmup batch size.
+        batching (bool): Whether concurrent requests are merged into batched forward passes.
+        max_batch_size (int): Maximum number of requests per batched forward pass.
+        max_wait_ms (float): Maximum milliseconds a request waits for a batch to fill.
+        max_pending_requests (int): Maximum requests waiting for or running inference (0 disables the limit).
+        default_deadline_ms (float): Deadline of requests that do not send one (0 means no deadline).
+        cache_enabled (bool): Whether predictions are cached by image content and model version.
+        cache_max_entries (int): Maximum number of cached predictions kept in memory.
+        cache_ttl_seconds (float): Seconds a cached prediction stays valid (0 disables expiry).
+        cache_dir (Path): Optional directory for the on-disk cache tier (None disables it).
+        cache_disk_max_entries (int): Maximum number of predictions kept on disk (oldest are evicted).
+        cache_disk_sweep_interval (float): Seconds between sweeps of expired and excess disk entries.
+        tta_views (int): Default number of test-time augmentation views per image (1 disables it).
+        tta_max_views (int): Maximum number of views a request may ask for.
+        tta_shift_fraction (float): Shift of the shifted views as a fraction of the image size.
+        tta_aggregation (str): Default aggregation of the views' probabilities (mean or max).
+        runtime_profile_path (Path): Thread and oneDNN settings tuned for this host (applied when present).
+        params_image_size (list): Input image size expected by the model.
+    """
+    backend: str
+    model_path: Path
+    model_version_file: Path
+    class_indices_path: Path
+    reload_interval: float
+    preload: bool
+    warmup_batch_sizes: list
+    warmup_iterations: int
+    batching: bool
+    max_batch_size: int
+    max_wait_ms: float
+    max_pending_requests: int
+    default_deadline_ms: float
+    cache_enabled: bool
+    cache_max_entries: int
+    cache_ttl_seconds: float
+    cache_dir: Path
+    cache_disk_max_entries: int
+    cache_disk_sweep_interval: float
+    tta_views: int
+    tta_max_views: int
+    tta_shift_fraction: float
+    tta_aggregation: str
+    runtime_profile_path: Path
+    params_image_size: list
+
+# Configuration for the web server
+@dataclass(frozen=True)
+class ServingConfig:
+    """Configuration for the web server.
+
+    Attributes:
+        host (str): Interface the web app listens on.
+        port (int): Port the web app listens on.
+        workers (int): Number of worker processes (more than 1 enables pre-fork serving).
+        threads_per_worker (int): CPU cores and intra-op threads per worker (0 divides cores evenly).
+    """
+    host: str
+    port: int
+    workers: int
+    threads_per_worker: int
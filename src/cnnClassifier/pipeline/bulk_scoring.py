@@ -0,0 +1,354 @@
+import os  # To walk the input directory
+import csv  # Incremental CSV output
+import time  # To report throughput
+import queue  # Hands prefetched batches to the scoring loop
+import argparse  # Command-line interface
+import threading  # Background batch producer
+from concurrent.futures import ThreadPoolExecutor  # Parallel image decoding
+import numpy as np  # Importing numpy for array operations
+from cnnClassifier.config.configuration import ConfigurationManager  # Handles configuration management
+from cnnClassifier.components.model_registry import ModelRegistry  # Loads the configured model
+from cnnClassifier.components.tflite_model import TFLiteModel  # Quantized TFLite inference backend
+from cnnClassifier.pipeline.prediction import DEFAULT_CLASS_NAMES  # Fallback class order
+from cnnClassifier.utils.common import preprocess_image, load_json  # In-memory decoding and label mapping
+from cnnClassifier import logger  # Logger for tracking and debugging
+
+# File extensions scored by default
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp", ".tif", ".tiff")
+
+# Marker ending a prefetched batch stream
+_END = object()
+
+# Seconds between checks of the other side while waiting on the batch queue
+_POLL_INTERVAL = 1.0
+
+
+class _ProducerFailed:
+    """
+    Queue item carrying the exception that stopped the batch producer, re-raised by the consumer.
+    """
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+class BulkScoringPipeline:
+    """
+    A pipeline class to re-score large image archives offline with the configured model.
+
+    File paths are streamed from the input directory, decoded in parallel and batched ahead
+    of the model; predictions are appended to CSV or Parquet as each batch completes, and a
+    checkpoint of scored files lets an interrupted run resume where it stopped. Paths are only
+    checkpointed once their rows are durable: after the fsync for CSV, and after the Parquet
+    part file holding them has been closed (and its footer written).
+    """
+    def __init__(self, input_dir, output, output_format=None, checkpoint=None, batch_size=64,
+                 workers=None, prefetch=4, extensions=IMAGE_EXTENSIONS, log_every=50, part_batches=100):
+        """
+        Initializes the BulkScoringPipeline.
+
+        Args:
+            input_dir (str): Directory searched recursively for images.
+            output (str): CSV file, or directory of Parquet part files.
+            output_format (str, optional): "csv" or "parquet". Defaults to the output's extension.
+            checkpoint (str, optional): File listing scored paths. Defaults to `<output>.checkpoint`.
+            batch_size (int, optional): Images per forward pass. Defaults to 64.
+            workers (int, optional): Decoding threads. Defaults to the number of CPUs.
+            prefetch (int, optional): Decoded batches kept ready ahead of the model. Defaults to 4.
+            extensions (tuple, optional): File extensions to score. Defaults to IMAGE_EXTENSIONS.
+            log_every (int, optional): Batches between throughput log lines. Defaults to 50.
+            part_batches (int, optional): Batches per Parquet part file; a run killed mid-part re-scores
+                at most this many batches. Defaults to 100.
+        """
+        self.input_dir = input_dir
+        self.output = output.rstrip(os.sep)
+        self.output_format = output_format or ("parquet" if self.output.endswith(".parquet") else "csv")
+        self.checkpoint = checkpoint or f"{self.output}.checkpoint"
+        self.batch_size = batch_size
+        self.workers = workers or os.cpu_count()
+        self.prefetch = prefetch
+        self.extensions = tuple(ext.lower() for ext in extensions)
+        self.log_every = log_every
+        self.part_batches = part_batches
+
+        self.config = ConfigurationManager().get_prediction_config()
+        self.target_size = tuple(self.config.params_image_size[:-1])  # Exclude channel dimension
+        loader = TFLiteModel if self.config.backend.startswith("tflite") else None
+        self.registry = ModelRegistry(self.config, loader=loader)
+
+        if os.path.exists(self.config.class_indices_path):
+            class_indices = load_json(self.config.class_indices_path)
+            self.class_names = [name for name, _ in sorted(class_indices.items(), key=lambda item: item[1])]
+        else:
+            self.class_names = list(DEFAULT_CLASS_NAMES)
+        self.columns = ["path", "prediction", *[f"prob_{name}" for name in self.class_names], "model_version", "error"]
+
+    def iter_paths(self, done: set):
+        """
+        Streams image paths under the input directory without listing the whole archive first.
+
+        Args:
+            done (set): Paths already scored by a previous run, which are skipped.
+
+        Yields:
+            str: Path of an image to score.
+        """
+        stack = [self.input_dir]
+        while stack:
+            directory = stack.pop()
+            with os.scandir(directory) as entries:
+                for entry in sorted(entries, key=lambda e: e.name):
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.name.lower().endswith(self.extensions) and entry.path not in done:
+                        yield entry.path
+
+    def _decode(self, path):
+        """
+        Reads and preprocesses one image, returning the error message instead of raising.
+        """
+        try:
+            with open(path, "rb") as f:
+                return preprocess_image(f.read(), self.target_size), None
+        except Exception as e:
+            return None, f"{type(e).__name__}: {e}"
+
+    def _produce(self, paths, batches: queue.Queue, stop: threading.Event):
+        """
+        Decodes images in parallel and queues (paths, arrays, errors) batches for the model.
+
+        Any failure of the directory walk or the decoders is queued as a _ProducerFailed so
+        the consumer re-raises it instead of waiting for batches that will never come.
+        """
+        def put(item) -> bool:
+            # Never block forever on a full queue once the consumer has stopped
+            while not stop.is_set():
+                try:
+                    batches.put(item, timeout=_POLL_INTERVAL)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="decode") as pool:
+                chunk = []
+                for path in paths:
+                    chunk.append(path)
+                    if len(chunk) == self.batch_size:
+                        if not put((chunk, list(pool.map(self._decode, chunk)))):
+                            return
+                        chunk = []
+                if chunk and not put((chunk, list(pool.map(self._decode, chunk)))):
+                    return
+        except BaseException as e:
+            put(_ProducerFailed(e))
+            return
+        put(_END)
+
+    def _load_checkpoint(self, version: str) -> set:
+        """
+        Reads the paths scored by previous runs against the same model version.
+
+        Args:
+            version (str): Version of the model about to score.
+
+        Returns:
+            set: Paths already present in the output.
+        """
+        if not os.path.exists(self.checkpoint):
+            return set()
+        with open(self.checkpoint) as f:
+            header = f.readline().strip()
+            done = {line.rstrip("\n") for line in f if line.strip()}
+        if header != f"# model_version: {version}":
+            raise ValueError(
+                f"Checkpoint {self.checkpoint} was written by another model ({header}); "
+                f"delete it and the output to re-score from scratch"
+            )
+        logger.info(f"Resuming: {len(done)} images already scored")
+        return done
+
+    def _open_writer(self):
+        """
+        Opens the output for appending.
+
+        Returns:
+            tuple: `write(rows, paths)` and `close()`, both returning the paths whose rows are now
+            durable and may be checkpointed.
+        """
+        if self.output_format == "csv":
+            is_new = not os.path.exists(self.output) or os.path.getsize(self.output) == 0
+            f = open(self.output, "a", newline="")
+            writer = csv.writer(f)
+            if is_new:
+                writer.writerow(self.columns)
+
+            def write(rows, paths):
+                writer.writerows(rows)
+                f.flush()
+                os.fsync(f.fileno())
+                return paths
+
+            def close():
+                f.close()
+                return []
+            return write, close
+
+        # Parquet files cannot be appended to and are unreadable until their footer is written on close,
+        # so rows go to a temporary part file, one row group per batch, renamed once closed every
+        # `part_batches` batches; only then are its paths returned for the checkpoint
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError("Parquet output requires pyarrow (pip install pyarrow)") from e
+        os.makedirs(self.output, exist_ok=True)
+        for name in os.listdir(self.output):
+            if name.endswith(".parquet.tmp"):
+                # Left by a killed run; its paths were never checkpointed and are re-scored
+                logger.warning(f"Removing unfinished part file {name}")
+                os.remove(os.path.join(self.output, name))
+        parts = [int(name[5:-8]) for name in os.listdir(self.output)
+                 if name.startswith("part-") and name.endswith(".parquet") and name[5:-8].isdigit()]
+        schema = pa.schema(
+            [("path", pa.string()), ("prediction", pa.string())]
+            + [(f"prob_{name}", pa.float32()) for name in self.class_names]
+            + [("model_version", pa.string()), ("error", pa.string())]
+        )
+        state = {"part": max(parts, default=-1) + 1, "writer": None, "batches": 0, "paths": []}
+
+        def finish_part():
+            # Write the footer and publish the part under its final name
+            if state["writer"] is None:
+                return []
+            state["writer"].close()
+            path = os.path.join(self.output, f"part-{state['part']:05d}.parquet")
+            os.replace(f"{path}.tmp", path)
+            committed = state["paths"]
+            state.update(part=state["part"] + 1, writer=None, batches=0, paths=[])
+            return committed
+
+        def write(rows, paths):
+            if state["writer"] is None:
+                path = os.path.join(self.output, f"part-{state['part']:05d}.parquet.tmp")
+                state["writer"] = pq.ParquetWriter(path, schema)
+            state["writer"].write_table(pa.Table.from_pylist([dict(zip(self.columns, row)) for row in rows], schema))
+            state["paths"].extend(paths)
+            state["batches"] += 1
+            return finish_part() if state["batches"] >= self.part_batches else []
+        return write, finish_part
+
+    def main(self):
+        """
+        Scores every image under the input directory that is not in the checkpoint yet.
+
+        Returns:
+            dict: Images scored and failed, elapsed seconds and images per second of this run.
+        """
+        model, version = self.registry.get()
+        done = self._load_checkpoint(version)
+
+        batches = queue.Queue(maxsize=self.prefetch)
+        stop = threading.Event()
+        producer = threading.Thread(
+            target=self._produce, args=(self.iter_paths(done), batches, stop), name="bulk-decode", daemon=True
+        )
+
+        write, close = self._open_writer()
+        new_checkpoint = not os.path.exists(self.checkpoint)
+        checkpoint = open(self.checkpoint, "a")
+        if new_checkpoint:
+            checkpoint.write(f"# model_version: {version}\n")
+
+        scored = failed = batch_count = 0
+        start = time.perf_counter()
+        producer.start()
+        try:
+            while True:
+                try:
+                    item = batches.get(timeout=_POLL_INTERVAL)
+                except queue.Empty:
+                    if not producer.is_alive() and batches.empty():
+                        raise RuntimeError("The batch producer stopped without finishing the stream")
+                    continue
+                if item is _END:
+                    break
+                if isinstance(item, _ProducerFailed):
+                    raise item.error
+                paths, decoded = item
+
+                # Failed decodes are recorded with their error instead of stopping the run
+                ok = [i for i, (array, _) in enumerate(decoded) if array is not None]
+                probabilities = {}
+                if ok:
+                    outputs = np.asarray(model.predict_on_batch(np.stack([decoded[i][0] for i in ok])))
+                    probabilities = dict(zip(ok, outputs))
+
+                rows = []
+                for i, path in enumerate(paths):
+                    if i in probabilities:
+                        p = probabilities[i]
+                        rows.append([path, self.class_names[int(np.argmax(p))], *map(float, p), version, ""])
+                    else:
+                        rows.append([path, "", *[None] * len(self.class_names), version, decoded[i][1]])
+
+                # Output first, then checkpoint only the paths whose rows are durable: a crash
+                # in between only repeats them on resume
+                committed = write(rows, paths)
+                if committed:
+                    checkpoint.write("".join(f"{path}\n" for path in committed))
+                    checkpoint.flush()
+
+                scored += len(ok)
+                failed += len(paths) - len(ok)
+                batch_count += 1
+                if batch_count % self.log_every == 0:
+                    elapsed = time.perf_counter() - start
+                    logger.info(f"Scored {scored + failed} images ({(scored + failed) / elapsed:.1f} images/sec)")
+        finally:
+            stop.set()
+            try:
+                checkpoint.write("".join(f"{path}\n" for path in close()))
+            finally:
+                checkpoint.close()
+
+        elapsed = time.perf_counter() - start
+        summary = {
+            "scored": scored,
+            "failed": failed,
+            "skipped": len(done),
+            "elapsed_s": elapsed,
+            "images_per_s": (scored + failed) / elapsed if elapsed > 0 else 0.0,
+            "model_version": version,
+        }
+        logger.info(f"Bulk scoring finished: {summary}")
+        return summary
+
+
+# Main execution block
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Score a directory of CT slices with the configured model")
+    parser.add_argument("--input", required=True, help="Directory searched recursively for images")
+    parser.add_argument("--output", required=True, help="CSV file, or directory of Parquet part files (*.parquet)")
+    parser.add_argument("--format", choices=["csv", "parquet"], default=None, help="Defaults to the output's extension")
+    parser.add_argument("--checkpoint", default=None, help="File of scored paths (default: <output>.checkpoint)")
+    parser.add_argument("--batch-size", type=int, default=64, help="Images per forward pass")
+    parser.add_argument("--workers", type=int, default=None, help="Decoding threads (default: CPU count)")
+    parser.add_argument("--prefetch", type=int, default=4, help="Decoded batches kept ahead of the model")
+    parser.add_argument("--part-batches", type=int, default=100, help="Batches per Parquet part file")
+    args = parser.parse_args()
+
+    try:
+        BulkScoringPipeline(
+            input_dir=args.input,
+            output=args.output,
+            output_format=args.format,
+            checkpoint=args.checkpoint,
+            batch_size=args.batch_size,
+            workers=args.workers,
+            prefetch=args.prefetch,
+            part_batches=args.part_batches,
+        ).main()
+    except Exception as e:
+        logger.exception(e)
+        raise e
@@ -0,0 +1,285 @@
+import os  # Environment of the trial processes
+import queue  # Timeout of the CPU slice hand-out
+import csv  # Results table
+import math  # Log-uniform sampling
+import random  # Configuration sampling
+import shutil  # Clears the trials of a previous sweep
+import argparse  # Command-line interface
+import itertools  # Full grid of the search space
+import multiprocessing  # Spawned trial processes
+from pathlib import Path  # Trial directories
+from dataclasses import replace  # Per-trial training configuration
+from concurrent.futures import ProcessPoolExecutor, as_completed  # Concurrent trials
+from cnnClassifier.config.configuration import ConfigurationManager  # Handles configuration management
+from cnnClassifier.utils.common import read_yaml  # Search space overrides
+from cnnClassifier.utils.runtime import pin_current_process, worker_cpu_slices  # Per-trial CPU slices
+from cnnClassifier import logger  # Logger for tracking and debugging
+
+# TensorFlow is only imported by the shared-input preparation and inside the trial processes,
+# which are spawned fresh and set their thread limits first
+
+# Seconds a new trial process waits for a free CPU slice before running unpinned
+CPU_SLICE_TIMEOUT = 10.0
+
+
+def _init_trial_process(cpu_slices):
+    """
+    Pins a trial process to its own slice of the CPUs before TensorFlow starts.
+
+    Slices are not handed back when a process exits, so a process started to replace a dead
+    one finds none left and runs on every available CPU instead of blocking forever.
+    """
+    try:
+        pin_current_process(cpu_slices.get(timeout=CPU_SLICE_TIMEOUT))
+    except queue.Empty:
+        logger.warning(f"No free CPU slice for trial process {os.getpid()}; running unpinned")
+    os.environ.pop("TF_CONFIG", None)  # Trials always train in a single process
+
+
+def _prepare_shared_inputs(training_config):
+    """
+    Builds the preprocessed dataset cache and, with `BOTTLENECK_TRAINING`, the bottleneck
+    features once, so the concurrent trials only read them.
+
+    Runs in the sweep process before the trial pool starts, on every available CPU.
+    """
+    from cnnClassifier.components.dataset_cache import DatasetCache
+    from cnnClassifier.components.model_training import Training
+
+    DatasetCache(config=ConfigurationManager().get_dataset_cache_config()).build()
+    if training_config.params_bottleneck_training:
+        training = Training(config=training_config)
+        training.get_base_model()
+        training.prepare_bottleneck_features()
+
+
+def _run_trial(trial: dict, epochs: int, sweep_dir: str, training_config, prepare_config, save: bool) -> dict:
+    """
+    Trains one configuration up to `epochs`, resuming from its checkpoint of the previous rung.
+    """
+    import tensorflow as tf
+    from cnnClassifier.components.prepare_base_model import PrepareBaseModel
+    from cnnClassifier.components.model_training import Training
+
+    params = trial["params"]
+    trial_dir = Path(sweep_dir, f"trial-{trial['id']:03d}")
+    base_model_path = trial_dir / "base_model_updated.h5"
+
+    # The head is rebuilt per trial since its dropout and learning rate are being tuned
+    if not base_model_path.exists():
+        os.makedirs(trial_dir, exist_ok=True)
+        model = PrepareBaseModel._prepare_full_model(
+            model=tf.keras.models.load_model(prepare_config.base_model_path),
+            classes=prepare_config.params_classes,
+            freeze_all=True,
+            freeze_till=None,
+            learning_rate=params.get("LEARNING_RATE", prepare_config.params_learning_rate),
+            dropout=params.get("DROPOUT", prepare_config.params_dropout)
+        )
+        model.save(base_model_path)
+
+    config = replace(
+        training_config,
+        root_dir=trial_dir,
+        trained_model_path=trial_dir / "model.h5",
+        class_indices_path=trial_dir / "class_indices.json",
+        updated_base_model_path=base_model_path,
+        checkpoint_dir=trial_dir / "checkpoints",
+        training_profile_path=trial_dir / "training_profile.json",
+        profile_trace_dir=trial_dir / "profile_trace",
+        params_epochs=epochs,
+        params_batch_size=int(params.get("BATCH_SIZE", training_config.params_batch_size)),
+        params_data_loader="tf_data",  # Reads the shared preprocessed dataset cache
+        params_checkpoint_every=1,
+        params_checkpoint_keep=1,
+        params_distributed_workers=1
+    )
+    training = Training(config=config)
+    training.get_base_model()
+    training.train_valid_generator()
+    history = training.fit().history
+    if save:
+        training.save_model(path=config.trained_model_path, model=training.model)
+    tf.keras.backend.clear_session()
+
+    best = min(range(len(history["val_loss"])), key=history["val_loss"].__getitem__)
+    return {
+        "epochs": len(history["val_loss"]),
+        "val_loss": history["val_loss"][best],
+        "val_accuracy": history["val_accuracy"][best],
+    }
+
+
+class HyperparameterSweepPipeline:
+    """
+    A pipeline class to tune the params.yaml hyperparameters with concurrent trials.
+
+    Configurations are sampled from the search space and trained in a pool of processes,
+    each pinned to its own slice of the CPUs. Successive halving trains every trial for a
+    few epochs, then keeps training only the best 1/eta of them (by validation loss) for eta
+    times as many epochs, until the last rung reaches `EPOCHS`. Trials resume from their
+    checkpoints between rungs and read one shared preprocessed dataset.
+    """
+    def __init__(self, search_space=None, num_trials=None, parallel_trials=None):
+        """
+        Initializes the HyperparameterSweepPipeline.
+
+        Args:
+            search_space (dict, optional): Overrides the configured search space.
+            num_trials (int, optional): Overrides the configured number of sampled configurations.
+            parallel_trials (int, optional): Overrides the configured number of concurrent trials.
+        """
+        config = ConfigurationManager()
+        self.config = config.get_hyperparameter_sweep_config()
+        self.training_config = config.get_training_config()
+        self.prepare_config = config.get_prepare_base_model_config()
+
+        self.search_space = search_space or self.config.search_space
+        self.num_trials = self.config.num_trials if num_trials is None else num_trials
+        self.parallel_trials = parallel_trials or self.config.parallel_trials
+        if "EPOCHS" in self.search_space:
+            raise ValueError("EPOCHS is set by the successive-halving rungs and cannot be searched")
+
+    def sample_trials(self) -> list:
+        """
+        Draws the configurations to try.
+
+        Returns:
+            list: Trials as {"id", "params"} dictionaries.
+        """
+        names = sorted(self.search_space)
+        if self.num_trials == 0:
+            if not all(isinstance(self.search_space[name], list) for name in names):
+                raise ValueError("A full grid needs a list of values for every parameter")
+            grid = itertools.product(*(self.search_space[name] for name in names))
+            return [{"id": i, "params": dict(zip(names, values))} for i, values in enumerate(grid)]
+
+        rng = random.Random(self.config.seed)
+
+        def draw(space):
+            if isinstance(space, list):
+                return rng.choice(space)
+            if space.get("log"):
+                return math.exp(rng.uniform(math.log(space["low"]), math.log(space["high"])))
+            return rng.uniform(space["low"], space["high"])
+
+        return [{"id": i, "params": {name: draw(self.search_space[name]) for name in names}} for i in range(self.num_trials)]
+
+    def rungs(self) -> list:
+        """
+        Lists the epoch budget of every rung: min_epochs, min_epochs * eta, ..., EPOCHS.
+
+        Returns:
+            list: Epochs each surviving trial has been trained for at the end of every rung.
+        """
+        rungs, epochs = [], self.config.min_epochs
+        while epochs < self.config.params_epochs:
+            rungs.append(epochs)
+            epochs *= self.config.eta
+        return rungs + [self.config.params_epochs]
+
+    def write_results(self, trials: list):
+        """
+        Saves the results table and logs it, best trial first.
+
+        Args:
+            trials (list): Every trial with its latest results and status.
+        """
+        names = sorted(self.search_space)
+        columns = ["trial", *names, "epochs", "val_loss", "val_accuracy", "status"]
+        rows = [
+            [trial["id"], *[trial["params"][name] for name in names], trial.get("epochs", 0),
+             trial.get("val_loss"), trial.get("val_accuracy"), trial["status"]]
+            for trial in sorted(trials, key=lambda t: (t.get("val_loss") is None, t.get("val_loss") or 0.0))
+        ]
+        with open(self.config.results_path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(columns)
+            writer.writerows(rows)
+
+        def cell(value):
+            return f"{value:.4g}" if isinstance(value, float) else str(value)
+
+        text = [[str(column) for column in columns]] + [[cell(value) for value in row] for row in rows]
+        widths = [max(len(row[i]) for row in text) for i in range(len(columns))]
+        table = "\n".join("  ".join(value.ljust(width) for value, width in zip(row, widths)) for row in text)
+        logger.info(f"Hyperparameter sweep results ({self.config.results_path}):\n{table}")
+
+    def main(self):
+        """
+        Runs the sweep and writes the results table.
+
+        Returns:
+            list: Every trial with its parameters, epochs trained, best val_loss and status.
+        """
+        trials = self.sample_trials()
+        rungs = self.rungs()
+
+        # Trial directories are numbered per sweep, so a previous sweep's models must not be resumed
+        for entry in os.listdir(self.config.root_dir):
+            if entry.startswith("trial-"):
+                shutil.rmtree(Path(self.config.root_dir, entry))
+        for trial in trials:
+            trial["status"] = "running"
+        logger.info(f"Sweeping {len(trials)} trials over rungs of {rungs} epochs, {self.parallel_trials} at a time")
+
+        # Built unpinned, before the trial processes take their CPU slices
+        _prepare_shared_inputs(self.training_config)
+
+        context = multiprocessing.get_context("spawn")  # Fresh processes, so thread limits apply before TensorFlow starts
+        cpu_slices = context.Queue()
+        for cpus in worker_cpu_slices(self.parallel_trials):
+            cpu_slices.put(cpus)
+
+        with ProcessPoolExecutor(max_workers=self.parallel_trials, mp_context=context,
+                                 initializer=_init_trial_process, initargs=(cpu_slices,)) as pool:
+            active = trials
+            for rung, epochs in enumerate(rungs):
+                last = rung == len(rungs) - 1
+                futures = {
+                    pool.submit(_run_trial, trial, epochs, str(self.config.root_dir),
+                                self.training_config, self.prepare_config, last): trial
+                    for trial in active
+                }
+                for future in as_completed(futures):
+                    trial = futures[future]
+                    try:
+                        trial.update(future.result())
+                    except Exception as e:
+                        trial["status"] = f"failed: {type(e).__name__}: {e}"
+                        logger.exception(f"Trial {trial['id']} failed")
+                    else:
+                        logger.info(f"Trial {trial['id']} {trial['params']}: val_loss {trial['val_loss']:.4f} after {trial['epochs']} epochs")
+
+                ranked = sorted((t for t in active if not t["status"].startswith("failed")), key=lambda t: t["val_loss"])
+                if last:
+                    for trial in ranked:
+                        trial["status"] = "completed"
+                    break
+                promoted = max(1, len(ranked) // self.config.eta)
+                for trial in ranked[promoted:]:
+                    trial["status"] = f"pruned at rung {rung} ({epochs} epochs)"
+                active = ranked[:promoted]
+                self.write_results(trials)
+
+        self.write_results(trials)
+        return trials
+
+
+# Main execution block
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Tune params.yaml hyperparameters with concurrent, successively halved trials")
+    parser.add_argument("--space", default=None, help="YAML file of the search space (default: hyperparameter_sweep.search_space)")
+    parser.add_argument("--trials", type=int, default=None, help="Configurations to sample (0 runs the full grid)")
+    parser.add_argument("--parallel", type=int, default=None, help="Trials trained concurrently")
+    args = parser.parse_args()
+
+    try:
+        HyperparameterSweepPipeline(
+            search_space=read_yaml(Path(args.space)).to_dict() if args.space else None,
+            num_trials=args.trials,
+            parallel_trials=args.parallel,
+        ).main()
+    except Exception as e:
+        logger.exception(e)
+        raise e
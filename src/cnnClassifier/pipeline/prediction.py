@@ -1,55 +1,522 @@
 import os  # To interact with the file system
+import time  # To time the warmup
+import threading  # To warm up off the request path
 import numpy as np  # Importing numpy for array operations
-from tensorflow.keras.models import load_model  # To load the pre-trained model
-from tensorflow.keras.preprocessing import image  # For image processing
+from cnnClassifier.config.configuration import ConfigurationManager  # Handles configuration management
+from cnnClassifier.components.model_registry import ModelRegistry, load_keras_model  # Keeps the model resident in memory
+from cnnClassifier.components.tflite_model import TFLiteModel  # Quantized TFLite inference backend
+from cnnClassifier.components.micro_batcher import MicroBatcher  # Merges concurrent requests into batches
+from cnnClassifier.components.prediction_cache import PredictionCache  # Caches repeated predictions
+from cnnClassifier.components.admission_control import AdmissionController, check_deadline  # Bounds queued work
+from cnnClassifier.utils.common import preprocess_image, load_json, InvalidInput  # In-memory decoding and label mapping
+from cnnClassifier.utils.metrics import REGISTRY, PHASE_LATENCY  # Serving metrics
+from cnnClassifier.utils.runtime import apply_runtime_profile  # Thread and oneDNN settings tuned for this host
+from cnnClassifier import logger  # Logger for tracking and debugging
+
+# Class order produced by flow_from_directory when no mapping has been saved yet
+DEFAULT_CLASS_NAMES = ['Cyst', 'Normal', 'Stone', 'Tumor']
 
 class PredictionPipeline:
     """
-    A pipeline class that loads a pre-trained model and makes predictions 
-    on a provided image file.
+    A pipeline class that serves a resident pre-trained model and makes predictions
+    on images passed in memory (or read from a file).
     """
-    def __init__(self, filename):
+    def __init__(self, filename=None, watch=True):
         """
-        Initializes the PredictionPipeline with the image filename.
-        
+        Initializes the PredictionPipeline.
+
+        The model of the configured backend (Keras or quantized TFLite) is loaded once
+        per process by a shared ModelRegistry, which also hot-swaps newer model
+        artifacts in the background when `watch` is True. The runtime profile tuned
+        for this host, if any, is applied first.
+
         Args:
-            filename (str): Path to the image file to be predicted.
+            filename (str, optional): Path to an image file used when `predict` gets no image. Defaults to None.
+            watch (bool, optional): Start watching for new model artifacts. Defaults to True.
         """
         self.filename = filename
+        self.config = ConfigurationManager().get_prediction_config()
+        self.target_size = tuple(self.config.params_image_size[:-1])  # Exclude channel dimension
+        self.class_names = self.load_class_names()
+        # Applied before the first model load imports TensorFlow, so the oneDNN setting takes effect too
+        self.runtime_profile = apply_runtime_profile(
+            self.config.runtime_profile_path, "inference", self.config.max_batch_size if self.config.batching else 1
+        )
+        # Keras models load through load_model; quantized backends through a TFLite interpreter
+        loader = TFLiteModel if self.config.backend.startswith("tflite") else None
+        self.registry = ModelRegistry.shared(self.config, loader=loader)
+        self.registry.warmup = self.warmup_model  # Newly swapped-in models are traced before serving
+        if watch:
+            self.registry.start_watching()
+        self.ready = threading.Event()  # Set once the model is loaded and warmed up
+
+        # Optionally merge concurrent requests into a single forward pass
+        self.batcher = None
+        if self.config.batching:
+            self.batcher = MicroBatcher(
+                predict_fn=self.predict_batch_arrays,
+                max_batch_size=self.config.max_batch_size,
+                max_wait_ms=self.config.max_wait_ms,
+            )
+            self.batcher.start()
+
+        # Optionally cache predictions by image content; a hot-swapped model invalidates the cache
+        self.cache = None
+        if self.config.cache_enabled:
+            self.cache = PredictionCache(
+                max_entries=self.config.cache_max_entries,
+                ttl_seconds=self.config.cache_ttl_seconds,
+                disk_dir=self.config.cache_dir,
+                disk_max_entries=self.config.cache_disk_max_entries,
+                disk_sweep_interval=self.config.cache_disk_sweep_interval,
+            )
+            self.registry.add_swap_listener(self.cache.clear)
+
+        # Bound the requests waiting for or running inference; the excess is rejected up front
+        self.admission = AdmissionController(
+            max_pending=self.config.max_pending_requests,
+            parallelism=self.config.max_batch_size if self.batcher is not None else 1,
+        )
+        self._timings = threading.local()  # Queue-wait and compute time of the calling thread's last request
+
+        # Test-time augmentation is built on first use so plain serving never imports TensorFlow for it
+        self._tta = None
+        self._tta_lock = threading.Lock()
+
+        # The similar-case index and the backbone embedding model are also loaded on first use
+        self._similarity_config = None
+        self._similarity_index = None  # ((model version, artifact stats), index)
+        self._embedder = None  # (model version, embedding model)
+        self._similarity_lock = threading.RLock()  # The embedder may load the index while holding it
+
+        self._register_metrics()
+
+    def _register_metrics(self):
+        """
+        Exposes batching and cache state through the metrics registry, read at scrape time.
+        """
+        if self.batcher is not None:
+            REGISTRY.register_callback(
+                "cnn_batch_queue_depth", "Requests waiting for a batch.", "gauge",
+                lambda: self.batcher.stats()["queue_depth"],
+            )
+        for name in ("pending", "rejected", "expired"):
+            kind = "gauge" if name == "pending" else "counter"
+            REGISTRY.register_callback(
+                f"cnn_admission_{name}" + ("" if kind == "gauge" else "_total"),
+                f"Inference requests {name} by admission control.", kind,
+                lambda name=name: self.admission.stats()[name],
+            )
+        if self.cache is not None:
+            for name in ("hits", "disk_hits", "misses", "evictions", "disk_evictions", "disk_write_errors",
+                         "expirations", "invalidations"):
+                REGISTRY.register_callback(
+                    f"cnn_prediction_cache_{name}_total", f"Prediction cache {name.replace('_', ' ')}.", "counter",
+                    lambda name=name: self.cache.stats()[name],
+                )
+            REGISTRY.register_callback(
+                "cnn_prediction_cache_entries", "Predictions held in the memory cache.", "gauge",
+                lambda: self.cache.stats()["entries"],
+            )
+            REGISTRY.register_callback(
+                "cnn_prediction_cache_disk_entries", "Predictions held in the on-disk cache.", "gauge",
+                lambda: self.cache.stats()["disk_entries"],
+            )
+
+    def warmup_model(self, model):
+        """
+        Runs forward passes over blank batches so graph tracing happens before real requests.
+
+        Args:
+            model: Keras model or TFLiteModel to warm up.
+        """
+        for batch_size in self.config.warmup_batch_sizes:
+            batch = np.zeros((batch_size, *self.target_size, 3), dtype=np.float32)
+            for _ in range(self.config.warmup_iterations):
+                model.predict_on_batch(batch)
+
+    def start_warmup(self, on_ready=None):
+        """
+        Loads and warms up the model in a background thread, then marks the pipeline ready.
+
+        Args:
+            on_ready (callable, optional): Called once the pipeline is ready. Defaults to None.
+        """
+        def run():
+            start = time.perf_counter()
+            try:
+                self.registry.get()  # Loading runs the registry's warmup on the new model
+            except Exception:
+                logger.exception("Model preload failed; it will be loaded on the first request")
+                return
+            logger.info(f"Model loaded and warmed up in {time.perf_counter() - start:.2f}s")
+            self.ready.set()
+            if on_ready is not None:
+                on_ready()
+
+        if not self.config.preload:
+            self.ready.set()
+            return
+        threading.Thread(target=run, name="model-warmup", daemon=True).start()
+
+    def load_class_names(self):
+        """
+        Reads the class labels in index order from the training generator's `class_indices`.
+
+        Returns:
+            list: Class names ordered by their output index.
+        """
+        if not os.path.exists(self.config.class_indices_path):
+            return list(DEFAULT_CLASS_NAMES)
+        class_indices = load_json(self.config.class_indices_path)
+        return [name for name, _ in sorted(class_indices.items(), key=lambda item: item[1])]
+
+    def preprocess(self, image):
+        """
+        Decodes an image into a model-ready array without touching the disk.
+
+        Args:
+            image (bytes | np.ndarray): Encoded image bytes or a decoded pixel array.
+
+        Returns:
+            np.ndarray: Preprocessed image of shape (height, width, 3).
+        """
+        with PHASE_LATENCY.labels("preprocess").time():
+            return preprocess_image(image, self.target_size)
+
+    def predict_batch_arrays(self, batch):
+        """
+        Runs one forward pass of the resident model over a stacked batch.
+
+        Args:
+            batch (np.ndarray): Preprocessed images of shape (n, height, width, 3).
+
+        Returns:
+            np.ndarray: Class probabilities of shape (n, classes).
+        """
+        model, version = self.registry.get()
+        with PHASE_LATENCY.labels("inference").time():
+            return np.asarray(model.predict_on_batch(batch))
+
+    def last_timings(self):
+        """
+        Returns how long the calling thread's last request queued and computed.
+
+        Returns:
+            dict: `queue_wait_ms` (waiting for a batch) and `compute_ms` (forward pass), 0 for cache hits.
+        """
+        return dict(getattr(self._timings, "values", {"queue_wait_ms": 0.0, "compute_ms": 0.0}))
+
+    def _record_timings(self, queue_wait=0.0, compute=0.0):
+        self._timings.values = {"queue_wait_ms": queue_wait * 1000.0, "compute_ms": compute * 1000.0}
+
+    def _predict_single(self, test_image, deadline=None):
+        """
+        Runs one preprocessed image through the model, batched with concurrent requests when enabled.
+
+        Args:
+            test_image (np.ndarray): Preprocessed image of shape (height, width, 3).
+            deadline (float, optional): `time.perf_counter()` deadline; the image is dropped if it has
+                passed before the forward pass starts. Defaults to None.
+
+        Returns:
+            np.ndarray: Class probabilities.
+        """
+        if self.batcher is not None:
+            future = self.batcher.submit(test_image, deadline)
+            probabilities = future.result()
+            self._record_timings(future.queue_wait, future.compute)
+            return probabilities
+
+        check_deadline(deadline)
+        start = time.perf_counter()
+        probabilities = self.predict_batch_arrays(np.expand_dims(test_image, axis=0))[0]
+        self._record_timings(compute=time.perf_counter() - start)
+        return probabilities
+
+    def cache_key(self, image, variant=""):
+        """
+        Builds the prediction cache key for an image under the resident model version.
+
+        Args:
+            image (bytes | np.ndarray): Encoded image bytes or a decoded pixel array.
+            variant (str, optional): Distinguishes predictions of the same image made differently,
+                e.g. with test-time augmentation. Defaults to "".
+
+        Returns:
+            str: Cache key, or None when caching is disabled.
+        """
+        if self.cache is None:
+            return None
+        model, version = self.registry.get()
+        return PredictionCache.make_key(image, f"{version}{variant}")
+
+    @property
+    def tta(self):
+        """
+        The TestTimeAugmentation generating the augmented views, created on first use.
+        """
+        if self._tta is None:
+            with self._tta_lock:
+                if self._tta is None:
+                    from cnnClassifier.components.test_time_augmentation import TestTimeAugmentation
+                    self._tta = TestTimeAugmentation(
+                        shift_fraction=self.config.tta_shift_fraction,
+                        max_views=self.config.tta_max_views,
+                    )
+        return self._tta
+
+    def predict_tta(self, image, views, aggregation=None, deadline=None):
+        """
+        Predicts one image with test-time augmentation: all `views` augmented copies are
+        generated on-graph and scored in a single forward pass, then aggregated.
+
+        Args:
+            image (bytes | np.ndarray): Encoded image bytes or a decoded pixel array.
+            views (int): Number of augmented views, including the original image.
+            aggregation (str, optional): "mean" or "max" over the views. Defaults to the configured one.
+            deadline (float, optional): `time.perf_counter()` deadline checked before inference. Defaults to None.
 
-    def predict(self):
+        Returns:
+            np.ndarray: Aggregated class probabilities.
+
+        Raises:
+            InvalidInput: If the number of views or the aggregation is not supported.
+        """
+        aggregation = aggregation or self.config.tta_aggregation
+        if not 1 <= views <= self.tta.max_views:
+            raise InvalidInput(f"tta must be between 1 and {self.tta.max_views}")
+        if aggregation not in self.tta.AGGREGATIONS:
+            raise InvalidInput(f"aggregation must be one of {self.tta.AGGREGATIONS}")
+        with PHASE_LATENCY.labels("cache_lookup").time():
+            key = self.cache_key(image, variant=f":tta{views}{aggregation}")
+            probabilities = self.cache.get(key) if key is not None else None
+        if probabilities is not None:
+            return probabilities
+
+        with self.admission.admit():
+            test_image = np.expand_dims(self.preprocess(image), axis=0)
+            model, version = self.registry.get()
+            check_deadline(deadline)
+            start = time.perf_counter()
+            with PHASE_LATENCY.labels("inference").time():
+                probabilities = self.tta.predict(model, test_image, views, aggregation)[0]
+            self._record_timings(compute=time.perf_counter() - start)
+
+        if key is not None:
+            self.cache.put(key, probabilities)
+        return probabilities
+
+    def predict(self, image=None, tta_views=None, tta_aggregation=None, deadline=None):
         """
-        Loads the pre-trained model, processes the image, and returns a prediction 
+        Processes the image with the resident model and returns a prediction
         based on the model's output.
-        
+
+        Args:
+            image (bytes | np.ndarray, optional): Encoded image bytes or a decoded pixel array.
+                Falls back to reading `filename` when omitted.
+            tta_views (int, optional): Test-time augmentation views; more than 1 averages (or maxes)
+                the predictions of flipped and shifted copies. Defaults to the configured `tta_views`.
+            tta_aggregation (str, optional): "mean" or "max" over the views. Defaults to the configured one.
+            deadline (float, optional): `time.perf_counter()` deadline; requests still queued when it passes
+                are dropped with DeadlineExceeded instead of reaching the model. Defaults to None.
+
         Returns:
             list: A dictionary containing the image and its predicted class.
+
+        Raises:
+            InvalidInput: If the image cannot be decoded or the TTA options are not supported.
+            Overloaded: If the inference queue is full.
+            DeadlineExceeded: If the deadline passed before inference.
         """
-        # Load the pre-trained model from the specified path
-        model = load_model("artifacts/training/model.h5")
-        
-        # Load the image and resize it to the required input size for the model
-        test_image = image.load_img(self.filename, target_size=(224, 224))
-        
-        # Convert the image to a numpy array and expand dimensions to match model input shape
-        test_image = image.img_to_array(test_image)
-        test_image = np.expand_dims(test_image, axis=0)
-        
-        # Get the model's prediction (probabilities) and select the class with the highest probability
-        result = np.argmax(model.predict(test_image), axis=1)
-        
-        # Print the result for debugging purposes
-        print(result)
-
-        # Map the result to a human-readable class label
-        if result[0] == 0:
-            prediction = 'Cyst'
-        elif result[0] == 1:
-            prediction = 'Normal'
-        elif result[0] == 2:
-            prediction = 'Stone'            
-        else:
-            prediction = 'Tumor'
+        self._record_timings()
+        if image is None:
+            # Backwards-compatible path: read the image from the configured file
+            with open(self.filename, "rb") as f:
+                image = f.read()
+
+        views = int(tta_views or self.config.tta_views)
+        if views > 1:
+            # Augmented views run as one batch of their own instead of joining the micro-batches
+            probabilities = self.predict_tta(image, views, tta_aggregation, deadline)
+            return [{
+                "image": self.class_names[int(np.argmax(probabilities))],
+                "probabilities": {name: float(p) for name, p in zip(self.class_names, probabilities)},
+                "tta": {"views": views, "aggregation": tta_aggregation or self.config.tta_aggregation},
+            }]
+
+        # Serve repeated images from the cache without running the model
+        with PHASE_LATENCY.labels("cache_lookup").time():
+            key = self.cache_key(image)
+            probabilities = self.cache.get(key) if key is not None else None
+
+        if probabilities is None:
+            # Cache hits are always served; only requests needing the model count against the queue
+            with self.admission.admit():
+                # Decode and resize in memory on the calling thread
+                check_deadline(deadline)
+                test_image = self.preprocess(image)
+
+                # Get the model's prediction (probabilities), batched with concurrent requests when enabled
+                probabilities = self._predict_single(test_image, deadline)
+
+            if key is not None:
+                self.cache.put(key, probabilities)
+
+        # Map the class with the highest probability to a human-readable label
+        prediction = self.class_names[int(np.argmax(probabilities))]
 
         # Return the prediction as a dictionary
         return [{"image": prediction}]
+
+    def predict_proba(self, images, deadline=None):
+        """
+        Predicts many images, running them through the model in chunks of `max_batch_size`.
+
+        Args:
+            images (list): Encoded image bytes or decoded pixel arrays.
+            deadline (float, optional): `time.perf_counter()` deadline checked before each chunk. Defaults to None.
+
+        Returns:
+            list: One dictionary per image with the predicted class and the full softmax vector.
+        """
+        self._record_timings()
+        with PHASE_LATENCY.labels("cache_lookup").time():
+            keys = [self.cache_key(image) for image in images]
+            outputs = [self.cache.get(key) if key is not None else None for key in keys]
+
+        # Only images missing from the cache go through the model
+        misses = [i for i, probabilities in enumerate(outputs) if probabilities is None]
+        if misses:
+            with self.admission.admit():
+                compute = 0.0
+                chunk_size = self.config.max_batch_size
+                for start in range(0, len(misses), chunk_size):
+                    # Decode one chunk at a time so memory stays bounded by the batch size
+                    chunk = misses[start:start + chunk_size]
+                    batch = np.stack([self.preprocess(images[i]) for i in chunk])
+                    check_deadline(deadline)
+                    started_at = time.perf_counter()
+                    for i, probabilities in zip(chunk, self.predict_batch_arrays(batch)):
+                        outputs[i] = probabilities
+                        if keys[i] is not None:
+                            self.cache.put(keys[i], probabilities)
+                    compute += time.perf_counter() - started_at
+                self._record_timings(compute=compute)
+
+        return [
+            {
+                "image": self.class_names[int(np.argmax(probabilities))],
+                "probabilities": {name: float(p) for name, p in zip(self.class_names, probabilities)},
+            }
+            for probabilities in outputs
+        ]
+
+    def load_similarity_index(self):
+        """
+        Memory-maps the embedding matrix written by the embedding extraction stage.
+
+        The index is reloaded whenever the served model version changes or the embedding
+        artifacts are rewritten (e.g. by re-running the embedding_extraction stage), so
+        neighbours are never served from a stale embedding space.
+
+        Returns:
+            SimilarityIndex: The loaded index.
+        """
+        if self._similarity_config is None:
+            self._similarity_config = ConfigurationManager().get_similarity_search_config()
+        config = self._similarity_config
+        if not os.path.exists(config.embeddings_path):
+            raise FileNotFoundError(
+                f"No embeddings at {config.embeddings_path}; run the embedding_extraction stage"
+            )
+
+        version = self.registry.get()[1] if self.config.backend == "keras" else "base"
+        artifacts = tuple(
+            os.stat(path).st_mtime_ns if os.path.exists(path) else None
+            for path in (config.embeddings_path, config.metadata_path, config.ivf_index_path)
+        )
+        key = (version, artifacts)
+        if self._similarity_index is None or self._similarity_index[0] != key:
+            with self._similarity_lock:
+                if self._similarity_index is None or self._similarity_index[0] != key:
+                    from cnnClassifier.components.similarity_index import SimilarityIndex
+                    if self._similarity_index is not None:
+                        logger.info(f"Reloading the similarity index (model version {version}, embeddings rewritten or model swapped)")
+                    self._similarity_index = (key, SimilarityIndex(config))
+        return self._similarity_index[1]
+
+    def embedding_model(self):
+        """
+        Returns the model computing backbone embeddings of preprocessed images.
+
+        The Keras backend reuses the resident model's frozen backbone (sharing its weights);
+        the TFLite backends have no Keras graph to reuse and load the base backbone instead.
+
+        Returns:
+            tf.keras.Model: Model mapping images to pooled backbone features.
+        """
+        from cnnClassifier.components.embedding_extraction import backbone_embedding_model
+        if self.config.backend == "keras":
+            model, version = self.registry.get()
+        else:
+            model, version = None, "base"
+        if self._embedder is None or self._embedder[0] != version:
+            with self._similarity_lock:
+                if self._embedder is None or self._embedder[0] != version:
+                    if model is None:
+                        model = load_keras_model(self.load_similarity_index().config.base_model_path)
+                    self._embedder = (version, backbone_embedding_model(model))
+        return self._embedder[1]
+
+    def similar(self, image, k=None, deadline=None):
+        """
+        Finds the ingested cases whose backbone embeddings are closest to the image's.
+
+        Args:
+            image (bytes | np.ndarray): Encoded image bytes or a decoded pixel array.
+            k (int, optional): Number of similar cases. Defaults to the configured `top_k`.
+            deadline (float, optional): `time.perf_counter()` deadline checked before inference. Defaults to None.
+
+        Returns:
+            list: The k most similar cases with their path, label and cosine similarity.
+
+        Raises:
+            InvalidInput: If k is out of range or the image cannot be decoded.
+        """
+        index = self.load_similarity_index()
+        try:
+            k = int(k or index.config.top_k)
+        except (TypeError, ValueError) as e:
+            raise InvalidInput(f"k must be an integer, got {k!r}") from e
+        if not 1 <= k <= index.config.max_k:
+            raise InvalidInput(f"k must be between 1 and {index.config.max_k}")
+
+        self._record_timings()
+        with self.admission.admit():
+            test_image = np.expand_dims(self.preprocess(image), axis=0)
+            embedder = self.embedding_model()
+            check_deadline(deadline)
+            start = time.perf_counter()
+            with PHASE_LATENCY.labels("embedding").time():
+                embedding = np.asarray(embedder.predict_on_batch(test_image))[0]
+            self._record_timings(compute=time.perf_counter() - start)
+        with PHASE_LATENCY.labels("similarity_search").time():
+            return index.search(embedding, k)
+
+    def stats(self):
+        """
+        Returns serving statistics for the prediction pipeline.
+
+        Returns:
+            dict: Model version, batching queue depth and batch sizes, and cache hit/miss counters.
+        """
+        return {
+            "backend": self.config.backend,
+            "model_version": self.registry.version,
+            "batching": self.batcher.stats() if self.batcher is not None else None,
+            "cache": self.cache.stats() if self.cache is not None else None,
+            "admission": self.admission.stats(),
+            "tta": {"default_views": self.config.tta_views, "max_views": self.config.tta_max_views},
+            "runtime_profile": self.runtime_profile,
+        }
@@ -0,0 +1,265 @@
+import os  # Environment of the candidate processes
+import time  # Step timing
+import argparse  # Command-line interface
+import platform  # Host name recorded in the profile
+import itertools  # Full grid of the settings
+import statistics  # Median step latency
+import multiprocessing  # Spawned candidate processes
+from concurrent.futures import ProcessPoolExecutor  # One fresh process per candidate
+from cnnClassifier.config.configuration import ConfigurationManager  # Handles configuration management
+from cnnClassifier.utils.common import save_json  # Writes the profile
+from cnnClassifier.utils.runtime import available_cpus, runtime_profile_env  # Thread and oneDNN environment
+from cnnClassifier import logger  # Logger for tracking and debugging
+
+# TensorFlow is only imported inside the candidate processes, after their settings are in the environment
+
+# TensorFlow's own thread pools and oneDNN default, measured as the baseline
+DEFAULT_SETTINGS = {"intra_op_threads": 0, "inter_op_threads": 0, "onednn": None}
+
+
+def _init_candidate_process(settings: dict):
+    """
+    Puts a candidate's thread and oneDNN settings in the environment before TensorFlow starts.
+    """
+    for name in ("TF_NUM_INTRAOP_THREADS", "TF_NUM_INTEROP_THREADS", "TF_ENABLE_ONEDNN_OPTS",
+                 "OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+        os.environ.pop(name, None)  # The baseline must not inherit this shell's limits
+    os.environ.update(runtime_profile_env(settings))
+    os.environ.pop("TF_CONFIG", None)
+
+
+def _measure_candidate(models: dict, batch_sizes: list, warmup_steps: int, steps: int) -> list:
+    """
+    Times forward passes (inference) or training steps of every workload's model at every batch size.
+    """
+    import numpy as np
+    import tensorflow as tf
+    from cnnClassifier.components.tflite_model import TFLiteModel
+
+    rng = np.random.default_rng(0)
+    measurements = []
+    for workload, (path, backend, input_shape) in models.items():
+        model = TFLiteModel(path) if backend.startswith("tflite") else tf.keras.models.load_model(path)
+
+        for batch_size in batch_sizes:
+            images = rng.random((batch_size, *input_shape), dtype=np.float32)
+            labels = None
+            if workload == "training":
+                classes = model.output_shape[-1]
+                labels = tf.keras.utils.to_categorical(rng.integers(classes, size=batch_size), classes)
+
+            def step():
+                if labels is None:
+                    model.predict_on_batch(images)
+                else:
+                    model.train_on_batch(images, labels)
+
+            for _ in range(warmup_steps):
+                step()
+            times = []
+            for _ in range(steps):
+                start = time.perf_counter()
+                step()
+                times.append(time.perf_counter() - start)
+            measurements.append({
+                "workload": workload,
+                "batch_size": batch_size,
+                "images_per_s": batch_size * steps / sum(times),
+                "p50_step_ms": statistics.median(times) * 1000.0,
+            })
+        tf.keras.backend.clear_session()
+    return [{**measurement, "tensorflow": tf.__version__} for measurement in measurements]
+
+
+class RuntimeTuningPipeline:
+    """
+    A pipeline class to tune TensorFlow's CPU runtime for the current model on this host.
+
+    Every combination of intra-op threads, inter-op threads and oneDNN setting is measured
+    in a fresh process (TensorFlow fixes them when it starts), over the configured batch
+    sizes, next to TensorFlow's defaults. The fastest settings per workload and batch size
+    are saved as the runtime profile that `Training` and `PredictionPipeline` apply at startup.
+    """
+    def __init__(self, workloads=None, intra_op_threads=None, inter_op_threads=None, batch_sizes=None, onednn=None, steps=None):
+        """
+        Initializes the RuntimeTuningPipeline.
+
+        Args:
+            workloads (list, optional): Overrides the configured workloads.
+            intra_op_threads (list, optional): Overrides the configured intra-op thread counts.
+            inter_op_threads (list, optional): Overrides the configured inter-op thread counts.
+            batch_sizes (list, optional): Overrides the configured batch sizes.
+            onednn (list, optional): Overrides the configured oneDNN settings.
+            steps (int, optional): Overrides the configured number of timed steps.
+        """
+        config = ConfigurationManager()
+        self.config = config.get_runtime_tuning_config()
+        self.training_config = config.get_training_config()
+        self.prediction_config = config.get_prediction_config()
+
+        self.workloads = workloads or self.config.workloads
+        self.intra_op_threads = intra_op_threads or self.config.intra_op_threads or self.default_intra_op_threads()
+        self.inter_op_threads = inter_op_threads or self.config.inter_op_threads
+        self.batch_sizes = batch_sizes or self.config.batch_sizes
+        self.onednn = onednn if onednn is not None else self.config.onednn
+        self.steps = steps or self.config.steps
+
+    @staticmethod
+    def default_intra_op_threads() -> list:
+        """
+        Lists the intra-op thread counts tried by default.
+
+        Returns:
+            list: Powers of two below the available core count, and the core count itself.
+        """
+        cpus = len(available_cpus())
+        counts, threads = [], 1
+        while threads < cpus:
+            counts.append(threads)
+            threads *= 2
+        return counts + [cpus]
+
+    def models(self) -> dict:
+        """
+        Selects the model benchmarked for each workload.
+
+        Returns:
+            dict: {workload: (model path, backend, input shape)} for the workloads whose model exists.
+        """
+        candidates = {
+            "inference": (str(self.prediction_config.model_path), self.prediction_config.backend,
+                          list(self.prediction_config.params_image_size)),
+            "training": (str(self.training_config.updated_base_model_path), "keras",
+                         list(self.training_config.params_image_size)),
+        }
+        models = {}
+        for workload in self.workloads:
+            if workload not in candidates:
+                raise ValueError(f"Unknown workload: {workload}")
+            if not os.path.exists(candidates[workload][0]):
+                logger.warning(f"Skipping the {workload} workload: {candidates[workload][0]} does not exist")
+                continue
+            models[workload] = candidates[workload]
+        return models
+
+    def candidates(self) -> list:
+        """
+        Lists the settings to measure, TensorFlow's defaults first.
+
+        Returns:
+            list: Dictionaries of intra_op_threads, inter_op_threads and onednn.
+        """
+        grid = itertools.product(self.intra_op_threads, self.inter_op_threads, self.onednn)
+        return [dict(DEFAULT_SETTINGS)] + [
+            {"intra_op_threads": intra, "inter_op_threads": inter, "onednn": enabled}
+            for intra, inter, enabled in grid
+        ]
+
+    def build_profile(self, results: list) -> dict:
+        """
+        Picks the fastest settings per workload and batch size.
+
+        Args:
+            results (list): Every measurement, with its settings.
+
+        Returns:
+            dict: The runtime profile.
+        """
+        workloads = {}
+        for workload in self.workloads:
+            by_batch_size = {}
+            for batch_size in self.batch_sizes:
+                rows = [r for r in results if r["workload"] == workload and r["batch_size"] == batch_size]
+                if not rows:
+                    continue
+                best = max(rows, key=lambda r: r["images_per_s"])
+                default = next((r for r in rows if r["settings"] == DEFAULT_SETTINGS), None)
+                by_batch_size[str(batch_size)] = {
+                    **best["settings"],
+                    "images_per_s": best["images_per_s"],
+                    "p50_step_ms": best["p50_step_ms"],
+                    "default_images_per_s": default["images_per_s"] if default else None,
+                    "speedup": best["images_per_s"] / default["images_per_s"] if default else None,
+                }
+            if by_batch_size:
+                workloads[workload] = {
+                    "best_batch_size": int(max(by_batch_size, key=lambda size: by_batch_size[size]["images_per_s"])),
+                    "by_batch_size": by_batch_size,
+                }
+        return {
+            "host": platform.node(),
+            "cpu_count": os.cpu_count(),
+            "available_cpus": len(available_cpus()),
+            "tensorflow": next((r["tensorflow"] for r in results), None),
+            "workloads": workloads,
+            "results": results,
+        }
+
+    def main(self):
+        """
+        Measures every candidate and saves the runtime profile.
+
+        Returns:
+            dict: The runtime profile.
+        """
+        models = self.models()
+        if not models:
+            raise FileNotFoundError("No model to tune; run the prepare_base_model and training stages first")
+        candidates = self.candidates()
+        logger.info(f"Tuning {', '.join(models)} over {len(candidates)} settings and batch sizes {self.batch_sizes}")
+
+        context = multiprocessing.get_context("spawn")  # Fresh processes, so every setting applies before TensorFlow starts
+        results = []
+        for index, settings in enumerate(candidates):
+            with ProcessPoolExecutor(max_workers=1, mp_context=context,
+                                     initializer=_init_candidate_process, initargs=(settings,)) as pool:
+                try:
+                    measurements = pool.submit(
+                        _measure_candidate, models, self.batch_sizes, self.config.warmup_steps, self.steps
+                    ).result()
+                except Exception:
+                    logger.exception(f"Settings {settings} failed")
+                    continue
+            for measurement in measurements:
+                results.append({**measurement, "settings": settings})
+                logger.info(
+                    f"[{index + 1}/{len(candidates)}] {measurement['workload']} batch {measurement['batch_size']} "
+                    f"{settings}: {measurement['images_per_s']:.1f} images/s"
+                )
+
+        profile = self.build_profile(results)
+        save_json(path=self.config.profile_path, data=profile)
+        for workload, tuned in profile["workloads"].items():
+            for batch_size, best in tuned["by_batch_size"].items():
+                speedup = f" ({best['speedup']:.2f}x the defaults)" if best["speedup"] else ""
+                logger.info(
+                    f"Best {workload} settings at batch size {batch_size}: {best['intra_op_threads'] or 'default'} intra-op, "
+                    f"{best['inter_op_threads'] or 'default'} inter-op threads, oneDNN {best['onednn']}, "
+                    f"{best['images_per_s']:.1f} images/s{speedup}"
+                )
+        return profile
+
+
+# Main execution block
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Tune TensorFlow's thread pools, batch size and oneDNN for the current model on this host")
+    parser.add_argument("--workloads", nargs="+", choices=["inference", "training"], default=None, help="Workloads to tune")
+    parser.add_argument("--intra-op-threads", type=int, nargs="+", default=None, help="Intra-op thread counts to try")
+    parser.add_argument("--inter-op-threads", type=int, nargs="+", default=None, help="Inter-op thread counts to try")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=None, help="Batch sizes to measure")
+    parser.add_argument("--onednn", nargs="+", choices=["on", "off"], default=None, help="oneDNN settings to try")
+    parser.add_argument("--steps", type=int, default=None, help="Timed steps per batch size")
+    args = parser.parse_args()
+
+    try:
+        RuntimeTuningPipeline(
+            workloads=args.workloads,
+            intra_op_threads=args.intra_op_threads,
+            inter_op_threads=args.inter_op_threads,
+            batch_sizes=args.batch_sizes,
+            onednn=[value == "on" for value in args.onednn] if args.onednn else None,
+            steps=args.steps,
+        ).main()
+    except Exception as e:
+        logger.exception(e)
+        raise e
@@ -0,0 +1,134 @@
+import os  # To fork and manage worker processes
+import signal  # To stop workers on shutdown
+import socket  # Listening socket shared by all workers
+from werkzeug.serving import make_server  # WSGI server run inside each worker
+from cnnClassifier import logger  # Logger for tracking and debugging
+from cnnClassifier.config.configuration import ConfigurationManager  # Handles configuration management
+from cnnClassifier.components.tflite_model import TFLiteModel  # Quantized TFLite inference backend
+from cnnClassifier.entity.config_entity import ServingConfig  # Serving configuration
+from cnnClassifier.utils.runtime import worker_cpu_slices, pin_current_process  # CPU pinning helpers
+
+
+class PreforkServer:
+    """
+    A pre-fork server: the parent binds the socket and preloads the model artifact,
+    then forks worker processes that share it copy-on-write and accept on the same socket.
+    """
+    def __init__(self, app, config: ServingConfig, init_worker=None):
+        """
+        Initializes the PreforkServer.
+
+        Args:
+            app: WSGI application served by every worker.
+            config (ServingConfig): Host, port, worker count and per-worker thread settings.
+            init_worker (callable, optional): Called in each worker after fork and CPU pinning,
+                before it starts serving (e.g. to build the prediction pipeline). Defaults to None.
+        """
+        self.app = app
+        self.config = config
+        self.init_worker = init_worker
+        self.cpu_slices = worker_cpu_slices(config.workers, config.threads_per_worker)
+        self.workers = {}  # pid -> worker index
+        self.socket = None
+        self.stopping = False
+
+    def preload(self):
+        """
+        Loads the served model artifact once in the parent process.
+
+        TFLite flatbuffers are read into memory here and shared by all workers after fork.
+        The TensorFlow runtime does not survive a fork, so a Keras model could only be loaded
+        again in every worker; more than one worker therefore requires a TFLite backend.
+
+        Raises:
+            ValueError: If several workers would serve the Keras backend.
+        """
+        prediction_config = ConfigurationManager().get_prediction_config()
+        if not prediction_config.backend.startswith("tflite"):
+            if self.config.workers > 1:
+                raise ValueError(
+                    f"{self.config.workers} workers cannot share the {prediction_config.backend} backend "
+                    "(TensorFlow is not fork-safe); serve a tflite backend or use a single worker"
+                )
+            return
+        if os.path.exists(prediction_config.model_path):
+            TFLiteModel.preload(prediction_config.model_path)
+            logger.info(f"Preloaded {prediction_config.model_path} for {self.config.workers} workers")
+        else:
+            logger.warning(f"{prediction_config.model_path} does not exist yet; each worker loads it when it appears")
+
+    def _spawn(self, index):
+        """
+        Forks one worker process.
+
+        Args:
+            index (int): Worker slot, which selects its CPU slice.
+        """
+        pid = os.fork()
+        if pid:
+            self.workers[pid] = index
+            return
+
+        # Worker process: restore default signal handling, pin CPUs, then serve until terminated
+        exit_code = 0
+        try:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            pin_current_process(self.cpu_slices[index])
+            logger.info(f"Worker {index} (pid {os.getpid()}) serving on CPUs {self.cpu_slices[index]}")
+            if self.init_worker is not None:
+                self.init_worker()
+            server = make_server(
+                self.config.host, self.config.port, self.app, threaded=True, fd=self.socket.fileno()
+            )
+            server.serve_forever()
+        except Exception:
+            logger.exception(f"Worker {index} crashed")
+            exit_code = 1
+        finally:
+            os._exit(exit_code)
+
+    def _shutdown(self, signum, frame):
+        """
+        Signal handler that stops all workers.
+        """
+        self.stopping = True
+        for pid in list(self.workers):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def serve(self):
+        """
+        Preloads the model, binds the socket, forks the workers and respawns any that exit.
+        """
+        self.preload()
+
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.socket.bind((self.config.host, self.config.port))
+        self.socket.listen(128)
+        self.socket.set_inheritable(True)
+        logger.info(f"Listening on {self.config.host}:{self.config.port} with {self.config.workers} workers")
+
+        for index in range(self.config.workers):
+            self._spawn(index)
+
+        signal.signal(signal.SIGTERM, self._shutdown)
+        signal.signal(signal.SIGINT, self._shutdown)
+
+        # Supervise workers: respawn crashed ones until asked to stop
+        while self.workers:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            except InterruptedError:
+                continue
+            index = self.workers.pop(pid, None)
+            if index is not None and not self.stopping:
+                logger.warning(f"Worker {index} (pid {pid}) exited with status {status}, respawning")
+                self._spawn(index)
+
+        self.socket.close()
@@ -9,7 +9,7 @@ STAGE_NAME = "Data Ingestion"
 class DataIngestionTrainingPipeline:
     """
     A pipeline class to handle the data ingestion process, 
-    which includes downloading and extracting data.
+    which includes downloading and extracting data and assigning its split.
     """
     def __init__(self):
         # Constructor - initializes the pipeline
@@ -21,6 +21,7 @@ class DataIngestionTrainingPipeline:
         - Fetch configuration for data ingestion
         - Download the dataset
         - Extract the dataset
+        - Build the split manifest
         """
         # Initialize configuration manager and fetch data ingestion configuration
         config = ConfigurationManager()
@@ -32,6 +33,7 @@ class DataIngestionTrainingPipeline:
         # Perform the data ingestion steps
         data_ingestion.download_file()  # Download the data file
         data_ingestion.extract_zip_file()  # Extract the downloaded zip file
+        data_ingestion.build_split_manifest()  # Hash the images and assign their split
 
 
 # Main execution block
@@ -1,8 +1,12 @@
 # Import necessary modules and classes
+import os  # To detect whether this process is a cluster worker
+import sys  # To relaunch this stage as worker processes
 from cnnClassifier.config.configuration import ConfigurationManager  # Handles configuration management
-from cnnClassifier.components.model_training import Training  # Component for training the model
+from cnnClassifier.utils.runtime import apply_runtime_profile  # Thread and oneDNN settings tuned for this host
 from cnnClassifier import logger  # Logger for tracking and debugging
 
+# TensorFlow is only imported once the runtime profile is applied, since it reads the oneDNN setting on import
+
 # Define the name of the pipeline stage for logging purposes
 STAGE_NAME = "Training"
 
@@ -22,10 +26,27 @@ class ModelTrainingPipeline:
         - Load the base model
         - Prepare data generators for training and validation
         - Train the model using the prepared data
+
+        With `DISTRIBUTED_WORKERS` > 1 and no TF_CONFIG set, this stage is relaunched as that many
+        worker processes on this host, and waits for them. On a multi-host cluster, set TF_CONFIG
+        on every host and run this stage on each of them instead.
         """
         # Initialize configuration manager and fetch the training configuration
         config = ConfigurationManager()
         training_config = config.get_training_config()
+        apply_runtime_profile(training_config.runtime_profile_path, "training", training_config.params_batch_size)
+
+        from cnnClassifier.components.model_training import Training  # Component for training the model
+        from cnnClassifier.components.distributed_training import launch_local_workers  # Local multi-worker launcher
+
+        if training_config.params_distributed_workers > 1 and "TF_CONFIG" not in os.environ:
+            launch_local_workers(
+                command=[sys.executable, os.path.abspath(__file__)],
+                num_workers=training_config.params_distributed_workers,
+                base_port=training_config.distributed_base_port,
+                log_dir=training_config.worker_log_dir
+            )
+            return
 
         # Create a Training object with the fetched configuration
         training = Training(config=training_config)
@@ -0,0 +1,56 @@
+# Import necessary modules and classes
+from cnnClassifier.config.configuration import ConfigurationManager  # Handles configuration management
+from cnnClassifier.components.model_quantization import ModelQuantization  # Quantization component for the model
+from cnnClassifier import logger  # Logger for tracking and debugging
+
+# Define the name of the pipeline stage for logging purposes
+STAGE_NAME = "Model Quantization"
+
+class ModelQuantizationPipeline:
+    """
+    A pipeline class to handle post-training quantization of the trained model.
+    Exports dynamic-range and full-int8 TFLite models and compares them
+    against the Keras model.
+    """
+    def __init__(self):
+        # Constructor - initializes the pipeline
+        pass
+
+    def main(self):
+        """
+        Main method to execute the steps for quantizing the model:
+        - Fetch quantization configuration
+        - Export the dynamic-range and full-int8 TFLite models
+        - Write the accuracy-delta and latency report
+        """
+        # Initialize configuration manager and fetch quantization configuration
+        config = ConfigurationManager()
+        model_quantization_config = config.get_model_quantization_config()
+
+        # Create a ModelQuantization object with the fetched configuration
+        model_quantization = ModelQuantization(config=model_quantization_config)
+
+        # Perform the quantization steps
+        model_quantization.load_model()  # Load the trained Keras model
+        model_quantization.export_dynamic_range()  # Export the dynamic-range quantized model
+        model_quantization.export_int8()  # Export the calibrated full-int8 model
+        model_quantization.compare_backends()  # Compare accuracy and latency against the Keras model
+
+
+# Main execution block
+if __name__ == '__main__':
+    try:
+        # Log the start of the pipeline stage
+        logger.info(f"*******************")
+        logger.info(f">>>>>> stage {STAGE_NAME} started <<<<<<")
+
+        # Create an instance of the pipeline and execute it
+        obj = ModelQuantizationPipeline()
+        obj.main()
+
+        # Log the successful completion of the pipeline stage
+        logger.info(f">>>>>> stage {STAGE_NAME} completed <<<<<<\n\nx==========x")
+    except Exception as e:
+        # Log the exception if an error occurs and re-raise it
+        logger.exception(e)
+        raise e
@@ -0,0 +1,54 @@
+# Import necessary modules and classes
+from cnnClassifier.config.configuration import ConfigurationManager  # Handles configuration management
+from cnnClassifier.components.embedding_extraction import EmbeddingExtraction  # Embedding component for the dataset
+from cnnClassifier import logger  # Logger for tracking and debugging
+
+# Define the name of the pipeline stage for logging purposes
+STAGE_NAME = "Embedding Extraction"
+
+class EmbeddingExtractionPipeline:
+    """
+    A pipeline class to embed the ingested dataset with the frozen backbone.
+    Writes the float16 embedding matrix searched by /similar and its IVF index.
+    """
+    def __init__(self):
+        # Constructor - initializes the pipeline
+        pass
+
+    def main(self):
+        """
+        Main method to execute the steps for extracting the embeddings:
+        - Fetch embedding extraction configuration
+        - Embed every ingested image in batched forward passes
+        - Build the coarse-quantized (IVF) index
+        """
+        # Initialize configuration manager and fetch embedding extraction configuration
+        config = ConfigurationManager()
+        embedding_extraction_config = config.get_embedding_extraction_config()
+
+        # Create an EmbeddingExtraction object with the fetched configuration
+        embedding_extraction = EmbeddingExtraction(config=embedding_extraction_config)
+
+        # Perform the extraction steps
+        embedding_extraction.load_model()  # Load the frozen backbone with pooling
+        embedding_extraction.extract()  # Write the float16 embedding matrix and row metadata
+        embedding_extraction.build_ivf_index()  # Cluster the embeddings into IVF lists
+
+
+# Main execution block
+if __name__ == '__main__':
+    try:
+        # Log the start of the pipeline stage
+        logger.info(f"*******************")
+        logger.info(f">>>>>> stage {STAGE_NAME} started <<<<<<")
+
+        # Create an instance of the pipeline and execute it
+        obj = EmbeddingExtractionPipeline()
+        obj.main()
+
+        # Log the successful completion of the pipeline stage
+        logger.info(f">>>>>> stage {STAGE_NAME} completed <<<<<<\n\nx==========x")
+    except Exception as e:
+        # Log the exception if an error occurs and re-raise it
+        logger.exception(e)
+        raise e
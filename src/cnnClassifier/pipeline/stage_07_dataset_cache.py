@@ -0,0 +1,49 @@
+# Import necessary modules and classes
+from cnnClassifier.config.configuration import ConfigurationManager  # Handles configuration management
+from cnnClassifier.components.dataset_cache import DatasetCache  # Preprocessed dataset cache component
+from cnnClassifier import logger  # Logger for tracking and debugging
+
+# Define the name of the pipeline stage for logging purposes
+STAGE_NAME = "Dataset Cache"
+
+class DatasetCachePipeline:
+    """
+    A pipeline class to decode and resize the ingested dataset once.
+    Writes a memory-mappable uint8 image array read by the training and evaluation loaders.
+    """
+    def __init__(self):
+        # Constructor - initializes the pipeline
+        pass
+
+    def main(self):
+        """
+        Main method to execute the steps for caching the dataset:
+        - Fetch dataset cache configuration
+        - Decode and resize every image into the cache, unless it is up to date
+        """
+        # Initialize configuration manager and fetch dataset cache configuration
+        config = ConfigurationManager()
+        dataset_cache_config = config.get_dataset_cache_config()
+
+        # Create a DatasetCache object with the fetched configuration and build the cache
+        dataset_cache = DatasetCache(config=dataset_cache_config)
+        dataset_cache.build()
+
+
+# Main execution block
+if __name__ == '__main__':
+    try:
+        # Log the start of the pipeline stage
+        logger.info(f"*******************")
+        logger.info(f">>>>>> stage {STAGE_NAME} started <<<<<<")
+
+        # Create an instance of the pipeline and execute it
+        obj = DatasetCachePipeline()
+        obj.main()
+
+        # Log the successful completion of the pipeline stage
+        logger.info(f">>>>>> stage {STAGE_NAME} completed <<<<<<\n\nx==========x")
+    except Exception as e:
+        # Log the exception if an error occurs and re-raise it
+        logger.exception(e)
+        raise e
@@ -1,8 +1,10 @@
 import os
 import json
 import yaml
-import joblib
+import io
 import base64
+import numpy as np
+from PIL import Image
 from box.exceptions import BoxValueError
 from ensure import ensure_annotations
 from cnnClassifier import logger
@@ -88,6 +90,7 @@ def save_bin(data: Any, path: Path):
         data (Any): Data to save in binary format.
         path (Path): Path to the binary file.
     """
+    import joblib  # Imported lazily to keep the serving import path light
     joblib.dump(value=data, filename=path)
     logger.info(f"Binary file saved at: {path}")
 
@@ -102,6 +105,7 @@ def load_bin(path: Path) -> Any:
     Returns:
         Any: Object stored in the binary file.
     """
+    import joblib  # Imported lazily to keep the serving import path light
     data = joblib.load(path)
     logger.info(f"Binary file loaded from: {path}")
     return data
@@ -120,18 +124,65 @@ def get_size(path: Path) -> str:
     size_in_kb = round(os.path.getsize(path) / 1024)
     return f"~ {size_in_kb} KB"
 
-# Function to decode a Base64 string into an image file
-def decodeImage(imgstring, fileName):
-    """Decodes a Base64 string into an image file.
+# Function to decode a Base64 string into image bytes or an image file
+def decodeImage(imgstring, fileName=None):
+    """Decodes a Base64 string into image bytes, optionally saving them to a file.
 
     Args:
         imgstring (str): Base64-encoded image string.
-        fileName (str): Name of the file to save the decoded image.
+        fileName (str, optional): Name of the file to save the decoded image. Defaults to None.
+
+    Returns:
+        bytes: Decoded image bytes.
     """
     imgdata = base64.b64decode(imgstring)
-    with open(fileName, 'wb') as f:
-        f.write(imgdata)
-        f.close()
+    if fileName is not None:
+        with open(fileName, 'wb') as f:
+            f.write(imgdata)
+    return imgdata
+
+class InvalidInput(ValueError):
+    """Raised when a request's image or options cannot be used, as opposed to a server-side failure."""
+
+
+# Function to decode image bytes or an array into a preprocessed model input
+def preprocess_image(data, target_size, rescale=1.0 / 255):
+    """Decodes an image in memory into a float32 array ready for the model.
+
+    Mirrors the training generators: RGB conversion, bilinear resize and rescaling.
+
+    Args:
+        data (bytes | np.ndarray): Encoded image bytes or a decoded HxWxC / HxW array of 0-255 pixels.
+        target_size (tuple): Target (height, width) of the model input.
+        rescale (float, optional): Factor applied to pixel values. Defaults to 1/255.
+
+    Returns:
+        np.ndarray: Array of shape (height, width, 3) and dtype float32.
+
+    Raises:
+        InvalidInput: If the data is not a decodable image.
+    """
+    try:
+        if isinstance(data, np.ndarray):
+            # Arrays hold raw 0-255 pixel values; single-channel images may carry a trailing axis
+            pixels = data[..., 0] if data.ndim == 3 and data.shape[-1] == 1 else data
+            if pixels.dtype != np.uint8:
+                pixels = np.clip(pixels, 0, 255).astype(np.uint8)
+            img = Image.fromarray(pixels)
+        else:
+            img = Image.open(io.BytesIO(data))
+
+        # Match the channel layout and interpolation used by flow_from_directory
+        if img.mode != "RGB":
+            img = img.convert("RGB")
+        height, width = target_size
+        if img.size != (width, height):
+            img = img.resize((width, height), Image.BILINEAR)
+        img.load()  # Truncated files only fail once the pixels are read
+    except (OSError, ValueError, TypeError) as e:
+        raise InvalidInput(f"Cannot decode image: {e}") from e
+
+    return np.asarray(img, dtype=np.float32) * rescale
 
 # Function to encode an image file into a Base64 string
 def encodeImageIntoBase64(croppedImagePath):
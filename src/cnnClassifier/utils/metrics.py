@@ -0,0 +1,285 @@
+import time
+import bisect
+import threading
+from functools import wraps
+from contextlib import contextmanager
+
+# Default latency buckets in seconds, from sub-millisecond decode steps up to slow forward passes
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class _ShardedValues:
+    """Per-thread arrays of numbers summed at scrape time.
+
+    Each thread only ever writes its own shard, so the hot path takes no lock. A lock is
+    taken once per thread to register its shard, and shards of finished threads are folded
+    into a base array so short-lived request threads do not accumulate.
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self._local = threading.local()
+        self._shards = []  # (thread, values) pairs
+        self._base = [0] * size  # Folded values of finished threads
+        self._lock = threading.Lock()
+
+    def shard(self) -> list:
+        """Returns the calling thread's array, registering it on first use."""
+        values = getattr(self._local, "values", None)
+        if values is None:
+            values = [0] * self.size
+            self._local.values = values
+            with self._lock:
+                if len(self._shards) > 64:
+                    self._fold()
+                self._shards.append((threading.current_thread(), values))
+        return values
+
+    def _fold(self):
+        """Merges shards of finished threads into the base array (caller holds the lock)."""
+        alive = []
+        for thread, values in self._shards:
+            if thread.is_alive():
+                alive.append((thread, values))
+            else:
+                self._base = [a + b for a, b in zip(self._base, values)]
+        self._shards = alive
+
+    def totals(self) -> list:
+        """Returns the element-wise sum over all threads."""
+        with self._lock:
+            self._fold()
+            totals = list(self._base)
+            for _, values in self._shards:
+                totals = [a + b for a, b in zip(totals, values)]
+        return totals
+
+
+class _Metric:
+    """Base class of a metric family with optional labels."""
+
+    type = None
+
+    def __init__(self, name: str, documentation: str, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._children_lock = threading.Lock()
+
+    def labels(self, *labelvalues):
+        """Returns the child metric for the given label values, creating it on first use."""
+        child = self._children.get(labelvalues)
+        if child is None:
+            with self._children_lock:
+                child = self._children.setdefault(labelvalues, self._new_child())
+        return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def _label_str(self, labelvalues, extra=None) -> str:
+        pairs = list(zip(self.labelnames, labelvalues)) + (extra or [])
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{key}="{value}"' for key, value in pairs) + "}"
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        for labelvalues, child in sorted(self._children.items()):
+            lines.extend(self._render_child(labelvalues, child))
+        return lines
+
+    def _render_child(self, labelvalues, child) -> list:
+        return [f"{self.name}{self._label_str(labelvalues)} {child.value()}"]
+
+
+class _CounterChild:
+    def __init__(self):
+        self._values = _ShardedValues(1)
+
+    def inc(self, amount=1):
+        self._values.shard()[0] += amount
+
+    def value(self):
+        return self._values.totals()[0]
+
+
+class Counter(_Metric):
+    """Monotonically increasing count, e.g. requests served."""
+
+    type = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount=1):
+        self.labels().inc(amount)
+
+
+class _GaugeChild(_CounterChild):
+    def dec(self, amount=1):
+        self._values.shard()[0] -= amount
+
+    @contextmanager
+    def track_in_progress(self):
+        self.inc()
+        try:
+            yield
+        finally:
+            self.dec()
+
+
+class Gauge(_Metric):
+    """Value that goes up and down, e.g. requests in flight."""
+
+    type = "gauge"
+
+    def _new_child(self):
+        return _GaugeChild()
+
+
+class _HistogramChild:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        # One slot per bucket plus +Inf, then the running sum and count
+        self._values = _ShardedValues(len(buckets) + 3)
+
+    def observe(self, value: float):
+        values = self._values.shard()
+        values[bisect.bisect_left(self.buckets, value)] += 1
+        values[-2] += value
+        values[-1] += 1
+
+    @contextmanager
+    def time(self):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+
+class Histogram(_Metric):
+    """Distribution of observations over fixed buckets, e.g. latencies."""
+
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float):
+        self.labels().observe(value)
+
+    def time(self):
+        return self.labels().time()
+
+    def _render_child(self, labelvalues, child) -> list:
+        totals = child._values.totals()
+        lines, cumulative = [], 0
+        for bound, count in zip(list(self.buckets) + ["+Inf"], totals[:-2]):
+            cumulative += count
+            lines.append(f"{self.name}_bucket{self._label_str(labelvalues, [('le', bound)])} {cumulative}")
+        lines.append(f"{self.name}_sum{self._label_str(labelvalues)} {totals[-2]}")
+        lines.append(f"{self.name}_count{self._label_str(labelvalues)} {totals[-1]}")
+        return lines
+
+
+class _CallbackMetric(_Metric):
+    """Metric whose value is computed at scrape time, e.g. a queue depth."""
+
+    def __init__(self, name: str, documentation: str, metric_type: str, callback):
+        super().__init__(name, documentation)
+        self.type = metric_type
+        self.callback = callback
+
+    def render(self) -> list:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type}",
+            f"{self.name} {self.callback()}",
+        ]
+
+
+class MetricsRegistry:
+    """Collection of metrics rendered together in the Prometheus text format."""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            # Re-registering a name returns the existing metric so modules can be re-imported safely
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name, documentation, labelnames=()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def register_callback(self, name, documentation, metric_type, callback):
+        """Registers (or replaces) a metric whose value is read from `callback` at scrape time."""
+        with self._lock:
+            self._metrics[name] = _CallbackMetric(name, documentation, metric_type, callback)
+
+    def render(self) -> str:
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# Process-wide registry used by the serving path
+REGISTRY = MetricsRegistry()
+
+# Metrics shared by the web app and the prediction pipeline
+REQUESTS = REGISTRY.counter("cnn_http_requests_total", "HTTP requests served.", ("endpoint", "status"))
+REQUEST_ERRORS = REGISTRY.counter("cnn_http_request_errors_total", "HTTP requests that failed.", ("endpoint",))
+IN_FLIGHT = REGISTRY.gauge("cnn_http_requests_in_flight", "HTTP requests being processed.", ("endpoint",))
+REQUEST_LATENCY = REGISTRY.histogram("cnn_http_request_duration_seconds", "HTTP request latency.", ("endpoint",))
+PHASE_LATENCY = REGISTRY.histogram(
+    "cnn_prediction_phase_seconds", "Latency of each phase of the prediction path.", ("phase",)
+)
+BATCH_SIZE = REGISTRY.histogram(
+    "cnn_batch_size", "Number of images per forward pass.", buckets=(1, 2, 4, 8, 16, 32, 64, 128)
+)
+
+
+# Decorator to count, time and track the in-flight requests of a Flask view
+def track_requests(endpoint: str):
+    """Instruments a Flask view with request, error, in-flight and latency metrics.
+
+    Args:
+        endpoint (str): Endpoint label used for the view's metrics.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            with IN_FLIGHT.labels(endpoint).track_in_progress():
+                try:
+                    response = view(*args, **kwargs)
+                except Exception:
+                    REQUEST_ERRORS.labels(endpoint).inc()
+                    REQUESTS.labels(endpoint, "500").inc()
+                    raise
+                finally:
+                    REQUEST_LATENCY.labels(endpoint).observe(time.perf_counter() - start)
+
+            # Views return a response or a (response, status) tuple
+            status = response[1] if isinstance(response, tuple) else getattr(response, "status_code", 200)
+            REQUESTS.labels(endpoint, str(status)).inc()
+            if int(status) >= 500:
+                REQUEST_ERRORS.labels(endpoint).inc()
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,157 @@
+import os
+import sys
+import json
+from cnnClassifier import logger
+
+
+# Function to build environment variables limiting the threads used by TensorFlow and BLAS libraries
+def thread_limit_env(num_threads: int) -> dict:
+    """Builds environment variables capping the CPU threads of a child process.
+
+    The variables are read when TensorFlow and the BLAS/OpenMP runtimes start,
+    so they must be set before the child imports them.
+
+    Args:
+        num_threads (int): Maximum number of threads per thread pool.
+
+    Returns:
+        dict: Environment variables to merge into the child's environment.
+    """
+    num_threads = str(max(1, int(num_threads)))
+    return {
+        "TF_NUM_INTRAOP_THREADS": num_threads,
+        "TF_NUM_INTEROP_THREADS": "1" if num_threads == "1" else "2",
+        "OMP_NUM_THREADS": num_threads,
+        "MKL_NUM_THREADS": num_threads,
+        "OPENBLAS_NUM_THREADS": num_threads,
+    }
+
+# Function to list the CPUs the current process may run on
+def available_cpus() -> list:
+    """Lists the CPUs available to the current process.
+
+    Returns:
+        list: Sorted CPU ids (falls back to all CPUs where affinity is unsupported).
+    """
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+# Function to size per-worker thread pools and CPU slices for multi-process serving
+def worker_cpu_slices(workers: int, threads_per_worker: int = 0) -> list:
+    """Splits the available CPUs into one slice per worker process.
+
+    Args:
+        workers (int): Number of worker processes.
+        threads_per_worker (int, optional): CPUs per worker (0 divides the cores evenly). Defaults to 0.
+
+    Returns:
+        list: One list of CPU ids per worker; slices wrap around if workers oversubscribe the host.
+    """
+    cpus = available_cpus()
+    per_worker = threads_per_worker or max(1, len(cpus) // max(1, workers))
+    return [
+        [cpus[(worker * per_worker + i) % len(cpus)] for i in range(per_worker)]
+        for worker in range(workers)
+    ]
+
+# Function to pin the current process to CPUs and cap its thread pools before TensorFlow starts
+def pin_current_process(cpus: list):
+    """Pins the current process to the given CPUs and caps its thread pools to match.
+
+    Must run before the TensorFlow runtime initialises (i.e. before the first op or model load).
+
+    Args:
+        cpus (list): CPU ids the process may run on.
+    """
+    if hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cpus)
+    env = thread_limit_env(len(cpus))
+    os.environ.update(env)
+
+    # TensorFlow may already be imported (but not yet initialised); size its pools explicitly too
+    if "tensorflow" in sys.modules:
+        tf = sys.modules["tensorflow"]
+        tf.config.threading.set_intra_op_parallelism_threads(int(env["TF_NUM_INTRAOP_THREADS"]))
+        tf.config.threading.set_inter_op_parallelism_threads(int(env["TF_NUM_INTEROP_THREADS"]))
+
+# Function to build the environment variables of tuned thread and oneDNN settings
+def runtime_profile_env(settings: dict) -> dict:
+    """Builds the environment variables of a set of thread and oneDNN settings.
+
+    Args:
+        settings (dict): `intra_op_threads` and `inter_op_threads` (0 keeps TensorFlow's default)
+            and `onednn` (True, False or None to keep the default).
+
+    Returns:
+        dict: Environment variables to set before TensorFlow starts.
+    """
+    env = {}
+    if settings.get("intra_op_threads"):
+        env.update(thread_limit_env(settings["intra_op_threads"]))
+    if settings.get("inter_op_threads"):
+        env["TF_NUM_INTEROP_THREADS"] = str(int(settings["inter_op_threads"]))
+    elif settings.get("intra_op_threads"):
+        del env["TF_NUM_INTEROP_THREADS"]
+    if settings.get("onednn") is not None:
+        env["TF_ENABLE_ONEDNN_OPTS"] = "1" if settings["onednn"] else "0"
+    return env
+
+# Function to apply the runtime profile tuned on this host to the current process
+def apply_runtime_profile(profile_path, workload: str, batch_size: int):
+    """Applies the thread and oneDNN settings tuned for a workload on this host.
+
+    The settings measured at the batch size closest to `batch_size` are used, with the
+    intra-op threads capped to the CPUs this process may run on (e.g. a pinned serving
+    worker's slice). The environment is updated for TensorFlow and child processes, and
+    the thread pools are also sized directly when TensorFlow is imported but not yet
+    initialised. oneDNN is read when TensorFlow is imported, so it only changes if this
+    runs first.
+
+    Args:
+        profile_path (Path): Runtime profile written by the runtime tuning pipeline.
+        workload (str): "inference" or "training".
+        batch_size (int): Batch size the workload runs with.
+
+    Returns:
+        dict: The applied settings, or None when there is no profile for the workload.
+    """
+    if not profile_path or not os.path.exists(profile_path):
+        return None
+    with open(profile_path) as f:
+        profile = json.load(f)
+    by_batch_size = profile.get("workloads", {}).get(workload, {}).get("by_batch_size")
+    if not by_batch_size:
+        return None
+    if profile.get("cpu_count") != os.cpu_count():
+        logger.warning(f"Ignoring {profile_path}: tuned on {profile.get('cpu_count')} CPUs, this host has {os.cpu_count()}")
+        return None
+
+    closest = min(by_batch_size, key=lambda size: abs(int(size) - batch_size))
+    settings = dict(by_batch_size[closest])
+    if settings["intra_op_threads"]:
+        settings["intra_op_threads"] = min(settings["intra_op_threads"], len(available_cpus()))
+    env = runtime_profile_env(settings)
+
+    tf = sys.modules.get("tensorflow")
+    if tf is not None and "TF_ENABLE_ONEDNN_OPTS" in env and os.environ.get("TF_ENABLE_ONEDNN_OPTS") != env["TF_ENABLE_ONEDNN_OPTS"]:
+        logger.warning("TensorFlow is already imported; the tuned oneDNN setting applies to processes started from now on")
+    os.environ.update(env)
+
+    # TensorFlow may already be imported (but not yet initialised); size its pools explicitly too
+    if tf is not None:
+        try:
+            if settings["intra_op_threads"]:
+                tf.config.threading.set_intra_op_parallelism_threads(settings["intra_op_threads"])
+            if settings["inter_op_threads"]:
+                tf.config.threading.set_inter_op_parallelism_threads(settings["inter_op_threads"])
+        except RuntimeError:
+            logger.warning("TensorFlow is already initialised; the tuned thread counts apply to processes started from now on")
+
+    logger.info(
+        f"Applied the {workload} runtime profile for batch size {closest}: "
+        f"{settings['intra_op_threads'] or 'default'} intra-op threads, "
+        f"{settings['inter_op_threads'] or 'default'} inter-op threads, "
+        f"oneDNN {'default' if settings['onednn'] is None else ('on' if settings['onednn'] else 'off')}"
+    )
+    return settings